@@ -0,0 +1,65 @@
+"""
+Microbenchmark for canton lookups: the precomputed index in src.cantons versus the previous linear scan.
+
+Run from the repository root:
+    python -m benchmarks.bench_cantons
+"""
+import timeit
+
+from src.cantons import CANTONS, LANGUAGES, get_all_canton_names, get_canton_code, get_canton_name
+from src.i18n import translations
+
+LOOKUPS = ["Zurich", "Zürich", "Genève", "Geneva", "Ticino", "Graubünden", "Jura", "Unknown"]
+
+
+def linear_get_canton_code(canton_name):
+    # Previous implementation: scan every canton and rebuild lowercased name lists per call
+    canton_name_lower = canton_name.lower()
+    for code, names in CANTONS.items():
+        if isinstance(names, dict):
+            if canton_name_lower in [name.lower() for name in names.values()]:
+                return code
+        elif canton_name_lower == names.lower():
+            return code
+    return None
+
+
+def linear_get_all_canton_names(language='en'):
+    names = []
+    for code in CANTONS.keys():
+        canton = CANTONS.get(code.upper())
+        if isinstance(canton, dict):
+            names.append(canton.get(language, canton.get('en', list(canton.values())[0])))
+        else:
+            names.append(canton)
+    return names
+
+
+def bench(label, func, number=20000):
+    seconds = min(timeit.repeat(func, number=number, repeat=5))
+    per_call_us = seconds / number * 1e6
+    print(f"{label:<40} {per_call_us:8.3f} µs/call")
+    return per_call_us
+
+
+def main():
+    print("get_canton_code")
+    old = bench("  linear scan", lambda: [linear_get_canton_code(name) for name in LOOKUPS])
+    new = bench("  precomputed index", lambda: [get_canton_code(name) for name in LOOKUPS])
+    print(f"  speedup: {old / new:.1f}x")
+
+    print("get_all_canton_names")
+    old = bench("  recomputed per call", lambda: linear_get_all_canton_names('de'))
+    new = bench("  cached per language", lambda: get_all_canton_names('de'))
+    print(f"  speedup: {old / new:.1f}x")
+
+    print("get_canton_name")
+    bench("  precomputed per language", lambda: get_canton_name('ZH', 'de'))
+    bench("  all codes, every language", lambda: [get_canton_name(code, language) for language in LANGUAGES for code in CANTONS])
+
+    print("translations")
+    bench("  cached table per language", lambda: [translations(language)['search'] for language in LANGUAGES])
+
+
+if __name__ == "__main__":
+    main()
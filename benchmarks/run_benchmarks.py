@@ -0,0 +1,330 @@
+"""
+End-to-end benchmark suite for SwissPropertyAgent, run against the offline fake backends.
+
+Reports latency percentiles (p50/p95/p99), throughput and peak traced memory for find_properties
+(sequential, concurrent and listing-store hits), payload ingest, ListingTable filtering/sorting, heatmap tiles, UI rendering
+and cold start.
+
+Run from the repository root:
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --json results.json
+    python -m benchmarks.run_benchmarks --compare baseline.json --threshold 0.25   # exit 1 on regression (CI)
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+# Portal latencies (seconds) injected by the fake extractor; comparis is the slow portal as in production
+PORTAL_LATENCY = {"homegate": 0.05, "immoscout24": 0.08, "comparis": 0.12}
+TABLE_SIZES = (10_000, 50_000)
+INGEST_SIZE = 10_000
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return float('nan')
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def measure(name: str, func: Callable[[], object], iterations: int, warmup: int = 1,
+            setup: Optional[Callable[[], None]] = None) -> Dict:
+    """
+    Time `func` over `iterations` runs and trace its peak memory on one extra run.
+
+    :param setup: Called before every run, outside the timed section
+    :return: Result dict with latencies in milliseconds, throughput in runs per second and peak memory in KiB
+    """
+    for _ in range(warmup):
+        if setup:
+            setup()
+        func()
+
+    latencies = []
+    for _ in range(iterations):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total = sum(latencies)
+    return {
+        "name": name,
+        "iterations": iterations,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "throughput_per_s": iterations / total if total else float('inf'),
+        "peak_memory_kib": peak / 1024,
+    }
+
+
+def make_agent(**extractor_options):
+    from src.fake_backends import FakeExtractor, FakeLLM
+    from src.swiss_real_estate_agent import SwissPropertyAgent
+
+    extractor = FakeExtractor(source_latency=PORTAL_LATENCY, **extractor_options)
+    return SwissPropertyAgent(extractor=extractor, llm=FakeLLM(), use_cache=False, use_listing_db=False)
+
+
+def bench_find_properties(iterations: int) -> List[Dict]:
+    agent = make_agent()
+    search = dict(city="Zurich", min_price=500_000, max_price=2_000_000, num_results=10)
+    cold = agent.listing_store.invalidate
+    return [
+        measure("find_properties/sequential", lambda: agent.find_properties(**search), iterations, setup=cold),
+        measure("find_properties/concurrent", lambda: agent.find_properties(concurrent=True, **search), iterations, setup=cold),
+        measure("find_properties/store_hit", lambda: agent.find_properties(**search), iterations * 20),
+        bench_listing_db_search(iterations * 20),
+        bench_concurrent_identical_searches(iterations),
+    ]
+
+
+def bench_concurrent_identical_searches(iterations: int, sessions: int = 8) -> Dict:
+    """A burst of identical searches from separate sessions; single-flight coalescing turns it into one extraction."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    from src.fake_backends import FakeExtractor, FakeLLM
+    from src.swiss_real_estate_agent import SwissPropertyAgent
+
+    extractor = FakeExtractor(source_latency=PORTAL_LATENCY)
+    agents = [SwissPropertyAgent(extractor=extractor, llm=FakeLLM(), use_cache=False, use_listing_db=False)
+              for _ in range(sessions)]
+    search = dict(city="Zurich", min_price=500_000, max_price=2_000_000, num_results=10)
+
+    def burst():
+        for agent in agents:
+            agent.listing_store.invalidate()
+        with ThreadPoolExecutor(max_workers=sessions) as executor:
+            list(executor.map(lambda agent: agent.find_properties(**search), agents))
+
+    return measure(f"find_properties/burst_{sessions}_sessions", burst, iterations)
+
+
+def bench_listing_db_search(iterations: int) -> Dict:
+    from src.crawler import ListingCrawler
+    from src.fake_backends import FakeExtractor, FakeLLM
+    from src.listing_db import ListingDatabase
+    from src.swiss_real_estate_agent import SwissPropertyAgent
+
+    agent = SwissPropertyAgent(extractor=FakeExtractor(listings_per_portal=2_000), llm=FakeLLM(), use_cache=False,
+                               listing_db=ListingDatabase(os.path.join(tempfile.mkdtemp(prefix="swiss-re-bench-db-"), "listings.sqlite3")))
+    ListingCrawler(agent, cities=["Zurich"]).crawl_once()
+    search = dict(city="Zurich", min_price=800_000, max_price=1_500_000, canton="Zurich", num_results=10)
+    return measure("find_properties/listing_db", lambda: agent.find_properties(**search), iterations)
+
+
+def synthetic_listings(size: int) -> List[Dict]:
+    from src.fake_backends import FakeExtractor
+    from src.swiss_real_estate_agent import PORTAL_URL_TEMPLATES
+
+    extractor = FakeExtractor(listings_per_portal=size // len(PORTAL_URL_TEMPLATES))
+    urls = [url.format(city="zurich", min_price=0, max_price=10_000_000)
+            for templates in PORTAL_URL_TEMPLATES.values() for url in templates[:1]]
+    return extractor.extract(urls, {"schema": {"properties": {"properties": {}}}})["data"]["properties"]
+
+
+def synthetic_table(size: int):
+    from src.listing_table import ListingTable
+
+    return ListingTable(synthetic_listings(size))
+
+
+def bench_listing_table(iterations: int) -> List[Dict]:
+    results = []
+    for size in TABLE_SIZES:
+        table = synthetic_table(size)
+        results.extend([
+            measure(f"listing_table/filter/{size}",
+                    lambda: table.filter(min_price=800_000, max_price=1_500_000, canton_code="ZH", limit=50), iterations),
+            measure(f"listing_table/sort_price/{size}", lambda: table.sort('price', limit=50), iterations),
+            measure(f"listing_table/sort_price_per_sqm/{size}",
+                    lambda: table.sort('price_per_sqm', min_price=800_000, max_price=1_500_000, limit=50), iterations),
+            measure(f"listing_table/canton_summary/{size}", table.canton_summary, iterations),
+        ])
+    return results
+
+
+def bench_dedup(iterations: int) -> List[Dict]:
+    from src.dedup import deduplicate
+
+    listings = synthetic_listings(5_000)
+    return [measure("dedup/5000", lambda: deduplicate(listings), max(1, iterations // 4))]
+
+
+def bench_ingest(iterations: int) -> List[Dict]:
+    """Parse and validate a 10k-listing extraction payload, clean and with 1% malformed rows."""
+    from src.ingest import ingest_properties, quarantine
+
+    listings = synthetic_listings(INGEST_SIZE)
+    payload = json.dumps({"success": True, "data": {"properties": listings}}, ensure_ascii=False)
+    malformed = list(listings)
+    for index in range(0, len(malformed), 100):
+        malformed[index] = {**malformed[index], "price": {"amount": None}} if index % 200 else "not a listing"
+    runs = max(1, iterations // 4)
+    results = [
+        measure(f"ingest/validate/{INGEST_SIZE}", lambda: ingest_properties(listings), runs),
+        measure(f"ingest/json_validate/{INGEST_SIZE}", lambda: ingest_properties(json.loads(payload)["data"]["properties"]), runs),
+        measure(f"ingest/validate_malformed/{INGEST_SIZE}", lambda: ingest_properties(malformed, source="benchmark"), runs),
+    ]
+    quarantine.clear()
+    return results
+
+
+def bench_heatmap(iterations: int) -> List[Dict]:
+    """Rebuilding the national heatmap tiles from 50k listings spread over 500 municipalities, and serving them."""
+    from src.heatmap import MarketHeatmap
+    from src.market_stats import MarketStatistics
+    from src.swiss_cities_database import swiss_cities
+
+    listings = synthetic_listings(50_000)
+    municipalities = sorted(swiss_cities.cities)[:500]
+    stats = MarketStatistics()
+    chunk = len(listings) // len(municipalities)
+    for index, city in enumerate(municipalities):
+        stats.observe(city, listings[index * chunk:(index + 1) * chunk])
+    heatmap = MarketHeatmap(stats)
+    heatmap.refresh()
+    return [
+        measure("heatmap/compute/50000", heatmap.compute, max(1, iterations // 4)),
+        measure("heatmap/tiles", heatmap.tiles, iterations),
+    ]
+
+
+UI_SCRIPT = """
+from src.ui import main
+main()
+"""
+
+
+def bench_ui(iterations: int) -> List[Dict]:
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        print("streamlit is not installed; skipping UI benchmarks", file=sys.stderr)
+        return []
+
+    def render_search():
+        app = AppTest.from_string(UI_SCRIPT, default_timeout=60)
+        app.run()
+        app.text_input[0].input("Zurich")
+        app.button[0].click().run()
+        if app.exception:
+            raise RuntimeError(f"UI raised: {app.exception[0].value}")
+
+    def render_idle():
+        AppTest.from_string(UI_SCRIPT, default_timeout=60).run()
+
+    return [
+        measure("ui/initial_render", render_idle, iterations),
+        measure("ui/search_and_render", render_search, iterations),
+    ]
+
+
+def bench_startup(iterations: int) -> List[Dict]:
+    """Cold start in a fresh interpreter: importing the UI module, and constructing the first agent."""
+    def run(code: str):
+        subprocess.run([sys.executable, "-c", code], check=True, capture_output=True)
+
+    runs = max(3, iterations // 4)
+    return [
+        measure("startup/import_ui", lambda: run("import src.ui"), runs),
+        measure("startup/first_agent", lambda: run("from src.swiss_real_estate_agent import SwissPropertyAgent; "
+                                                   "SwissPropertyAgent(use_cache=False, use_listing_db=False)"), runs),
+    ]
+
+
+SUITES = {
+    "startup": bench_startup,
+    "find_properties": bench_find_properties,
+    "ingest": bench_ingest,
+    "listing_table": bench_listing_table,
+    "heatmap": bench_heatmap,
+    "dedup": bench_dedup,
+    "ui": bench_ui,
+}
+
+
+def compare(results: List[Dict], baseline: List[Dict], threshold: float, min_delta_ms: float = 0.5) -> List[str]:
+    """
+    Benchmarks whose p50 or p95 latency regressed against the baseline.
+
+    A regression is a slowdown by more than `threshold` (a fraction) and by at least `min_delta_ms`, so that
+    sub-millisecond timings do not fail CI on scheduler noise.
+    """
+    previous = {result["name"]: result for result in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get(result["name"])
+        if before is None:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            slowdown = result[metric] - before[metric]
+            if slowdown >= min_delta_ms and result[metric] > before[metric] * (1 + threshold):
+                regressions.append(f"{result['name']} {metric}: {before[metric]:.3f} -> {result[metric]:.3f} ms")
+    return regressions
+
+
+def print_table(results: List[Dict]) -> None:
+    print(f"{'benchmark':<44} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'ops/s':>10} {'peak KiB':>10}")
+    for r in results:
+        print(f"{r['name']:<44} {r['p50_ms']:10.3f} {r['p95_ms']:10.3f} {r['p99_ms']:10.3f} "
+              f"{r['throughput_per_s']:10.1f} {r['peak_memory_kib']:10.1f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--suite", choices=sorted(SUITES), action="append", help="Run only these suites (repeatable)")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--json", metavar="PATH", help="Write the results as JSON")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON results of a previous run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative slowdown before a regression is reported")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="Ignore slowdowns smaller than this")
+    args = parser.parse_args(argv)
+
+    # Everything runs offline: fake backends, and throwaway caches so earlier runs do not skew the numbers
+    workdir = tempfile.mkdtemp(prefix="swiss-re-bench-")
+    os.environ["SWISS_RE_BACKEND"] = "fake"
+    os.environ["EXTRACTION_CACHE_PATH"] = os.path.join(workdir, "extractions.sqlite3")
+    os.environ["THUMBNAIL_CACHE_DIR"] = os.path.join(workdir, "thumbnails")
+    os.environ["LISTING_DB_PATH"] = os.path.join(workdir, "listings.sqlite3")
+
+    results = []
+    for suite in args.suite or list(SUITES):
+        results.extend(SUITES[suite](args.iterations))
+    print_table(results)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"results": results}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f)["results"], args.threshold, args.min_delta_ms)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
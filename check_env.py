@@ -1,19 +1,31 @@
 import os
 import sys
+from typing import List
 
-required_env_vars = [
+REQUIRED_ENV_VARS = [
     "FIRECRAWL_API_KEY",
     "OPENAI_API_KEY"
 ]
 
-missing_vars = [var for var in required_env_vars if not os.getenv(var)]
 
-if missing_vars:
+def missing_env_vars() -> List[str]:
+    # The local fake backends (SWISS_RE_BACKEND=fake) replay recorded data and need no API keys
+    if os.getenv("SWISS_RE_BACKEND", "").strip().lower() == "fake":
+        return []
+    return [var for var in REQUIRED_ENV_VARS if not os.getenv(var)]
+
+
+def report_missing(missing_vars: List[str]) -> None:
     print("Error: The following required environment variables are not set:")
     for var in missing_vars:
         print(f"- {var}")
     print("Please set these variables before running the application.")
-    sys.exit(1)
-else:
+
+
+if __name__ == "__main__":
+    missing_vars = missing_env_vars()
+    if missing_vars:
+        report_missing(missing_vars)
+        sys.exit(1)
     print("All required environment variables are set.")
     sys.exit(0)
@@ -1,14 +1,14 @@
-import streamlit as st
-from src.ui import main
-import subprocess
 import sys
 
+from check_env import missing_env_vars, report_missing
+
 if __name__ == "__main__":
-    # Run the environment variable check
-    result = subprocess.run([sys.executable, "check_env.py"], capture_output=True, text=True)
-    if result.returncode != 0:
-        print(result.stdout)
+    # Checked in-process, before the app (and streamlit) is imported, so a misconfigured container fails fast
+    missing_vars = missing_env_vars()
+    if missing_vars:
+        report_missing(missing_vars)
         sys.exit(1)
-    
-    # If the check passes, run the main application
+
+    from src.ui import main
+
     main()
@@ -0,0 +1,66 @@
+from typing import Dict, Iterable, List
+
+# Listing fields sent to the LLM; URLs and other bulky fields are dropped
+ANALYSIS_FIELDS = ("building_name", "property_type", "location_address", "canton", "price", "size", "rooms", "description")
+DEFAULT_DESCRIPTION_CHARS = 200
+# Token budget for the listing block of a single prompt; larger result sets are analyzed in chunks
+DEFAULT_PROMPT_TOKEN_BUDGET = 6000
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budgeting (about four characters per token for GPT models)."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def truncate(text: str, max_chars: int) -> str:
+    text = " ".join(str(text).split())
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars - 1].rsplit(" ", 1)[0] + "…"
+
+
+def compact_property(prop: Dict, max_description_chars: int = DEFAULT_DESCRIPTION_CHARS) -> str:
+    """
+    Serialize a listing as one pipe-separated line with only the fields needed for analysis.
+
+    :param prop: Listing dict as returned by find_properties
+    :param max_description_chars: Descriptions are truncated to this many characters
+    :return: Compact line, e.g. "Sunny flat | apartment | Seefeld, Zurich | ZH | CHF 1,200,000 | 95 m² | 3.5 | ..."
+    """
+    values = []
+    for field in ANALYSIS_FIELDS:
+        value = prop.get(field)
+        if value is None or value == "":
+            values.append("-")
+        elif field == "description":
+            values.append(truncate(value, max_description_chars))
+        else:
+            values.append(" ".join(str(value).replace("|", "/").split()))
+    return " | ".join(values)
+
+
+def compact_properties(properties: Iterable[Dict], max_description_chars: int = DEFAULT_DESCRIPTION_CHARS) -> List[str]:
+    return [compact_property(prop, max_description_chars) for prop in properties]
+
+
+def listing_header() -> str:
+    return " | ".join(ANALYSIS_FIELDS)
+
+
+def chunk_by_budget(lines: List[str], budget_tokens: int = DEFAULT_PROMPT_TOKEN_BUDGET) -> List[List[str]]:
+    """Group listing lines into chunks whose estimated size stays within the token budget."""
+    chunks: List[List[str]] = []
+    current: List[str] = []
+    used = estimate_tokens(listing_header())
+    for line in lines:
+        cost = estimate_tokens(line)
+        if current and used + cost > budget_tokens:
+            chunks.append(current)
+            current, used = [], estimate_tokens(listing_header())
+        current.append(line)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
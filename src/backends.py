@@ -0,0 +1,206 @@
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import requests
+
+# Set to "fake" to run the agent against the local replay backends instead of Firecrawl and OpenAI
+BACKEND_ENV_VAR = "SWISS_RE_BACKEND"
+# Keep-alive connections per host in the shared client pools (HTTP_POOL_SIZE) and their request timeout (HTTP_TIMEOUT)
+DEFAULT_HTTP_POOL_SIZE = 32
+DEFAULT_HTTP_TIMEOUT = 120.0
+# Seconds between status polls of a Firecrawl extract job (the SDK's own interval)
+EXTRACT_POLL_INTERVAL = 2.0
+
+
+class ExtractionBackend(ABC):
+    """Structured web extraction, as provided by FirecrawlApp.extract."""
+
+    @abstractmethod
+    def extract(self, urls: List[str], params: Dict, deadline: Optional[float] = None) -> Dict:
+        """
+        Extract structured data from the given URLs.
+
+        :param urls: Pages to extract from
+        :param params: Dict with 'prompt' and 'schema' (JSON schema of the expected data)
+        :param deadline: time.monotonic() value at which to stop waiting for the result and raise a timeout
+        :return: Dict with the extracted object under 'data'
+        """
+
+
+class LLMBackend(ABC):
+    """Text generation, as provided by agno's Agent.run."""
+
+    @abstractmethod
+    def run(self, prompt: str) -> Any:
+        """Run a prompt and return the response (a string or an object with a `content` attribute)."""
+
+
+def http_pool_size() -> int:
+    return int(os.getenv("HTTP_POOL_SIZE", DEFAULT_HTTP_POOL_SIZE))
+
+
+def http_timeout() -> float:
+    return float(os.getenv("HTTP_TIMEOUT", DEFAULT_HTTP_TIMEOUT))
+
+
+def create_http_session(pool_size: Optional[int] = None) -> "requests.Session":
+    """Session with a keep-alive connection pool; safe to share between threads for plain GET/POST requests."""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    pool_size = pool_size or http_pool_size()
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+_shared_clients: Dict[Tuple, Any] = {}
+_shared_clients_lock = threading.Lock()
+
+
+def shared_client(key: Tuple, factory: Callable[[], Any]) -> Any:
+    """Process-wide client for `key`, created once by `factory` and reused by every session and thread."""
+    with _shared_clients_lock:
+        client = _shared_clients.get(key)
+        if client is None:
+            client = _shared_clients[key] = factory()
+        return client
+
+
+def warm_up_backends(model_id: str = "gpt-4o") -> None:
+    """
+    Import the Firecrawl and OpenAI SDKs and create the shared clients ahead of the first search.
+
+    Meant for a background thread at startup; the SDK imports dominate the first agent's construction.
+    """
+    if use_fake_backends():
+        return
+    firecrawl_api_key, openai_api_key = os.getenv("FIRECRAWL_API_KEY"), os.getenv("OPENAI_API_KEY")
+    if firecrawl_api_key:
+        create_firecrawl_extractor(firecrawl_api_key)
+    if openai_api_key:
+        create_openai_llm(model_id, openai_api_key)
+
+
+def use_fake_backends() -> bool:
+    return os.getenv(BACKEND_ENV_VAR, "").strip().lower() == "fake"
+
+
+def create_fake_backends() -> Tuple[ExtractionBackend, LLMBackend]:
+    from .fake_backends import FakeExtractor, FakeLLM
+
+    return FakeExtractor.from_env(), FakeLLM()
+
+
+def _create_pooled_firecrawl(api_key: Optional[str]) -> ExtractionBackend:
+    import requests
+    from firecrawl import FirecrawlApp
+
+    session = create_http_session()
+    # Deadline of the extract call running on this thread; the app itself is shared by every thread
+    local = threading.local()
+
+    def request_timeout(timeout: float) -> float:
+        deadline = getattr(local, "deadline", None)
+        if deadline is None:
+            return timeout
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            # Worded so the SDK's flattened message still reads as a timeout to resilience.is_retryable
+            raise requests.Timeout("Request timed out: the extract deadline passed before it was sent")
+        return min(timeout, remaining)
+
+    class PooledFirecrawlApp(FirecrawlApp):
+        """
+        FirecrawlApp whose extract requests and status polls reuse one keep-alive connection pool.
+
+        With a deadline, extract() polls the job itself instead of the SDK's unbounded loop, and every
+        request and backoff is cut short at the deadline, so an abandoned extraction frees its thread.
+        """
+
+        def _post_request(self, url, data, headers, retries=3, backoff_factor=0.5):
+            timeout = (data["timeout"] + 5000) if "timeout" in data else http_timeout()
+            for attempt in range(retries):
+                response = session.post(url, headers=headers, json=data, timeout=request_timeout(timeout))
+                if response.status_code != 502:
+                    return response
+                time.sleep(request_timeout(backoff_factor * (2 ** attempt)))
+            return response
+
+        def _get_request(self, url, headers, retries=3, backoff_factor=0.5):
+            for attempt in range(retries):
+                response = session.get(url, headers=headers, timeout=request_timeout(http_timeout()))
+                if response.status_code != 502:
+                    return response
+                time.sleep(request_timeout(backoff_factor * (2 ** attempt)))
+            return response
+
+        def extract(self, urls, params=None, deadline: Optional[float] = None):
+            if deadline is None:
+                return super().extract(urls, params)
+            if not params or (not params.get('prompt') and not params.get('schema')):
+                raise ValueError("Either prompt or schema is required")
+            local.deadline = deadline
+            try:
+                # Errors are raised the way the SDK's extract() raises them: ValueError(message, 500)
+                job = self.async_extract(urls, params)
+                if not job.get('success') or not job.get('id'):
+                    raise ValueError(f"Failed to extract. Error: {job.get('error')}", 500)
+                while True:
+                    status = self.get_extract_status(job['id'])
+                    if status['status'] == 'completed':
+                        if status.get('success'):
+                            return status
+                        raise ValueError(f"Failed to extract. Error: {status.get('error')}", 500)
+                    if status['status'] in ('failed', 'cancelled'):
+                        raise ValueError(f"Extract job {status['status']}. Error: {status.get('error')}", 500)
+                    time.sleep(max(0.0, min(EXTRACT_POLL_INTERVAL, deadline - time.monotonic())))
+                    if time.monotonic() >= deadline:
+                        raise ValueError(f"Request Timeout: extract job {job['id']} did not finish before the deadline", 500)
+            finally:
+                local.deadline = None
+
+    ExtractionBackend.register(FirecrawlApp)
+    return PooledFirecrawlApp(api_key=api_key)
+
+
+def create_firecrawl_extractor(api_key: Optional[str]) -> ExtractionBackend:
+    """
+    Firecrawl client used in production, shared by all agents with the same key.
+
+    FirecrawlApp keeps no per-request state, so one instance (and its connection pool) serves every session.
+    """
+    return shared_client(("firecrawl", api_key), lambda: _create_pooled_firecrawl(api_key))
+
+
+def _create_openai_http_client():
+    import httpx
+
+    pool_size = http_pool_size()
+    return httpx.Client(limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+                        timeout=http_timeout())
+
+
+def create_openai_llm(model_id: str, api_key: Optional[str]) -> LLMBackend:
+    """
+    OpenAI-backed agno agent used in production; Agent already implements `run`.
+
+    Agents keep conversation state, so each SwissPropertyAgent gets its own, but all of them send their
+    requests through one shared, thread-safe httpx connection pool.
+    """
+    from agno.agent import Agent
+    from agno.models.openai import OpenAIChat
+
+    LLMBackend.register(Agent)
+    http_client = shared_client(("openai-http",), _create_openai_http_client)
+    return Agent(
+        model=OpenAIChat(id=model_id, api_key=api_key, http_client=http_client),
+        markdown=True,
+        description="I am a Swiss real estate expert assisting with property search and analysis."
+    )
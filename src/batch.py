@@ -0,0 +1,351 @@
+"""
+Headless batch search over many cities, cantons and price bands.
+
+Jobs come from a JSONL/CSV file (columns city, canton, min_price, max_price, num_results) or are
+generated from the bundled municipality list. Run from the repository root, e.g. a nightly report over
+the three largest municipalities of every canton:
+    python -m src.batch --all-cantons --cities-per-canton 3 --min-price 500000 --max-price 2000000 \\
+        --output reports/nightly.jsonl
+    python -m src.batch --jobs jobs.csv --output reports/nightly.parquet --workers 8
+
+Rerunning the same command resumes: jobs recorded in the checkpoint file next to the output are skipped.
+"""
+import argparse
+import csv
+import json
+import logging
+import math
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from .cantons import CANTONS, get_canton_code, normalize_name
+from .listing_table import numeric_fields
+from .tracing import annotate, propagate, tracer
+
+DEFAULT_BATCH_WORKERS = 4
+# Parquet rows are written as one part file per this many completed jobs
+DEFAULT_PARQUET_JOBS_PER_PART = 50
+# Part files (and their in-progress temporaries) written by ParquetSink; nothing else in the directory is touched
+_PART_FILE = re.compile(r"part-\d{5}\.parquet(?:\.tmp)?")
+LISTING_FIELDS = ("building_name", "property_type", "location_address", "canton", "price", "size", "rooms", "description",
+                  "image_url", "listing_url")
+
+
+class BatchJob:
+    __slots__ = ("city", "canton", "min_price", "max_price", "num_results")
+
+    def __init__(self, city: str, canton: Optional[str], min_price: float, max_price: float, num_results: int = 10):
+        """:raises ValueError: For an unknown canton, which must not widen the search to every canton"""
+        self.city = city
+        self.canton = get_canton_code(canton) if canton else None
+        if canton and self.canton is None:
+            raise ValueError(f"Unknown canton: {canton}")
+        self.min_price = float(min_price)
+        self.max_price = float(max_price)
+        self.num_results = int(num_results)
+
+    @property
+    def job_id(self) -> str:
+        return f"{normalize_name(self.city)}|{self.canton or ''}|{self.min_price:g}|{self.max_price:g}|{self.num_results}"
+
+    @classmethod
+    def from_dict(cls, row: Dict, defaults: Dict) -> "BatchJob":
+        values = {**defaults, **{key: value for key, value in row.items() if value not in (None, "")}}
+        return cls(values["city"], values.get("canton"), values["min_price"], values["max_price"], values.get("num_results", 10))
+
+
+def read_jobs(path: str, defaults: Dict) -> List[BatchJob]:
+    """
+    Jobs from a CSV file with a header row, or from a JSONL file with one job object per line.
+
+    :raises ValueError: Naming the first invalid job (unknown canton, missing city, unparseable price), before any job runs
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+    jobs = []
+    for number, row in enumerate(rows, start=1):
+        try:
+            jobs.append(BatchJob.from_dict(row, defaults))
+        except KeyError as e:
+            raise ValueError(f"{path}, job {number}: missing {e.args[0]}")
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"{path}, job {number}: {str(e)}")
+    return jobs
+
+
+def canton_jobs(cantons: Iterable[str], cities_per_canton: Optional[int], defaults: Dict) -> List[BatchJob]:
+    """
+    One job per municipality of each canton, most populous first.
+
+    Only municipalities in the bundled list get a job; swiss_cities logs cantons it covers partially.
+    """
+    from .swiss_cities_database import swiss_cities
+
+    return [BatchJob(record.name, record.canton, defaults["min_price"], defaults["max_price"], defaults["num_results"])
+            for canton in cantons for record in swiss_cities.in_canton(canton, cities_per_canton)]
+
+
+def listing_rows(job: BatchJob, properties: List[Dict]) -> List[Dict]:
+    """One flat row per listing: the job's parameters, the listing's fields and its parsed numbers."""
+    rows = []
+    for rank, listing in enumerate(properties):
+        row = {"job_id": job.job_id, "city": job.city, "job_canton": job.canton, "min_price": job.min_price,
+               "max_price": job.max_price, "rank": rank}
+        row.update({field: None if listing.get(field) is None else str(listing[field]) for field in LISTING_FIELDS})
+        for column, value in zip(("price_chf", "size_m2", "rooms_count"), numeric_fields(listing)):
+            row[column] = value if math.isfinite(value) else None
+        row["alternate_urls"] = list(listing.get("alternate_urls") or [])
+        rows.append(row)
+    return rows
+
+
+class Checkpoint:
+    """
+    Append-only record of completed jobs, one JSON line per job, written after the job's rows are durable.
+
+    Each line names the output part holding the job's rows, so output written after the last checkpoint
+    (by an interrupted run) can be discarded on resume.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.completed: Dict[str, Optional[str]] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A line cut off by a crash
+                        continue
+                    self.completed[entry["job_id"]] = entry.get("part")
+        self._file = open(path, "a", encoding="utf-8")
+
+    def record(self, job_ids: Iterable[str], part: Optional[str] = None) -> None:
+        for job_id in job_ids:
+            self._file.write(json.dumps({"job_id": job_id, "part": part, "completed_at": time.time()}) + "\n")
+            self.completed[job_id] = part
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class JsonlSink:
+    """Streams listing rows to a JSONL file; each job's rows are flushed before the job is checkpointed."""
+
+    def __init__(self, path: str, checkpoint: Checkpoint):
+        self.path = path
+        self.checkpoint = checkpoint
+        self._discard_uncommitted()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _discard_uncommitted(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        kept = []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue
+                if row.get("job_id") in self.checkpoint.completed:
+                    kept.append(line if line.endswith("\n") else line + "\n")
+        with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+            f.writelines(kept)
+        os.replace(self.path + ".tmp", self.path)
+
+    def write(self, job: BatchJob, rows: List[Dict]) -> None:
+        for row in rows:
+            self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.checkpoint.record([job.job_id])
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ParquetSink:
+    """
+    Writes listing rows as a directory of Parquet part files, one per DEFAULT_PARQUET_JOBS_PER_PART jobs.
+
+    A part is written to a temporary name and renamed before its jobs are checkpointed; part files no
+    checkpoint entry refers to are removed on resume. Other files in the directory are left alone.
+    """
+
+    def __init__(self, path: str, checkpoint: Checkpoint, jobs_per_part: int = DEFAULT_PARQUET_JOBS_PER_PART):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ValueError("Parquet output requires pyarrow (pip install pyarrow)")
+        self._pa, self._pq = pyarrow, pyarrow.parquet
+        self.path = path
+        self.checkpoint = checkpoint
+        self.jobs_per_part = jobs_per_part
+        self.schema = pyarrow.schema(
+            [("job_id", pyarrow.string()), ("city", pyarrow.string()), ("job_canton", pyarrow.string()),
+             ("min_price", pyarrow.float64()), ("max_price", pyarrow.float64()), ("rank", pyarrow.int32())]
+            + [(field, pyarrow.string()) for field in LISTING_FIELDS]
+            + [("price_chf", pyarrow.float64()), ("size_m2", pyarrow.float64()), ("rooms_count", pyarrow.float64()),
+               ("alternate_urls", pyarrow.list_(pyarrow.string()))])
+        os.makedirs(path, exist_ok=True)
+        committed = set(checkpoint.completed.values())
+        for name in os.listdir(path):
+            file_path = os.path.join(path, name)
+            if name not in committed and _PART_FILE.fullmatch(name) and os.path.isfile(file_path):
+                os.remove(file_path)
+        self._part = len([name for name in committed if name])
+        self._rows: List[Dict] = []
+        self._jobs: List[str] = []
+
+    def write(self, job: BatchJob, rows: List[Dict]) -> None:
+        self._rows.extend(rows)
+        self._jobs.append(job.job_id)
+        if len(self._jobs) >= self.jobs_per_part:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._jobs:
+            return
+        name = f"part-{self._part:05d}.parquet"
+        table = self._pa.Table.from_pylist(self._rows, schema=self.schema)
+        self._pq.write_table(table, os.path.join(self.path, name + ".tmp"))
+        os.replace(os.path.join(self.path, name + ".tmp"), os.path.join(self.path, name))
+        self.checkpoint.record(self._jobs, part=name)
+        self._part += 1
+        self._rows, self._jobs = [], []
+
+    def close(self) -> None:
+        self.flush()
+
+
+class BatchRunner:
+    """
+    Runs search jobs on a bounded worker pool and streams their listings to JSONL or Parquet output.
+
+    Only a bounded number of jobs is in flight at a time, so arbitrarily long job lists run in constant
+    memory. Completed jobs are checkpointed; failed jobs are not, so a rerun retries them.
+    """
+
+    def __init__(self, agent, output: str, output_format: Optional[str] = None, max_workers: int = DEFAULT_BATCH_WORKERS,
+                 checkpoint_path: Optional[str] = None):
+        self.agent = agent
+        self.output = output
+        self.output_format = output_format or ("parquet" if output.endswith(".parquet") else "jsonl")
+        self.max_workers = max_workers
+        self.checkpoint_path = checkpoint_path or output.rstrip("/") + ".checkpoint.jsonl"
+
+    def _run_job(self, job: BatchJob) -> Optional[List[Dict]]:
+        with tracer.span("batch.job", city=job.city, canton=job.canton):
+            properties = self.agent.find_properties(job.city, job.min_price, job.max_price, job.canton, job.num_results)
+            annotate(results=len(properties) if properties is not None else None)
+            return properties
+
+    def run(self, jobs: Iterable[BatchJob]) -> Dict[str, int]:
+        """
+        Run every job not yet checkpointed.
+
+        :return: Counts of 'completed', 'skipped' (already checkpointed), 'failed' jobs and 'listings' written
+        """
+        if os.path.dirname(self.output):
+            os.makedirs(os.path.dirname(self.output), exist_ok=True)
+        checkpoint = Checkpoint(self.checkpoint_path)
+        sink = ParquetSink(self.output, checkpoint) if self.output_format == "parquet" else JsonlSink(self.output, checkpoint)
+        totals = {"completed": 0, "skipped": 0, "failed": 0, "listings": 0}
+        seen: Set[str] = set()
+
+        def pending_jobs() -> Iterator[BatchJob]:
+            for job in jobs:
+                if job.job_id in checkpoint.completed or job.job_id in seen:
+                    totals["skipped"] += 1
+                    continue
+                seen.add(job.job_id)
+                yield job
+
+        queue = pending_jobs()
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="batch") as executor:
+                futures = {}
+                while True:
+                    # Keep the pool busy without materializing a future per job
+                    while len(futures) < 2 * self.max_workers:
+                        job = next(queue, None)
+                        if job is None:
+                            break
+                        futures[executor.submit(propagate(self._run_job), job)] = job
+                    if not futures:
+                        break
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        job = futures.pop(future)
+                        try:
+                            properties = future.result()
+                        except Exception as e:
+                            properties = None
+                            logging.error(f"Batch job {job.job_id} raised: {str(e)}")
+                        if properties is None:
+                            totals["failed"] += 1
+                            logging.warning(f"Batch job {job.job_id} failed; it will be retried on the next run")
+                            continue
+                        # Results are written from this thread only, in completion order
+                        rows = listing_rows(job, properties)
+                        sink.write(job, rows)
+                        totals["completed"] += 1
+                        totals["listings"] += len(rows)
+                        logging.info(f"Batch job {job.job_id}: {len(rows)} listings "
+                                     f"({totals['completed']} completed, {totals['failed']} failed)")
+        finally:
+            sink.close()
+            checkpoint.close()
+        return totals
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from .swiss_real_estate_agent import SwissPropertyAgent
+
+    parser = argparse.ArgumentParser(description="Run property searches for many cities and write the listings to JSONL or Parquet")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--jobs", help="CSV or JSONL file of jobs (city, canton, min_price, max_price, num_results)")
+    source.add_argument("--city", action="append", help="City to search (repeatable)")
+    source.add_argument("--canton", action="append", help="Search the municipalities of this canton (repeatable)")
+    source.add_argument("--all-cantons", action="store_true", help="Search the municipalities of every canton")
+    parser.add_argument("--cities-per-canton", type=int, help="Only the N most populous municipalities of each canton")
+    parser.add_argument("--min-price", type=float, default=0, help="Default minimum price in CHF")
+    parser.add_argument("--max-price", type=float, default=5_000_000, help="Default maximum price in CHF")
+    parser.add_argument("--num-results", type=int, default=10, help="Default listings per job")
+    parser.add_argument("--output", required=True, help="Output .jsonl file or .parquet directory")
+    parser.add_argument("--format", choices=("jsonl", "parquet"), help="Output format (default: from the output name)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_BATCH_WORKERS, help="Jobs run at the same time")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output>.checkpoint.jsonl)")
+    args = parser.parse_args(argv)
+
+    defaults = {"min_price": args.min_price, "max_price": args.max_price, "num_results": args.num_results}
+    try:
+        if args.jobs:
+            jobs = read_jobs(args.jobs, defaults)
+        elif args.city:
+            jobs = [BatchJob(city, None, args.min_price, args.max_price, args.num_results) for city in args.city]
+        else:
+            jobs = canton_jobs(CANTONS if args.all_cantons else args.canton, args.cities_per_canton, defaults)
+    except ValueError as e:
+        parser.error(str(e))
+
+    runner = BatchRunner(SwissPropertyAgent(), args.output, args.format, args.workers, args.checkpoint)
+    totals = runner.run(jobs)
+    print(json.dumps(totals))
+    if totals["failed"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
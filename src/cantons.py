@@ -1,34 +1,100 @@
 # Swiss Cantons
 
+import re
+import unicodedata
+from functools import lru_cache
+from types import MappingProxyType
+
+# Official name per language; 'en' is the fallback for languages a canton has no entry for
 CANTONS = {
-    "AG": "Aargau",
-    "AR": "Appenzell Ausserrhoden",
-    "AI": "Appenzell Innerrhoden",
-    "BL": "Basel-Landschaft",
-    "BS": "Basel-Stadt",
-    "BE": "Bern",
-    "FR": {"de": "Freiburg", "fr": "Fribourg"},
-    "GE": {"fr": "Genève", "en": "Geneva"},
-    "GL": "Glarus",
-    "GR": {"de": "Graubünden", "it": "Grigioni", "rm": "Grischun", "en": "Grisons"},
-    "JU": "Jura",
-    "LU": {"de": "Luzern", "en": "Lucerne"},
-    "NE": "Neuchâtel",
-    "NW": "Nidwalden",
-    "OW": "Obwalden",
-    "SH": "Schaffhausen",
-    "SZ": "Schwyz",
-    "SO": "Solothurn",
-    "SG": "St. Gallen",
-    "TG": "Thurgau",
-    "TI": "Ticino",
-    "UR": "Uri",
-    "VS": {"de": "Wallis", "fr": "Valais"},
-    "VD": "Vaud",
-    "ZG": "Zug",
-    "ZH": {"de": "Zürich", "en": "Zurich"}
+    "AG": {"en": "Aargau", "de": "Aargau", "fr": "Argovie", "it": "Argovia"},
+    "AR": {"en": "Appenzell Ausserrhoden", "de": "Appenzell Ausserrhoden", "fr": "Appenzell Rhodes-Extérieures", "it": "Appenzello Esterno"},
+    "AI": {"en": "Appenzell Innerrhoden", "de": "Appenzell Innerrhoden", "fr": "Appenzell Rhodes-Intérieures", "it": "Appenzello Interno"},
+    "BL": {"en": "Basel-Landschaft", "de": "Basel-Landschaft", "fr": "Bâle-Campagne", "it": "Basilea Campagna"},
+    "BS": {"en": "Basel-Stadt", "de": "Basel-Stadt", "fr": "Bâle-Ville", "it": "Basilea Città"},
+    "BE": {"en": "Bern", "de": "Bern", "fr": "Berne", "it": "Berna"},
+    "FR": {"en": "Fribourg", "de": "Freiburg", "fr": "Fribourg", "it": "Friburgo"},
+    "GE": {"en": "Geneva", "de": "Genf", "fr": "Genève", "it": "Ginevra"},
+    "GL": {"en": "Glarus", "de": "Glarus", "fr": "Glaris", "it": "Glarona"},
+    "GR": {"en": "Grisons", "de": "Graubünden", "fr": "Grisons", "it": "Grigioni", "rm": "Grischun"},
+    "JU": {"en": "Jura", "de": "Jura", "fr": "Jura", "it": "Giura"},
+    "LU": {"en": "Lucerne", "de": "Luzern", "fr": "Lucerne", "it": "Lucerna"},
+    "NE": {"en": "Neuchâtel", "de": "Neuenburg", "fr": "Neuchâtel", "it": "Neuchâtel"},
+    "NW": {"en": "Nidwalden", "de": "Nidwalden", "fr": "Nidwald", "it": "Nidvaldo"},
+    "OW": {"en": "Obwalden", "de": "Obwalden", "fr": "Obwald", "it": "Obvaldo"},
+    "SH": {"en": "Schaffhausen", "de": "Schaffhausen", "fr": "Schaffhouse", "it": "Sciaffusa"},
+    "SZ": {"en": "Schwyz", "de": "Schwyz", "fr": "Schwytz", "it": "Svitto"},
+    "SO": {"en": "Solothurn", "de": "Solothurn", "fr": "Soleure", "it": "Soletta"},
+    "SG": {"en": "St. Gallen", "de": "St. Gallen", "fr": "Saint-Gall", "it": "San Gallo"},
+    "TG": {"en": "Thurgau", "de": "Thurgau", "fr": "Thurgovie", "it": "Turgovia"},
+    "TI": {"en": "Ticino", "de": "Tessin", "fr": "Tessin", "it": "Ticino"},
+    "UR": {"en": "Uri", "de": "Uri", "fr": "Uri", "it": "Uri"},
+    "VS": {"en": "Valais", "de": "Wallis", "fr": "Valais", "it": "Vallese"},
+    "VD": {"en": "Vaud", "de": "Waadt", "fr": "Vaud", "it": "Vaud"},
+    "ZG": {"en": "Zug", "de": "Zug", "fr": "Zoug", "it": "Zugo"},
+    "ZH": {"en": "Zurich", "de": "Zürich", "fr": "Zurich", "it": "Zurigo"},
+}
+
+# Additional names and spellings accepted by get_canton_code, beyond the names in CANTONS
+CANTON_ALIASES = {
+    "AR": ["Appenzell Outer Rhodes"],
+    "AI": ["Appenzell Inner Rhodes"],
+    "BL": ["Basel-Country"],
+    "BS": ["Basel-City"],
+    "SG": ["Sankt Gallen"],
 }
 
+LANGUAGES = ('en', 'de', 'fr', 'it', 'rm')
+_PUNCTUATION = re.compile(r"[\s.\-'’/]+")
+
+
+def normalize_name(name):
+    """
+    Normalize a place name for lookups: accents stripped, case folded, punctuation and spacing unified.
+
+    :param name: Place name, e.g. 'Genève' or 'St. Gallen'
+    :return: Normalized key, e.g. 'geneve' or 'st gallen'
+    """
+    decomposed = unicodedata.normalize('NFKD', name)
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(_PUNCTUATION.sub(' ', stripped.casefold()).split())
+
+
+def _name_for_language(names, language):
+    return names.get(language, names['en'])
+
+
+def _build_code_index():
+    index = {}
+    for code, names in CANTONS.items():
+        spellings = [code] + list(names.values()) + CANTON_ALIASES.get(code, [])
+        for spelling in spellings:
+            # Exact and case-folded spellings hit without normalization; the normalized key catches the rest
+            for key in (spelling, spelling.casefold(), normalize_name(spelling)):
+                index.setdefault(key, code)
+    return MappingProxyType(index)
+
+
+# Built once at import time; both mappings are read-only
+_CODE_INDEX = _build_code_index()
+_NAMES_BY_LANGUAGE = MappingProxyType({
+    language: MappingProxyType({code: _name_for_language(names, language) for code, names in CANTONS.items()})
+    for language in LANGUAGES
+})
+
+
+def _names_for(language):
+    names = _NAMES_BY_LANGUAGE.get(language)
+    if names is None:
+        names = MappingProxyType({code: _name_for_language(value, language) for code, value in CANTONS.items()})
+    return names
+
+
+@lru_cache(maxsize=16)
+def _canton_name_tuple(language):
+    return tuple(_names_for(language).values())
+
+
 def get_canton_name(canton_code, language='en'):
     """
     Get the canton name for a given canton code and language.
@@ -37,10 +103,7 @@ def get_canton_name(canton_code, language='en'):
     :param language: Language code ('en', 'de', 'fr', 'it', or 'rm')
     :return: Canton name in the specified language if available, otherwise in the default language
     """
-    canton = CANTONS.get(canton_code.upper())
-    if isinstance(canton, dict):
-        return canton.get(language, canton.get('en', list(canton.values())[0]))
-    return canton
+    return _names_for(language).get(canton_code.upper())
 
 def get_all_canton_names(language='en'):
     """
@@ -49,20 +112,16 @@ def get_all_canton_names(language='en'):
     :param language: Language code ('en', 'de', 'fr', 'it', or 'rm')
     :return: List of canton names
     """
-    return [get_canton_name(code, language) for code in CANTONS.keys()]
+    return list(_canton_name_tuple(language))
 
 def get_canton_code(canton_name):
     """
     Get the canton code for a given canton name.
     
-    :param canton_name: Canton name (in any language)
+    :param canton_name: Canton name (in any language, accents optional) or canton code
     :return: Two-letter canton code if found, None otherwise
     """
-    canton_name_lower = canton_name.lower()
-    for code, names in CANTONS.items():
-        if isinstance(names, dict):
-            if canton_name_lower in [name.lower() for name in names.values()]:
-                return code
-        elif canton_name_lower == names.lower():
-            return code
-    return None
+    code = _CODE_INDEX.get(canton_name)
+    if code is None:
+        code = _CODE_INDEX.get(normalize_name(canton_name))
+    return code
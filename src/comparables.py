@@ -0,0 +1,179 @@
+import math
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .cantons import normalize_name
+from .listing_db import listing_key
+from .listing_table import numeric_fields
+from .spatial import KDTree, project_km
+from .swiss_cities_database import swiss_cities
+
+# Feature scales: one unit of distance in the feature space is roughly this much difference
+LOCATION_SCALE_KM = 5.0
+LOG_SIZE_SCALE = 0.25        # about ±28% living area
+ROOMS_SCALE = 1.0
+LOG_PRICE_PER_SQM_SCALE = 0.2  # about ±22% CHF/m²
+TYPE_WEIGHT = 1.5
+# Values assumed for listings that do not state them, so they are neither favoured nor excluded
+DEFAULT_SIZE = 100.0
+DEFAULT_ROOMS = 3.5
+DEFAULT_PRICE_PER_SQM = 10_000.0
+# Centre of Switzerland, for listings whose municipality cannot be located
+DEFAULT_LOCATION = (46.8, 8.23)
+# New listings are searched by brute force until the buffer reaches this share of the tree (or MIN_REBUILD rows)
+REBUILD_FRACTION = 0.1
+MIN_REBUILD = 256
+
+PROPERTY_TYPES = ("apartment", "house")
+_TYPE_KEYWORDS = {
+    "apartment": ("apartment", "flat", "loft", "penthouse", "studio", "wohnung", "appartement", "attique", "appartamento",
+                  "maisonette", "duplex"),
+    "house": ("house", "haus", "maison", "villa", "chalet", "casa", "rustico", "bungalow"),
+}
+_POSTAL_MUNICIPALITY = re.compile(r"\b\d{4}\s+([^,\d]+)")
+
+
+def property_category(property_type: Optional[str]) -> Optional[str]:
+    """'apartment', 'house' or None for a portal's property type in any of the national languages."""
+    text = normalize_name(property_type or "")
+    for category, keywords in _TYPE_KEYWORDS.items():
+        if any(keyword in text for keyword in keywords):
+            return category
+    return None
+
+
+def listing_location(listing: Dict, city: Optional[str] = None) -> Optional[Tuple[float, float]]:
+    """
+    (latitude, longitude) of the municipality in a listing's address ('..., 8008 Zürich'), else of `city`.
+
+    Listings carry no coordinates, so the municipality centre stands in for the address.
+    """
+    candidates = []
+    match = _POSTAL_MUNICIPALITY.search(listing.get("location_address") or "")
+    if match:
+        candidates.append(match.group(1).strip())
+    if city:
+        candidates.append(city)
+    for name in candidates:
+        record = swiss_cities.find(name, listing.get("canton") or None) or swiss_cities.find(name)
+        if record is not None and record.latitude is not None:
+            return record.latitude, record.longitude
+    return None
+
+
+class ComparablesIndex:
+    """
+    k-nearest-neighbour search for similar listings ("comparables").
+
+    Every listing becomes a row of a feature matrix: projected location of its municipality, log living
+    area, rooms, property category and (optionally) log CHF/m², each scaled so one unit is a comparable
+    difference. Rows are indexed by a spatial.KDTree; listings added later sit in a buffer that is searched
+    with vectorized distances until it reaches REBUILD_FRACTION of the tree, which is then rebuilt.
+
+    Build with `include_price=False` to value listings by their other features alone.
+    """
+
+    def __init__(self, listings: Iterable[Dict] = (), city: Optional[str] = None, include_price: bool = True):
+        self.include_price = include_price
+        self.records: List[Dict] = []
+        self.dimensions = 2 + 2 + len(PROPERTY_TYPES) + (1 if include_price else 0)
+        # Grown by doubling, so adding listings one at a time stays amortized O(1) per row
+        self._matrix = np.empty((64, self.dimensions), dtype=np.float64)
+        self._keys: Dict[str, int] = {}
+        self._tree: Optional[KDTree] = None
+        self._indexed = 0
+        self._lock = threading.RLock()
+        self.add(listings, city)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def features(self, listing: Dict, city: Optional[str] = None) -> np.ndarray:
+        """Scaled feature vector of a listing (indexed or not)."""
+        latitude, longitude = listing_location(listing, city) or DEFAULT_LOCATION
+        x, y = project_km(latitude, longitude)
+        price, stated_size, rooms = numeric_fields(listing)
+        size = stated_size if math.isfinite(stated_size) and stated_size > 0 else DEFAULT_SIZE
+        rooms = rooms if math.isfinite(rooms) and rooms > 0 else DEFAULT_ROOMS
+        category = property_category(listing.get("property_type"))
+        vector = [x / LOCATION_SCALE_KM, y / LOCATION_SCALE_KM, math.log(size) / LOG_SIZE_SCALE, rooms / ROOMS_SCALE]
+        vector.extend(TYPE_WEIGHT if category == name else 0.0 for name in PROPERTY_TYPES)
+        if self.include_price:
+            price_per_sqm = price / size if math.isfinite(price) and price > 0 and math.isfinite(stated_size) \
+                else DEFAULT_PRICE_PER_SQM
+            vector.append(math.log(price_per_sqm) / LOG_PRICE_PER_SQM_SCALE)
+        return np.asarray(vector, dtype=np.float64)
+
+    def add(self, listings: Iterable[Dict], city: Optional[str] = None) -> int:
+        """Add listings not indexed yet (by listing URL, or name/address/price). Returns how many were added."""
+        with self._lock:
+            new_rows = []
+            for listing in listings:
+                key = listing_key(listing)
+                if key in self._keys:
+                    continue
+                self._keys[key] = len(self.records)
+                self.records.append(listing)
+                new_rows.append(self.features(listing, city))
+            if new_rows:
+                start, end = len(self.records) - len(new_rows), len(self.records)
+                if end > len(self._matrix):
+                    grown = np.empty((max(end, 2 * len(self._matrix)), self.dimensions), dtype=np.float64)
+                    grown[:start] = self._matrix[:start]
+                    self._matrix = grown
+                self._matrix[start:end] = new_rows
+                buffered = len(self.records) - self._indexed
+                if buffered >= max(MIN_REBUILD, REBUILD_FRACTION * self._indexed):
+                    self._rebuild()
+            return len(new_rows)
+
+    def _rebuild(self) -> None:
+        self._tree = KDTree(self._matrix[:len(self.records)])
+        self._indexed = len(self.records)
+
+    def _nearest(self, point: np.ndarray, k: int, exclude: Optional[int]) -> List[Tuple[float, int]]:
+        with self._lock:
+            tree, indexed, matrix = self._tree, self._indexed, self._matrix[:len(self.records)]
+        candidates = tree.query(tuple(point.tolist()), k, exclude=exclude) if tree is not None else []
+        buffer = matrix[indexed:]
+        if len(buffer):
+            distances = np.sqrt(((buffer - point) ** 2).sum(axis=1))
+            if exclude is not None and exclude >= indexed:
+                distances[exclude - indexed] = np.inf
+            nearest = np.argsort(distances, kind="stable")[:k]
+            candidates.extend((float(distances[i]), indexed + int(i)) for i in nearest if np.isfinite(distances[i]))
+        return sorted(candidates)[:k]
+
+    def comparables(self, listing: Dict, k: int = 5, city: Optional[str] = None) -> List[Tuple[Dict, float]]:
+        """
+        The `k` listings most similar to `listing`, as (listing, distance) pairs, most similar first.
+
+        The listing itself is never returned, whether or not it is indexed.
+        """
+        exclude = self._keys.get(listing_key(listing))
+        point = self._matrix[exclude] if exclude is not None else self.features(listing, city)
+        return [(self.records[index], distance) for distance, index in self._nearest(point, k, exclude)]
+
+    def comparables_many(self, listings: Iterable[Dict], k: int = 5, city: Optional[str] = None) -> List[List[Tuple[Dict, float]]]:
+        """Comparables for a batch of listings, e.g. a valuation run; pending listings are indexed first."""
+        with self._lock:
+            if len(self.records) > self._indexed:
+                self._rebuild()
+        return [self.comparables(listing, k, city) for listing in listings]
+
+    def estimate_price_per_sqm(self, listing: Dict, k: int = 5, city: Optional[str] = None) -> Optional[float]:
+        """Distance-weighted median CHF/m² of the listing's comparables, or None when none has a price and size."""
+        values, weights = [], []
+        for comparable, distance in self.comparables(listing, k, city):
+            price, size, _ = numeric_fields(comparable)
+            if math.isfinite(price) and math.isfinite(size) and size > 0:
+                values.append(price / size)
+                weights.append(1.0 / (1.0 + distance))
+        if not values:
+            return None
+        order = np.argsort(values)
+        cumulative = np.cumsum(np.asarray(weights)[order])
+        return float(np.asarray(values)[order][np.searchsorted(cumulative, cumulative[-1] / 2)])
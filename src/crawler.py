@@ -0,0 +1,177 @@
+"""
+Background crawler that keeps the local listing database fresh.
+
+Run from the repository root, e.g. hourly for a set of cities:
+    python -m src.crawler --city Zurich --city Geneva --interval 3600
+    python -m src.crawler --city Zurich --once
+"""
+import argparse
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .backends import create_http_session
+from .ingest import ingest_properties
+from .listing_db import ListingDatabase, content_hash
+from .schemas import PROPERTIES_SCHEMA
+from .tracing import annotate, propagate, tracer
+
+# Listings requested per portal page; crawls fetch the whole page rather than one price band
+CRAWL_LISTINGS_PER_PAGE = 50
+DEFAULT_CRAWL_INTERVAL = 60 * 60
+PAGE_TIMEOUT = 20
+
+_SCRIPTS = re.compile(r"<(script|style|noscript)\b.*?</\1>", re.IGNORECASE | re.DOTALL)
+_TAGS = re.compile(r"<[^>]+>")
+
+
+def page_text(html: str) -> str:
+    """Visible text of a page, so markup, tracking scripts and whitespace changes do not count as content changes."""
+    return " ".join(_TAGS.sub(" ", _SCRIPTS.sub(" ", html)).split())
+
+
+class HttpPageFetcher:
+    """Fetches portal pages over a pooled session for change detection (no extraction)."""
+
+    def __init__(self, timeout: float = PAGE_TIMEOUT):
+        self.session = create_http_session()
+        self.timeout = timeout
+
+    def __call__(self, url: str) -> str:
+        response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return page_text(response.text)
+
+
+class ListingCrawler:
+    """
+    Periodically refreshes the listings of a set of cities into a ListingDatabase.
+
+    For every portal page of a city (the same URL templates find_properties uses), the page is fetched
+    and hashed first; only pages whose content changed since the last crawl, or that cannot be fetched
+    cheaply, go through LLM extraction. Extracted listings are compared by content hash, so the database
+    records new, changed and removed listings per page.
+    """
+
+    def __init__(self, agent, database: Optional[ListingDatabase] = None, cities: Iterable[str] = (),
+                 interval: float = DEFAULT_CRAWL_INTERVAL, max_workers: int = 4,
+                 fetch_page: Optional[Callable[[str], str]] = None):
+        self.agent = agent
+        self.database = database or agent.listing_db or ListingDatabase()
+        self.cities = list(cities)
+        self.interval = interval
+        self.max_workers = max_workers
+        self.fetch_page = fetch_page or getattr(agent.firecrawl, "fetch_page", None) or HttpPageFetcher()
+        # Hashes of changed pages, stored only after their extraction succeeded so a failed page is retried
+        self._pending_hashes: Dict[str, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _page_changed(self, city: str, source: str, url: str) -> bool:
+        try:
+            page_hash = content_hash(self.fetch_page(url))
+        except Exception as e:
+            # Without a fingerprint the page is extracted to be safe
+            logging.warning(f"Unable to fetch {url} for change detection: {str(e)}")
+            return True
+        changed = page_hash != self.database.page_hash(url)
+        if not changed:
+            self.database.record_page(url, city, source, page_hash, changed=False)
+        else:
+            self._pending_hashes[url] = page_hash
+        return changed
+
+    def crawl_page(self, city: str, source: str, url: str) -> Dict[str, int]:
+        with tracer.span("crawl.page", source=source):
+            if not self._page_changed(city, source, url):
+                annotate(page_changed=False)
+                return {"new": 0, "changed": 0, "unchanged": 0, "removed": 0, "skipped_pages": 1}
+            prompt = (f"Extract up to {CRAWL_LISTINGS_PER_PAGE} property listings in {city} from this page, "
+                      f"including image URLs and original listing URLs")
+            response = self.agent._extract("find_properties", [url], prompt, PROPERTIES_SCHEMA,
+                                           use_cache=False)
+            listings = ingest_properties(response['data']['properties'], source=source)
+            counts = self.database.sync_page(city, source, url, listings)
+            self.database.record_page(url, city, source, self._pending_hashes.pop(url, None), changed=True)
+            annotate(page_changed=True, **counts)
+            return {**counts, "skipped_pages": 0}
+
+    def crawl_city(self, city: str) -> Dict[str, int]:
+        """
+        Refresh one city from every portal page.
+
+        :return: Totals of new, changed, unchanged and removed listings, skipped (unchanged) pages and failed pages
+        """
+        totals = {"new": 0, "changed": 0, "unchanged": 0, "removed": 0, "skipped_pages": 0, "failed_pages": 0}
+        pages = [(source, url) for source, urls in self.agent._portal_urls(city).items() for url in urls]
+        with tracer.span("crawl.city", city=city), ThreadPoolExecutor(
+                max_workers=max(1, min(self.max_workers, len(pages))), thread_name_prefix="crawl") as executor:
+            futures = [executor.submit(propagate(self._crawl_page_safely), city, source, url) for source, url in pages]
+            for future in futures:
+                counts = future.result()
+                if counts is None:
+                    totals["failed_pages"] += 1
+                    continue
+                for key, value in counts.items():
+                    totals[key] += value
+        # Searches only trust the database for cities whose every page was crawled
+        if not totals["failed_pages"]:
+            self.database.mark_city_crawled(city)
+            self.agent.listing_store.invalidate(city)
+        # Recompute the city's and its cantons' market figures now rather than on the next dashboard load
+        if self.agent.market_stats.database is self.database:
+            self.agent.market_stats.refresh()
+        logging.info(f"Crawled {city}: {totals}")
+        return totals
+
+    def _crawl_page_safely(self, city: str, source: str, url: str) -> Optional[Dict[str, int]]:
+        try:
+            return self.crawl_page(city, source, url)
+        except Exception as e:
+            logging.error(f"Error crawling {url}: {str(e)}")
+            return None
+
+    def crawl_once(self) -> Dict[str, Dict[str, int]]:
+        return {city: self.crawl_city(city) for city in self.cities}
+
+    def run(self) -> None:
+        """Crawl every city, then sleep until the next interval, until stop() is called."""
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self.crawl_once()
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def start(self) -> threading.Thread:
+        """Run the crawl loop on a daemon thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name="listing-crawler", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from .swiss_real_estate_agent import SwissPropertyAgent
+
+    parser = argparse.ArgumentParser(description="Crawl portal listings into the local listing database")
+    parser.add_argument("--city", action="append", required=True, help="City to crawl (repeatable)")
+    parser.add_argument("--interval", type=float, default=DEFAULT_CRAWL_INTERVAL, help="Seconds between crawls")
+    parser.add_argument("--once", action="store_true", help="Crawl every city once and exit")
+    args = parser.parse_args(argv)
+
+    crawler = ListingCrawler(SwissPropertyAgent(), cities=args.city, interval=args.interval)
+    if args.once:
+        crawler.crawl_once()
+        print(crawler.database.stats())
+    else:
+        crawler.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .cantons import normalize_name
+from .listing_table import numeric_fields
+
+# Listings at the same address are the same flat when price and size agree within these relative tolerances
+PRICE_TOLERANCE = 0.05
+SIZE_TOLERANCE = 0.10
+ROOMS_TOLERANCE = 0.5
+# MinHash signature length and LSH banding: 16 bands of 4 rows put the match threshold near Jaccard 0.5
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+# Description near-duplicates must reach this estimated Jaccard similarity (and agree on price/size)
+DESCRIPTION_SIMILARITY = 0.6
+SHINGLE_SIZE = 3
+# LSH buckets larger than this are boilerplate ("Contact us for a viewing"), not duplicates; they are skipped
+MAX_BUCKET_SIZE = 50
+# Values that count as missing when merging duplicate records
+MISSING_VALUES = (None, "", "N/A", "Price on request")
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_permutation_rng = np.random.default_rng(20240601)
+_PERM_A = _permutation_rng.integers(1, _MERSENNE_PRIME, NUM_PERMUTATIONS, dtype=np.uint64)
+_PERM_B = _permutation_rng.integers(0, _MERSENNE_PRIME, NUM_PERMUTATIONS, dtype=np.uint64)
+
+_STREET_SUFFIX = re.compile(r"(?<=\w)(str|strase|str\.)\b")
+_STREET_NUMBER = re.compile(r"([a-z][a-z ]*?)\s*(\d+\s?[a-z]?)\b")
+_POSTAL_CODE = re.compile(r"\b(\d{4})\b")
+_WORD = re.compile(r"\w+")
+
+
+def address_key(address: Optional[str]) -> Optional[str]:
+    """
+    Normalized street, house number and postal code of an address, or None when it has no house number.
+
+    'Seefeldstrasse 120, 8008 Zürich' and 'Seefeldstr. 120, 8008 Zurich' both give 'seefeldstrasse 120 8008'.
+    """
+    if not address:
+        return None
+    normalized = _STREET_SUFFIX.sub("strasse", normalize_name(address))
+    postal_code = _POSTAL_CODE.search(normalized)
+    street = _STREET_NUMBER.search(_POSTAL_CODE.sub(" ", normalized))
+    if street is None:
+        return None
+    parts = [street.group(1).strip(), street.group(2).replace(" ", "")]
+    if postal_code:
+        parts.append(postal_code.group(1))
+    return " ".join(parts)
+
+
+def shingles(text: Optional[str], size: int = SHINGLE_SIZE) -> np.ndarray:
+    """Hashes of the word n-grams of a text, as uint64 values below the MinHash prime."""
+    words = _WORD.findall(normalize_name(text or ""))
+    if len(words) < size:
+        grams = [" ".join(words)] if words else []
+    else:
+        grams = [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return np.fromiter((zlib.crc32(gram.encode("utf-8")) % _MERSENNE_PRIME for gram in set(grams)), np.uint64)
+
+
+def minhash(hashes: np.ndarray) -> Optional[np.ndarray]:
+    """MinHash signature of a shingle set (None for an empty set)."""
+    if hashes.size == 0:
+        return None
+    return ((_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) % _MERSENNE_PRIME).min(axis=1)
+
+
+def _close(a: float, b: float, tolerance: float) -> bool:
+    # Unknown values (NaN/inf) never rule a match out
+    if not (np.isfinite(a) and np.isfinite(b)):
+        return True
+    return abs(a - b) <= tolerance * max(abs(a), abs(b))
+
+
+def merge_listings(primary: Dict, duplicate: Dict) -> Dict:
+    """
+    A copy of the primary record with its missing fields filled from a duplicate and the duplicate's URL remembered.
+
+    The primary keeps its own values wherever it has one; descriptions keep the longer text. Neither input
+    is modified, so a record already handed out (e.g. in a ListingTable snapshot) stays as it was.
+    """
+    merged = primary.copy()
+    for field, value in duplicate.items():
+        if field == "alternate_urls" or value in MISSING_VALUES:
+            continue
+        if merged.get(field) in MISSING_VALUES:
+            merged[field] = value
+        elif field == "description" and len(str(value)) > len(str(merged[field])):
+            merged[field] = value
+    url = duplicate.get("listing_url")
+    if url and url != merged.get("listing_url"):
+        alternates = list(merged.get("alternate_urls") or ())
+        if url not in alternates:
+            merged["alternate_urls"] = alternates + [url]
+    return merged
+
+
+class _Fingerprint:
+    __slots__ = ("price", "size", "rooms", "address", "signature")
+
+    def __init__(self, listing: Dict):
+        self.price, self.size, self.rooms = numeric_fields(listing)
+        self.address = address_key(listing.get("location_address"))
+        self.signature = minhash(shingles(listing.get("description")))
+
+    def compatible(self, other: "_Fingerprint") -> bool:
+        return (_close(self.price, other.price, PRICE_TOLERANCE) and _close(self.size, other.size, SIZE_TOLERANCE)
+                and (not (np.isfinite(self.rooms) and np.isfinite(other.rooms)) or abs(self.rooms - other.rooms) <= ROOMS_TOLERANCE))
+
+
+class ListingDeduplicator:
+    """
+    Incremental cross-portal duplicate detection.
+
+    Each listing is checked against the listings seen so far, first through its normalized address
+    (street, number, postal code) and then through MinHash/LSH buckets over its description; a candidate
+    counts as a duplicate only when price, size and rooms also agree. Lookups touch only the matching
+    address bucket and LSH bands, so a batch of n listings is processed in roughly O(n) time.
+    """
+
+    def __init__(self):
+        self.records: List[Dict] = []
+        self._fingerprints: List[_Fingerprint] = []
+        self._urls: Dict[str, int] = {}
+        self._addresses: Dict[str, List[int]] = {}
+        self._bands: Dict[Tuple[int, bytes], List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _band_keys(self, signature: np.ndarray) -> Iterable[Tuple[int, bytes]]:
+        rows = NUM_PERMUTATIONS // LSH_BANDS
+        for band in range(LSH_BANDS):
+            yield band, signature[band * rows:(band + 1) * rows].tobytes()
+
+    def find(self, listing: Dict, fingerprint: Optional[_Fingerprint] = None) -> Optional[int]:
+        """Index of a previously added listing that `listing` duplicates, or None."""
+        url = listing.get("listing_url")
+        if url and url in self._urls:
+            return self._urls[url]
+        fingerprint = fingerprint or _Fingerprint(listing)
+        if fingerprint.address:
+            for index in self._addresses.get(fingerprint.address, ()):
+                if fingerprint.compatible(self._fingerprints[index]):
+                    return index
+        if fingerprint.signature is not None:
+            checked = set()
+            for key in self._band_keys(fingerprint.signature):
+                bucket = self._bands.get(key, ())
+                if len(bucket) > MAX_BUCKET_SIZE:
+                    continue
+                for index in bucket:
+                    if index in checked:
+                        continue
+                    checked.add(index)
+                    other = self._fingerprints[index]
+                    if other.signature is None or not fingerprint.compatible(other):
+                        continue
+                    # Different addresses can share boilerplate descriptions; only unknown addresses fall back to text
+                    if fingerprint.address and other.address and fingerprint.address != other.address:
+                        continue
+                    if np.mean(fingerprint.signature == other.signature) >= DESCRIPTION_SIMILARITY:
+                        return index
+        return None
+
+    def add(self, listing: Dict) -> Tuple[int, bool]:
+        """
+        Add a listing, merging it into its duplicate when there is one.
+
+        A merge replaces the canonical record in `records` with a new merged record; the old one is not changed.
+
+        :return: (index of the canonical record in `records`, whether the listing was new)
+        """
+        fingerprint = _Fingerprint(listing)
+        index = self.find(listing, fingerprint)
+        if index is not None:
+            record = self.records[index] = merge_listings(self.records[index], listing)
+            # Fields filled by the merge (e.g. a price the first portal did not show) take part in later matches
+            merged = self._fingerprints[index]
+            merged.price, merged.size, merged.rooms = numeric_fields(record)
+            url = listing.get("listing_url")
+            if url:
+                self._urls.setdefault(url, index)
+            return index, False
+
+        index = len(self.records)
+        self.records.append(listing)
+        self._fingerprints.append(fingerprint)
+        if listing.get("listing_url"):
+            self._urls[listing["listing_url"]] = index
+        if fingerprint.address:
+            self._addresses.setdefault(fingerprint.address, []).append(index)
+        if fingerprint.signature is not None:
+            for key in self._band_keys(fingerprint.signature):
+                self._bands.setdefault(key, []).append(index)
+        return index, True
+
+
+def deduplicate(listings: Iterable[Dict]) -> List[Dict]:
+    """
+    Collapse cross-portal duplicates in a batch of listings.
+
+    The first occurrence of each property is kept (in input order) and completed with fields from its
+    duplicates; their listing URLs are collected in 'alternate_urls'.
+    """
+    deduplicator = ListingDeduplicator()
+    for listing in listings:
+        deduplicator.add(dict(listing))
+    return deduplicator.records
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .tracing import annotate
+
+# Seconds an extraction stays fresh, per agent method
+DEFAULT_TTLS = {
+    "find_properties": 15 * 60,
+    "get_location_trends": 24 * 60 * 60,
+    "get_canton_statistics": 24 * 60 * 60,
+    "analyze_properties": 24 * 60 * 60,
+}
+# Seconds past the TTL during which a stale result is still served while it is refreshed in the background
+DEFAULT_MAX_STALE = {
+    "find_properties": 60 * 60,
+    "get_location_trends": 7 * 24 * 60 * 60,
+    "get_canton_statistics": 7 * 24 * 60 * 60,
+    "analyze_properties": 0,
+}
+FALLBACK_TTL = 15 * 60
+DEFAULT_CACHE_PATH = os.path.join(".cache", "extractions.sqlite3")
+
+
+def make_cache_key(urls: List[str], prompt: str, schema: Dict) -> str:
+    """
+    Build a stable cache key for a Firecrawl extraction.
+
+    :param urls: URLs passed to the extraction
+    :param prompt: Extraction prompt
+    :param schema: JSON schema of the expected response
+    :return: Hex digest identifying the (urls, prompt, schema) triple
+    """
+    schema_hash = hashlib.sha256(json.dumps(schema, sort_keys=True).encode("utf-8")).hexdigest()
+    payload = json.dumps([list(urls), prompt, schema_hash], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    """
+    SQLite-backed TTL cache for extraction responses with LRU/size eviction and stale-while-revalidate.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 500, max_bytes: int = 50 * 1024 * 1024,
+                 ttls: Optional[Dict[str, float]] = None, max_stale: Optional[Dict[str, float]] = None):
+        self.path = path or os.getenv("EXTRACTION_CACHE_PATH", DEFAULT_CACHE_PATH)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_stale = {**DEFAULT_MAX_STALE, **(max_stale or {})}
+        self._lock = threading.Lock()
+        self._refreshing = set()
+
+        if self.path != ":memory:" and os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS extractions (
+                    key TEXT PRIMARY KEY,
+                    method TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_extractions_last_access ON extractions (last_access)")
+
+    def get(self, method: str, key: str) -> Tuple[Optional[Any], bool]:
+        """
+        Look up a cached response.
+
+        :return: (value, is_stale); value is None on a miss or when the entry is past its stale window
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM extractions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None, False
+            age = now - row[1]
+            ttl = self.ttls.get(method, FALLBACK_TTL)
+            if age > ttl + self.max_stale.get(method, 0):
+                with self._conn:
+                    self._conn.execute("DELETE FROM extractions WHERE key = ?", (key,))
+                return None, False
+            with self._conn:
+                self._conn.execute("UPDATE extractions SET last_access = ? WHERE key = ?", (now, key))
+        annotate(payload_bytes=len(row[0]))
+        return json.loads(row[0]), age > ttl
+
+    def set(self, method: str, key: str, value: Any) -> None:
+        serialized = json.dumps(value, ensure_ascii=False)
+        annotate(payload_bytes=len(serialized))
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extractions (key, method, value, size, created_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, method, serialized, len(serialized), now, now),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        # Least recently used entries go first until both the entry and byte limits hold
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM extractions").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM extractions ORDER BY last_access ASC").fetchall()
+        evicted = []
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM extractions WHERE key = ?", evicted)
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM extractions")
+
+    def get_or_extract(self, method: str, urls: List[str], prompt: str, schema: Dict, extract: Callable[[], Any]) -> Any:
+        """
+        Return a cached response for the extraction, calling `extract` on a miss.
+
+        Stale entries are returned immediately and refreshed on a background thread.
+        """
+        key = make_cache_key(urls, prompt, schema)
+        value, is_stale = self.get(method, key)
+        if value is None:
+            annotate(cache="miss")
+            value = extract()
+            self.set(method, key, value)
+            return value
+        annotate(cache="stale" if is_stale else "hit")
+        if is_stale:
+            self._refresh_in_background(method, key, extract)
+        return value
+
+    def _refresh_in_background(self, method: str, key: str, extract: Callable[[], Any]) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self.set(method, key, extract())
+            except Exception as e:
+                logging.warning(f"Background refresh for {method} failed: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name=f"cache-refresh-{method}", daemon=True).start()
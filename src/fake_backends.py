@@ -0,0 +1,206 @@
+import copy
+import glob
+import json
+import os
+import random
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from .backends import ExtractionBackend, LLMBackend
+from .cantons import normalize_name
+from .swiss_cities_database import swiss_cities
+
+DEFAULT_RECORDINGS_DIR = os.path.join(os.path.dirname(__file__), "data", "recorded")
+# The recorded payloads were captured for this city; other cities get the same listings relabelled
+RECORDED_CITY = "Zurich"
+
+
+# Injected failures, in the shape firecrawl-py 1.13 raises them: every error re-raised as ValueError(message, 500)
+FAILURE_MODES = ("status", "timeout")
+
+
+def injected_failure(sources: Iterable[str], mode: str = "status") -> ValueError:
+    """A portal outage as the Firecrawl SDK reports it: an HTTP 503, or a requests read timeout."""
+    if mode == "timeout":
+        message = "HTTPSConnectionPool(host='api.firecrawl.dev', port=443): Read timed out. (read timeout=60)"
+    else:
+        message = (f"Unexpected error during extract: Status code 503. Service Unavailable - "
+                   f"injected failure for {', '.join(sources)}")
+    return ValueError(message, 500)
+
+
+def _source_for(url: str) -> str:
+    if "market-analysis" in url:
+        return "homegate-market-analysis"
+    for source in ("homegate", "immoscout24", "comparis"):
+        if source in url:
+            return source
+    return "unknown"
+
+
+def _city_from_url(url: str) -> Optional[str]:
+    for marker in ("city-", "market-analysis/", "marktplatz/"):
+        if marker in url:
+            slug = url.split(marker, 1)[1].split("/", 1)[0]
+            if not slug.startswith("canton-"):
+                return slug.replace("-", " ").title()
+    return None
+
+
+class FakeExtractor(ExtractionBackend):
+    """
+    Deterministic stand-in for Firecrawl that replays recorded portal payloads.
+
+    Responses are chosen by portal (from the URL) and schema. Listings are relabelled for the requested city,
+    and `listings_per_portal` synthesizes more listings from the recorded ones for load tests. Latency and
+    failures are injected from a seeded RNG, so two runs with the same settings behave the same.
+    """
+
+    def __init__(self, recordings_dir: str = DEFAULT_RECORDINGS_DIR, latency: float = 0.0, jitter: float = 0.0,
+                 source_latency: Optional[Dict[str, float]] = None, failure_rate: float = 0.0,
+                 fail_sources: Iterable[str] = (), failure_mode: str = "status", listings_per_portal: Optional[int] = None,
+                 seed: int = 0):
+        if failure_mode not in FAILURE_MODES:
+            raise ValueError(f"Unknown failure mode {failure_mode!r}, expected one of {', '.join(FAILURE_MODES)}")
+        self.latency = latency
+        self.jitter = jitter
+        self.source_latency = dict(source_latency or {})
+        self.failure_rate = failure_rate
+        self.fail_sources = set(fail_sources)
+        self.failure_mode = failure_mode
+        self.listings_per_portal = listings_per_portal
+        self.seed = seed
+        self.calls: List[Dict] = []
+        self.page_versions: Dict[str, int] = {}
+        self._call_counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.recordings = {}
+        for path in sorted(glob.glob(os.path.join(recordings_dir, "*.json"))):
+            with open(path, "r", encoding="utf-8") as f:
+                recording = json.load(f)
+            self.recordings[recording["source"]] = recording["data"]
+
+    @classmethod
+    def from_env(cls) -> "FakeExtractor":
+        """Configure latency and failure injection from FAKE_BACKEND_* environment variables."""
+        listings = os.getenv("FAKE_BACKEND_LISTINGS_PER_PORTAL")
+        return cls(
+            latency=float(os.getenv("FAKE_BACKEND_LATENCY", "0")),
+            jitter=float(os.getenv("FAKE_BACKEND_JITTER", "0")),
+            failure_rate=float(os.getenv("FAKE_BACKEND_FAILURE_RATE", "0")),
+            fail_sources=[source for source in os.getenv("FAKE_BACKEND_FAIL_SOURCES", "").split(",") if source],
+            failure_mode=os.getenv("FAKE_BACKEND_FAILURE_MODE", "status"),
+            listings_per_portal=int(listings) if listings else None,
+            seed=int(os.getenv("FAKE_BACKEND_SEED", "0")),
+        )
+
+    def _rng(self, urls: List[str]) -> random.Random:
+        key = ",".join(urls)
+        with self._lock:
+            count = self._call_counts[key] = self._call_counts.get(key, 0) + 1
+        return random.Random(f"{self.seed}:{key}:{count}")
+
+    def extract(self, urls: List[str], params: Dict, deadline: Optional[float] = None) -> Dict:
+        rng = self._rng(urls)
+        sources = sorted({_source_for(url) for url in urls})
+        latency = max((self.source_latency.get(source, self.latency) for source in sources), default=self.latency)
+        latency *= 1 + rng.uniform(-self.jitter, self.jitter)
+        with self._lock:
+            self.calls.append({"urls": list(urls), "prompt": params.get("prompt"), "latency": latency})
+        if deadline is not None and time.monotonic() + latency > deadline:
+            # Like the real client, stop waiting at the deadline instead of finishing the slow extraction
+            time.sleep(max(0.0, deadline - time.monotonic()))
+            raise injected_failure(sources, "timeout")
+        time.sleep(max(0.0, latency))
+
+        if self.fail_sources.intersection(sources) or rng.random() < self.failure_rate:
+            raise injected_failure(sources, self.failure_mode)
+
+        schema_fields = params.get("schema", {}).get("properties", {})
+        if "locations" in schema_fields:
+            return {"success": True, "data": self._locations(urls)}
+        return {"success": True, "data": {"properties": self._properties(urls, sources, rng)}}
+
+    def fetch_page(self, url: str) -> str:
+        """Page text for change detection: stable per URL until `page_versions[url]` is bumped."""
+        source = _source_for(url)
+        recorded = json.dumps(self.recordings.get(source, {}), ensure_ascii=False, sort_keys=True)
+        return f"{url} v{self.page_versions.get(url, 0)} {recorded}"
+
+    def _locations(self, urls: List[str]) -> Dict:
+        city = next((c for c in map(_city_from_url, urls) if c), RECORDED_CITY)
+        locations = copy.deepcopy(self.recordings.get("homegate-market-analysis", {}).get("locations", []))
+        for location in locations:
+            location["location"] = location["location"].replace(RECORDED_CITY, city)
+        return {"locations": locations}
+
+    def _properties(self, urls: List[str], sources: List[str], rng: random.Random) -> List[Dict]:
+        city = next((c for c in map(_city_from_url, urls) if c), RECORDED_CITY)
+        recorded = [listing for source in sources for listing in self.recordings.get(source, {}).get("properties", [])]
+        if not recorded:
+            return []
+        count = self.listings_per_portal * len(sources) if self.listings_per_portal else len(recorded)
+        relabel = normalize_name(city) != normalize_name(RECORDED_CITY)
+        city_record = swiss_cities.find(city) if relabel else None
+        listings = []
+        for index in range(count):
+            listing = dict(recorded[index % len(recorded)])
+            if relabel:
+                listing["location_address"] = listing["location_address"].replace("Zürich", city).replace(RECORDED_CITY, city)
+                if city_record is not None:
+                    listing["canton"] = city_record.canton
+            if index >= len(recorded):
+                # Synthesized variants: distinct listing URL and house number, price shifted by up to ±20%
+                variant = index // len(recorded)
+                listing["building_name"] = f"{listing['building_name']} #{variant}"
+                listing["listing_url"] = f"{listing['listing_url']}?variant={variant}"
+                listing["location_address"] = re.sub(r"\d+", lambda m: str(int(m.group()) + 2 * variant), listing["location_address"], count=1)
+                if listing["price"] and listing["price"][-1].isdigit():
+                    amount = int("".join(char for char in listing["price"] if char.isdigit()))
+                    listing["price"] = f"CHF {int(amount * rng.uniform(0.8, 1.2)):,}"
+            listings.append(listing)
+        return listings
+
+
+class FakeLLM(LLMBackend):
+    """Deterministic stand-in for the OpenAI agent: returns a short summary of the prompt after a fixed latency."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.prompts: List[str] = []
+
+    def run(self, prompt: str) -> str:
+        time.sleep(self.latency)
+        self.prompts.append(prompt)
+        listing_lines = [line for line in prompt.splitlines() if line.count(" | ") >= 3 and not line.strip().startswith("building_name |")]
+        return f"Offline analysis of {len(listing_lines)} listings ({len(prompt)} prompt characters)."
+
+
+class FakeImageResponse:
+    def __init__(self, content: bytes):
+        self.status_code = 200
+        self.content = content
+        self.headers = {"ETag": f'"{len(content)}"'}
+
+    def raise_for_status(self) -> None:
+        pass
+
+
+class FakeImageSession:
+    """Offline replacement for the thumbnail cache's HTTP session: every URL returns the same generated image."""
+
+    def __init__(self, latency: float = 0.0, size=(1200, 900)):
+        from io import BytesIO
+
+        from PIL import Image
+
+        self.latency = latency
+        output = BytesIO()
+        Image.new("RGB", size, (200, 210, 220)).save(output, format="JPEG")
+        self._content = output.getvalue()
+
+    def get(self, url: str, timeout: Optional[float] = None, headers: Optional[Dict] = None) -> FakeImageResponse:
+        time.sleep(self.latency)
+        return FakeImageResponse(self._content)
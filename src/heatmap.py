@@ -0,0 +1,194 @@
+import logging
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .cantons import CANTONS
+from .market_stats import UNKNOWN, MarketStatistics, grouped_median, grouped_percentiles
+from .spatial import project_km, unproject_km
+from .swiss_cities_database import swiss_cities
+
+# Side of a heatmap grid cell in kilometres
+GRID_CELL_KM = 10.0
+# Bounding box of Switzerland (latitude, longitude), padded by a few kilometres
+SWISS_BOUNDS = ((45.78, 5.90), (47.84, 10.55))
+# Cells and municipalities with fewer priced listings get a listing count but no CHF/m² value
+MIN_CELL_LISTINGS = 3
+
+
+class HeatmapTiles:
+    """
+    National CHF/m² and inventory aggregates, precomputed for one version of the listing data.
+
+    `price_per_sqm` (median, NaN where too few listings) and `listings` (active listings) are
+    rows × cols grids of GRID_CELL_KM cells on the project_km plane, row 0 at the southern edge.
+    `municipalities` holds the same figures per searched municipality as parallel arrays, and
+    `cantons` one entry per canton code in CANTONS.
+    """
+
+    __slots__ = ("version", "computed_at", "cell_km", "origin", "price_per_sqm", "listings", "municipalities", "cantons")
+
+    def __init__(self, version: int, computed_at: float, cell_km: float, origin: Tuple[float, float],
+                 price_per_sqm: np.ndarray, listings: np.ndarray, municipalities: Dict[str, np.ndarray],
+                 cantons: Dict[str, Dict]):
+        self.version = version
+        self.computed_at = computed_at
+        self.cell_km = cell_km
+        self.origin = origin
+        self.price_per_sqm = price_per_sqm
+        self.listings = listings
+        self.municipalities = municipalities
+        self.cantons = cantons
+
+    @property
+    def total_listings(self) -> int:
+        return int(self.listings.sum())
+
+    def cell_centre(self, row: int, col: int) -> Tuple[float, float]:
+        """(latitude, longitude) of a grid cell's centre."""
+        return unproject_km(self.origin[0] + (col + 0.5) * self.cell_km, self.origin[1] + (row + 0.5) * self.cell_km)
+
+    def cells(self) -> List[Dict]:
+        """Every grid cell with listings: centre, median CHF/m² (None when too few listings) and listing count."""
+        cells = []
+        for row, col in zip(*np.nonzero(self.listings)):
+            latitude, longitude = self.cell_centre(int(row), int(col))
+            value = float(self.price_per_sqm[row, col])
+            cells.append({"latitude": latitude, "longitude": longitude,
+                          "price_per_sqm": value if math.isfinite(value) else None,
+                          "listings": int(self.listings[row, col])})
+        return cells
+
+
+def _empty_grid(cell_km: float) -> Tuple[Tuple[float, float], int, int]:
+    (south, west), (north, east) = SWISS_BOUNDS
+    x0, y0 = project_km(south, west)
+    x1, y1 = project_km(north, east)
+    return (x0, y0), int(math.ceil((y1 - y0) / cell_km)), int(math.ceil((x1 - x0) / cell_km))
+
+
+class MarketHeatmap:
+    """
+    Precomputed national heatmap over the listings collected by MarketStatistics.
+
+    Each listing is placed at its searched municipality's centre. Aggregates are rebuilt from a
+    snapshot of the statistics' columns with vectorized group-bys whenever the data version changes;
+    readers meanwhile get the previous tiles (rebuilt on a background thread), so rendering never
+    waits for a computation once the first tiles exist.
+    """
+
+    def __init__(self, market_stats: MarketStatistics, cell_km: float = GRID_CELL_KM):
+        self.market_stats = market_stats
+        self.cell_km = cell_km
+        self._tiles: Optional[HeatmapTiles] = None
+        # Municipality name and projected centre per city label; None when the municipality is unknown
+        self._places: Dict[str, Optional[Tuple[str, float, float]]] = {}
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    def _place(self, label: str) -> Optional[Tuple[str, float, float]]:
+        if label not in self._places:
+            record = swiss_cities.find(label)
+            self._places[label] = (record.name, *project_km(record.latitude, record.longitude)) \
+                if record is not None and record.latitude is not None else None
+        return self._places[label]
+
+    def compute(self) -> HeatmapTiles:
+        """Aggregate the current listings into new tiles (does not replace the served tiles)."""
+        snapshot = self.market_stats.snapshot()
+        origin, rows, cols = _empty_grid(self.cell_km)
+        city_codes, price_per_sqm = snapshot["city"], snapshot["price_per_sqm"]
+
+        positions = np.full((len(snapshot["city_labels"]) + 1, 2), np.nan)
+        names = {}
+        for code, label in enumerate(snapshot["city_labels"]):
+            place = self._place(label)
+            if place is not None:
+                names[code], positions[code] = place[0], place[1:]
+        # UNKNOWN (-1) indexes the trailing NaN row
+        x, y = positions[city_codes, 0], positions[city_codes, 1]
+        col = np.floor((x - origin[0]) / self.cell_km)
+        row = np.floor((y - origin[1]) / self.cell_km)
+        inside = np.isfinite(x) & (row >= 0) & (row < rows) & (col >= 0) & (col < cols)
+        cells = np.where(inside, np.nan_to_num(row) * cols + np.nan_to_num(col), UNKNOWN).astype(np.int64)
+
+        listings = np.bincount(cells[inside], minlength=rows * cols).astype(np.int32)
+        grid = np.full(rows * cols, np.nan, dtype=np.float32)
+        groups, counts, medians = grouped_percentiles(cells, price_per_sqm, (50,))
+        enough = counts >= MIN_CELL_LISTINGS
+        grid[groups[enough]] = medians[enough, 0]
+
+        located = np.flatnonzero(np.isfinite(positions[:-1, 0]))
+        municipality_counts = np.bincount(city_codes[city_codes != UNKNOWN], minlength=len(positions) - 1)
+        municipality_medians = grouped_median(city_codes, price_per_sqm)
+        centres = [unproject_km(*positions[code]) for code in located]
+        municipalities = {
+            "name": np.asarray([names[code] for code in located], dtype=object),
+            "latitude": np.asarray([centre[0] for centre in centres], dtype=np.float32),
+            "longitude": np.asarray([centre[1] for centre in centres], dtype=np.float32),
+            "price_per_sqm": np.asarray([_median_or_nan(municipality_medians.get(int(code))) for code in located],
+                                        dtype=np.float32),
+            "listings": municipality_counts[located].astype(np.int32),
+        }
+
+        canton_medians = grouped_median(snapshot["canton"], price_per_sqm)
+        canton_codes = snapshot["canton"]
+        canton_counts = np.bincount(canton_codes[canton_codes != UNKNOWN], minlength=len(snapshot["canton_labels"]))
+        label_codes = {label: code for code, label in enumerate(snapshot["canton_labels"])}
+        cantons = {}
+        for canton in CANTONS:
+            code = label_codes.get(canton)
+            cantons[canton] = {
+                "price_per_sqm": _median_or_nan(canton_medians.get(code)) if code is not None else float("nan"),
+                "listings": int(canton_counts[code]) if code is not None else 0,
+            }
+        return HeatmapTiles(snapshot["version"], time.time(), self.cell_km, origin, grid.reshape(rows, cols),
+                            listings.reshape(rows, cols), municipalities, cantons)
+
+    def refresh(self) -> HeatmapTiles:
+        """Sync the statistics and rebuild the tiles now, e.g. from a background job after a crawl."""
+        self.market_stats.refresh()
+        tiles = self.compute()
+        with self._lock:
+            self._tiles = tiles
+        return tiles
+
+    def tiles(self) -> HeatmapTiles:
+        """
+        Current tiles. The first call computes them; after that, a data change triggers a background
+        rebuild and the previous tiles are returned until it finishes.
+        """
+        self.market_stats.refresh_if_stale()
+        with self._lock:
+            tiles = self._tiles
+        if tiles is None:
+            return self.refresh()
+        if tiles.version != self.market_stats.version:
+            self._rebuild_in_background()
+        return tiles
+
+    def _rebuild_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def rebuild():
+            try:
+                tiles = self.compute()
+                with self._lock:
+                    self._tiles = tiles
+            except Exception as e:
+                logging.warning(f"Heatmap rebuild failed: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=rebuild, name="heatmap-rebuild", daemon=True).start()
+
+
+def _median_or_nan(median: Optional[Tuple[float, int]]) -> float:
+    return median[0] if median is not None and median[1] >= MIN_CELL_LISTINGS else float("nan")
@@ -0,0 +1,222 @@
+"""
+UI strings and catalog terms in the languages of the language selector.
+
+Each table is compiled on first use into a read-only mapping per language (missing entries fall back to
+English) and cached for the life of the process, so switching language is a dictionary lookup.
+"""
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping
+
+from .cantons import get_canton_code, get_canton_name
+
+# Selector label -> language code, in display order
+LANGUAGE_OPTIONS = MappingProxyType({"English": "en", "Deutsch": "de", "Français": "fr", "Italiano": "it"})
+DEFAULT_LANGUAGE = "en"
+
+STRINGS = {
+    "configuration": {"en": "🔑 Configuration", "de": "🔑 Konfiguration", "fr": "🔑 Configuration", "it": "🔑 Configurazione"},
+    "api_keys_info": {
+        "en": "API keys are loaded from environment variables.",
+        "de": "API-Schlüssel werden aus Umgebungsvariablen geladen.",
+        "fr": "Les clés API sont chargées depuis les variables d'environnement.",
+        "it": "Le chiavi API vengono caricate dalle variabili d'ambiente.",
+    },
+    "debug_mode": {"en": "Debug Mode", "de": "Debug-Modus", "fr": "Mode débogage", "it": "Modalità debug"},
+    "app_title": {
+        "en": "🏠 Swiss Property Finder", "de": "🏠 Schweizer Immobiliensuche",
+        "fr": "🏠 Recherche immobilière en Suisse", "it": "🏠 Ricerca immobiliare in Svizzera",
+    },
+    "city": {"en": "City", "de": "Ort", "fr": "Ville", "it": "Città"},
+    "city_placeholder": {"en": "e.g., Zurich, Geneva", "de": "z. B. Zürich, Genf", "fr": "p. ex. Zurich, Genève", "it": "ad es. Zurigo, Ginevra"},
+    "min_price": {"en": "Min Price (CHF)", "de": "Mindestpreis (CHF)", "fr": "Prix minimum (CHF)", "it": "Prezzo minimo (CHF)"},
+    "max_price": {"en": "Max Price (CHF)", "de": "Höchstpreis (CHF)", "fr": "Prix maximum (CHF)", "it": "Prezzo massimo (CHF)"},
+    "canton": {"en": "Canton", "de": "Kanton", "fr": "Canton", "it": "Cantone"},
+    "all_cantons": {"en": "All", "de": "Alle", "fr": "Tous", "it": "Tutti"},
+    "search": {"en": "🔍 Search Properties", "de": "🔍 Immobilien suchen", "fr": "🔍 Rechercher des biens", "it": "🔍 Cerca immobili"},
+    "agent_error": {
+        "en": "Error initializing SwissPropertyAgent: {error}",
+        "de": "Fehler beim Starten von SwissPropertyAgent: {error}",
+        "fr": "Erreur lors de l'initialisation de SwissPropertyAgent : {error}",
+        "it": "Errore durante l'inizializzazione di SwissPropertyAgent: {error}",
+    },
+    "invalid_price_range": {
+        "en": "Minimum price must be less than maximum price.",
+        "de": "Der Mindestpreis muss unter dem Höchstpreis liegen.",
+        "fr": "Le prix minimum doit être inférieur au prix maximum.",
+        "it": "Il prezzo minimo deve essere inferiore al prezzo massimo.",
+    },
+    "searching": {
+        "en": "Searching for properties...", "de": "Immobilien werden gesucht...",
+        "fr": "Recherche de biens en cours...", "it": "Ricerca di immobili in corso...",
+    },
+    "searching_found": {
+        "en": "Searching for properties... {count} found so far",
+        "de": "Immobilien werden gesucht... bisher {count} gefunden",
+        "fr": "Recherche de biens en cours... {count} trouvés jusqu'ici",
+        "it": "Ricerca di immobili in corso... {count} trovati finora",
+    },
+    "no_results": {
+        "en": "No properties found. Please try adjusting your search criteria.",
+        "de": "Keine Immobilien gefunden. Bitte passen Sie Ihre Suchkriterien an.",
+        "fr": "Aucun bien trouvé. Veuillez modifier vos critères de recherche.",
+        "it": "Nessun immobile trovato. Prova a modificare i criteri di ricerca.",
+    },
+    "showing_range": {
+        "en": "Showing {first}-{last} of {total} properties", "de": "Immobilien {first}–{last} von {total}",
+        "fr": "Biens {first} à {last} sur {total}", "it": "Immobili da {first} a {last} di {total}",
+    },
+    "previous_page": {"en": "◀ Previous", "de": "◀ Zurück", "fr": "◀ Précédent", "it": "◀ Precedente"},
+    "next_page": {"en": "Next ▶", "de": "Weiter ▶", "fr": "Suivant ▶", "it": "Successivo ▶"},
+    "page_of": {"en": "Page {page} of {pages}", "de": "Seite {page} von {pages}", "fr": "Page {page} sur {pages}", "it": "Pagina {page} di {pages}"},
+    "location": {"en": "Location", "de": "Lage", "fr": "Emplacement", "it": "Posizione"},
+    "type": {"en": "Type", "de": "Typ", "fr": "Type", "it": "Tipo"},
+    "size": {"en": "Size", "de": "Fläche", "fr": "Surface", "it": "Superficie"},
+    "rooms": {"en": "Rooms", "de": "Zimmer", "fr": "Pièces", "it": "Locali"},
+    "description": {"en": "Description", "de": "Beschreibung", "fr": "Description", "it": "Descrizione"},
+    "view_listing": {"en": "View Listing", "de": "Inserat ansehen", "fr": "Voir l'annonce", "it": "Vedi annuncio"},
+    "price_on_request": {"en": "Price on request", "de": "Preis auf Anfrage", "fr": "Prix sur demande", "it": "Prezzo su richiesta"},
+    "not_available": {"en": "N/A", "de": "k. A.", "fr": "n. d.", "it": "n. d."},
+    "panel_city_overview": {
+        "en": "🏙️ City Overview", "de": "🏙️ Ortsübersicht", "fr": "🏙️ Aperçu de la ville", "it": "🏙️ Panoramica della città",
+    },
+    "panel_location_trends": {"en": "📈 Market Trends", "de": "📈 Markttrends", "fr": "📈 Tendances du marché", "it": "📈 Tendenze di mercato"},
+    "panel_canton_statistics": {
+        "en": "🏛️ Canton Statistics", "de": "🏛️ Kantonsstatistik", "fr": "🏛️ Statistiques cantonales", "it": "🏛️ Statistiche cantonali",
+    },
+    "canton_statistics_title": {
+        "en": "🏛️ {canton} Real Estate Statistics", "de": "🏛️ Immobilienstatistik {canton}",
+        "fr": "🏛️ Statistiques immobilières – {canton}", "it": "🏛️ Statistiche immobiliari – {canton}",
+    },
+    "overview_needs_canton": {
+        "en": "Both city and canton must be selected to display the city overview.",
+        "de": "Für die Ortsübersicht müssen Ort und Kanton ausgewählt sein.",
+        "fr": "La ville et le canton doivent être sélectionnés pour afficher l'aperçu de la ville.",
+        "it": "Per la panoramica della città occorre selezionare città e cantone.",
+    },
+    "panel_loading": {"en": "Loading {panel}...", "de": "{panel} wird geladen...", "fr": "Chargement : {panel}...", "it": "Caricamento: {panel}..."},
+    "panel_unavailable": {
+        "en": "{panel} is currently unavailable. Please try again.",
+        "de": "{panel} ist derzeit nicht verfügbar. Bitte versuchen Sie es erneut.",
+        "fr": "{panel} est momentanément indisponible. Veuillez réessayer.",
+        "it": "{panel} non è al momento disponibile. Riprova.",
+    },
+    # City overview fields, keyed like CityRecord.to_info()
+    "Population": {"en": "Population", "de": "Einwohner", "fr": "Population", "it": "Popolazione"},
+    "Canton": {"en": "Canton", "de": "Kanton", "fr": "Canton", "it": "Cantone"},
+    "Geographic Location": {"en": "Geographic Location", "de": "Geografische Lage", "fr": "Situation géographique", "it": "Posizione geografica"},
+    "Main Language(s)": {"en": "Main Language(s)", "de": "Hauptsprache(n)", "fr": "Langue(s) principale(s)", "it": "Lingue principali"},
+    "Notable Features": {"en": "Notable Features", "de": "Besonderheiten", "fr": "Particularités", "it": "Caratteristiche"},
+    "heatmap_title": {
+        "en": "🗺️ National Price Heatmap", "de": "🗺️ Nationale Preiskarte",
+        "fr": "🗺️ Carte nationale des prix", "it": "🗺️ Mappa nazionale dei prezzi",
+    },
+    "heatmap_empty": {
+        "en": "Not enough listings collected yet. Searches and the background crawler fill in the map.",
+        "de": "Noch nicht genügend Inserate gesammelt. Suchen und der Hintergrund-Crawler füllen die Karte.",
+        "fr": "Pas encore assez d'annonces collectées. Les recherches et le robot d'arrière-plan complètent la carte.",
+        "it": "Non sono ancora stati raccolti abbastanza annunci. Le ricerche e il crawler in background completano la mappa.",
+    },
+    "heatmap_caption": {
+        "en": "Median CHF/m² per {cell_km} km cell, from {listings} active listings. "
+              "Green: CHF {low}/m² or less, red: CHF {high}/m² or more.",
+        "de": "Median CHF/m² pro {cell_km}-km-Zelle aus {listings} aktiven Inseraten. "
+              "Grün: höchstens CHF {low}/m², rot: mindestens CHF {high}/m².",
+        "fr": "CHF/m² médian par cellule de {cell_km} km, sur {listings} annonces actives. "
+              "Vert : CHF {low}/m² ou moins, rouge : CHF {high}/m² ou plus.",
+        "it": "CHF/m² mediano per cella di {cell_km} km, da {listings} annunci attivi. "
+              "Verde: CHF {low}/m² o meno, rosso: CHF {high}/m² o più.",
+    },
+    "listings": {"en": "Listings", "de": "Inserate", "fr": "Annonces", "it": "Annunci"},
+    "median_price_per_sqm": {"en": "Median CHF/m²", "de": "Median CHF/m²", "fr": "CHF/m² médian", "it": "CHF/m² mediano"},
+    "save_search": {
+        "en": "🔔 Save this search", "de": "🔔 Suche speichern", "fr": "🔔 Enregistrer cette recherche", "it": "🔔 Salva questa ricerca",
+    },
+    "search_saved": {
+        "en": "Saved. New listings in {city} will appear under 🔔 New Listings.",
+        "de": "Gespeichert. Neue Inserate in {city} erscheinen unter 🔔 Neue Inserate.",
+        "fr": "Enregistrée. Les nouvelles annonces à {city} apparaîtront sous 🔔 Nouvelles annonces.",
+        "it": "Salvata. I nuovi annunci a {city} appariranno in 🔔 Nuovi annunci.",
+    },
+    "new_listings": {
+        "en": "🔔 New Listings ({count})", "de": "🔔 Neue Inserate ({count})",
+        "fr": "🔔 Nouvelles annonces ({count})", "it": "🔔 Nuovi annunci ({count})",
+    },
+    "no_new_listings": {
+        "en": "No new listings for your saved searches.",
+        "de": "Keine neuen Inserate für Ihre gespeicherten Suchen.",
+        "fr": "Aucune nouvelle annonce pour vos recherches enregistrées.",
+        "it": "Nessun nuovo annuncio per le ricerche salvate.",
+    },
+    "mark_as_read": {"en": "Mark as read", "de": "Als gelesen markieren", "fr": "Marquer comme lu", "it": "Segna come letto"},
+    "regulations_title": {
+        "en": "Swiss Real Estate Regulations", "de": "Schweizer Immobilienvorschriften",
+        "fr": "Réglementation immobilière suisse", "it": "Normativa immobiliare svizzera",
+    },
+    "show_regulations": {"en": "Show Regulations", "de": "Vorschriften anzeigen", "fr": "Afficher la réglementation", "it": "Mostra normativa"},
+    "regulations": {
+        "en": "- Non-residents need a permit (Lex Koller) to buy property\n"
+              "- Annual property tax varies by canton\n"
+              "- Rental properties: Landlords can only increase rent with interest rate changes",
+        "de": "- Personen im Ausland brauchen für den Kauf eine Bewilligung (Lex Koller)\n"
+              "- Die jährliche Liegenschaftssteuer ist je nach Kanton verschieden\n"
+              "- Mietobjekte: Vermieter dürfen die Miete nur bei Zinsänderungen erhöhen",
+        "fr": "- Les non-résidents ont besoin d'une autorisation (Lex Koller) pour acheter un bien\n"
+              "- L'impôt foncier annuel varie selon le canton\n"
+              "- Biens loués : les bailleurs ne peuvent augmenter le loyer qu'en cas de variation des taux d'intérêt",
+        "it": "- I non residenti necessitano di un'autorizzazione (Lex Koller) per acquistare un immobile\n"
+              "- L'imposta immobiliare annua varia da cantone a cantone\n"
+              "- Immobili in affitto: i locatori possono aumentare l'affitto solo se cambiano i tassi d'interesse",
+    },
+    "canton_regulations_title": {
+        "en": "{canton} Specific Regulations", "de": "Vorschriften im Kanton {canton}",
+        "fr": "Réglementation du canton de {canton}", "it": "Normativa del Cantone {canton}",
+    },
+    "canton_regulations": {
+        "en": "Displaying regulations specific to {canton}...",
+        "de": "Vorschriften für {canton} werden angezeigt...",
+        "fr": "Affichage de la réglementation propre à {canton}...",
+        "it": "Visualizzazione della normativa specifica per {canton}...",
+    },
+}
+
+# Values of the municipality catalog (regions, languages) as stored in English
+TERMS = {
+    "Northern Switzerland": {"de": "Nordschweiz", "fr": "Suisse du Nord", "it": "Svizzera settentrionale"},
+    "Northwestern Switzerland": {"de": "Nordwestschweiz", "fr": "Suisse du Nord-Ouest", "it": "Svizzera nord-occidentale"},
+    "Central Switzerland": {"de": "Zentralschweiz", "fr": "Suisse centrale", "it": "Svizzera centrale"},
+    "Eastern Switzerland": {"de": "Ostschweiz", "fr": "Suisse orientale", "it": "Svizzera orientale"},
+    "Western Switzerland": {"de": "Westschweiz", "fr": "Suisse romande", "it": "Svizzera romanda"},
+    "Southern Switzerland": {"de": "Südschweiz", "fr": "Suisse méridionale", "it": "Svizzera meridionale"},
+    "German": {"de": "Deutsch", "fr": "allemand", "it": "tedesco"},
+    "French": {"de": "Französisch", "fr": "français", "it": "francese"},
+    "Italian": {"de": "Italienisch", "fr": "italien", "it": "italiano"},
+    "Romansh": {"de": "Rätoromanisch", "fr": "romanche", "it": "romancio"},
+}
+
+
+@lru_cache(maxsize=None)
+def translations(language: str = DEFAULT_LANGUAGE) -> Mapping[str, str]:
+    """Every UI string in `language` (English where no translation exists), as a read-only mapping."""
+    return MappingProxyType({key: texts.get(language, texts[DEFAULT_LANGUAGE]) for key, texts in STRINGS.items()})
+
+
+@lru_cache(maxsize=None)
+def _terms(language: str) -> Mapping[str, str]:
+    return MappingProxyType({term: texts.get(language, term) for term, texts in TERMS.items()})
+
+
+def translate_term(value: str, language: str = DEFAULT_LANGUAGE) -> str:
+    """A catalog value such as a region or language name in `language`; unknown values are returned unchanged."""
+    return _terms(language).get(value, value)
+
+
+def language_code(label: str) -> str:
+    """Language code for a selector label ('Deutsch' -> 'de'), English for anything else."""
+    return LANGUAGE_OPTIONS.get(label, DEFAULT_LANGUAGE)
+
+
+def canton_display_name(canton: str, language: str = DEFAULT_LANGUAGE) -> str:
+    """A canton code or name (in any language) as the canton's name in `language`; unknown names are returned unchanged."""
+    code = get_canton_code(canton) if canton else None
+    return get_canton_name(code, language) if code else canton
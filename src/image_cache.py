@@ -0,0 +1,201 @@
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import TYPE_CHECKING, Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+from .backends import create_http_session, use_fake_backends
+from .resilience import get_upstream
+
+if TYPE_CHECKING:
+    import requests
+
+# Twice the rendered card size (300x225) so thumbnails stay sharp on high-DPI screens
+THUMBNAIL_SIZE = (600, 450)
+DEFAULT_THUMBNAIL_DIR = os.path.join(".cache", "thumbnails")
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class ThumbnailCache:
+    """
+    Two-level (in-memory LRU and on-disk) cache of JPEG thumbnails keyed by image URL.
+
+    Images are downloaded once through a pooled session, decoded and resized to THUMBNAIL_SIZE, and
+    stored with their ETag. Later lookups, including after a restart, never download the image again
+    unless `revalidate` is requested, in which case a conditional request is sent.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_memory_items: int = 256, session: Optional["requests.Session"] = None,
+                 max_workers: int = 8, max_retries: int = 3, timeout: float = 10, backoff: float = 0.5):
+        self.cache_dir = cache_dir or os.getenv("THUMBNAIL_CACHE_DIR", DEFAULT_THUMBNAIL_DIR)
+        self.max_memory_items = max_memory_items
+        self.session = session or create_http_session(pool_size=max_workers)
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff = backoff
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _paths(self, key: str):
+        base = os.path.join(self.cache_dir, key)
+        return base + ".jpg", base + ".json"
+
+    def _remember(self, key: str, data: bytes) -> None:
+        with self._lock:
+            self._memory[key] = data
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_items:
+                self._memory.popitem(last=False)
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        image_path, _ = self._paths(key)
+        try:
+            with open(image_path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _read_etag(self, key: str) -> Optional[str]:
+        _, meta_path = self._paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f).get("etag")
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key: str, url: str, data: bytes, etag: Optional[str]) -> None:
+        image_path, meta_path = self._paths(key)
+        try:
+            # Write to a temporary file first so concurrent readers never see a partial thumbnail
+            tmp_path = f"{image_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, image_path)
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump({"url": url, "etag": etag, "stored_at": time.time()}, f)
+        except OSError as e:
+            logging.warning(f"Unable to write thumbnail for {url} to disk: {str(e)}")
+
+    @staticmethod
+    def make_thumbnail(content: bytes) -> bytes:
+        # Pillow is only needed once an image is actually downloaded
+        from PIL import Image
+
+        img = Image.open(BytesIO(content))
+        img.load()  # This will raise an exception for corrupt images
+        img = img.convert("RGB")
+        img.thumbnail(THUMBNAIL_SIZE)
+        output = BytesIO()
+        img.save(output, format="JPEG", quality=85, optimize=True)
+        return output.getvalue()
+
+    def _download(self, url: str, key: str, etag: Optional[str] = None) -> Optional[bytes]:
+        from PIL import UnidentifiedImageError
+        from requests.exceptions import RequestException
+
+        headers = {"If-None-Match": etag} if etag else {}
+        upstream = get_upstream("images")
+        # One breaker per image host, so a dead CDN is skipped instead of costing every card its retries
+        breaker = upstream.breaker(urlparse(url).hostname or url)
+        if not breaker.allow():
+            logging.info(f"Skipping image from {url}: host circuit open")
+            return None
+        for attempt in range(self.max_retries):
+            if attempt and not breaker.available():
+                # Other downloads from the host opened its circuit while this one was backing off
+                break
+            upstream.bucket.acquire()
+            try:
+                response = self.session.get(url, timeout=self.timeout, headers=headers)
+                if response.status_code == 304:
+                    breaker.record_success()
+                    return self._read_disk(key)
+                if response.status_code in RETRYABLE_STATUS_CODES:
+                    raise RequestException(f"HTTP {response.status_code}")
+                breaker.record_success()
+                response.raise_for_status()
+                data = self.make_thumbnail(response.content)
+                self._write_disk(key, url, data, response.headers.get("ETag"))
+                return data
+            except UnidentifiedImageError:
+                logging.error(f"Unidentified image format from {url}")
+                return None
+            except RequestException as e:
+                status = getattr(getattr(e, "response", None), "status_code", None)
+                logging.error(f"Network error loading image from {url}: {str(e)}")
+                if status is not None and status not in RETRYABLE_STATUS_CODES:
+                    breaker.release()
+                    return None
+            except Exception as e:
+                logging.error(f"Error loading image from {url}: {str(e)}")
+                return None
+
+            if attempt < self.max_retries - 1:
+                # Full jitter keeps many cards failing on the same host from retrying in lockstep
+                delay = random.uniform(0, self.backoff * (2 ** attempt))
+                logging.info(f"Retrying image load from {url} in {delay:.1f}s (attempt {attempt + 2}/{self.max_retries})")
+                time.sleep(delay)
+
+        # A download counts once against its host, however many attempts it took
+        breaker.record_failure()
+        logging.warning(f"Failed to load image from {url} after {attempt + 1} attempts")
+        return None
+
+    def get(self, url: str, revalidate: bool = False) -> Optional[bytes]:
+        """
+        JPEG thumbnail bytes for an image URL, from memory, disk or the network.
+
+        :param url: Image URL
+        :param revalidate: Send a conditional request with the stored ETag even when the thumbnail is cached
+        :return: Thumbnail bytes, or None when the image cannot be loaded
+        """
+        key = self._key(url)
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+        if data is None:
+            data = self._read_disk(key)
+        if data is None or revalidate:
+            data = self._download(url, key, self._read_etag(key) if data is not None else None) or data
+        if data is not None:
+            self._remember(key, data)
+        return data
+
+    def prefetch(self, urls: Iterable[Optional[str]]) -> Dict[str, Optional[bytes]]:
+        """Load the thumbnails for a page of results concurrently, bounded by `max_workers`."""
+        unique_urls = list(dict.fromkeys(url for url in urls if url and url.startswith(("http://", "https://"))))
+        if not unique_urls:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(unique_urls)), thread_name_prefix="thumbnail") as executor:
+            return dict(zip(unique_urls, executor.map(self.get, unique_urls)))
+
+
+_thumbnail_cache: Optional[ThumbnailCache] = None
+_thumbnail_cache_lock = threading.Lock()
+
+
+def get_thumbnail_cache() -> ThumbnailCache:
+    """Process-wide thumbnail cache shared by all Streamlit sessions."""
+    global _thumbnail_cache
+    with _thumbnail_cache_lock:
+        if _thumbnail_cache is None:
+            session = None
+            if use_fake_backends():
+                from .fake_backends import FakeImageSession
+                session = FakeImageSession()
+            _thumbnail_cache = ThumbnailCache(session=session, max_workers=int(os.getenv("THUMBNAIL_WORKERS", "8")))
+        return _thumbnail_cache
@@ -0,0 +1,211 @@
+import copy
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, MutableMapping, Optional
+
+from pydantic import ConfigDict, TypeAdapter, ValidationError
+
+from .listing_table import parse_number, parse_price
+from .schemas import PropertyData
+from .tracing import annotate
+
+PROPERTY_FIELDS = tuple(PropertyData.model_fields)
+_NUMERIC_FIELDS = {"price", "size", "rooms"}
+
+
+class _PropertyRow(PropertyData):
+    """PropertyData as ingested: nullable fields may also be missing, and unknown keys are kept."""
+    model_config = ConfigDict(coerce_numbers_to_str=True, extra="allow")
+
+    size: Optional[str] = None
+    rooms: Optional[str] = None
+    image_url: Optional[str] = None
+    listing_url: Optional[str] = None
+
+
+# Validates a whole payload in one call into pydantic-core instead of one model per row
+_ROWS = TypeAdapter(List[_PropertyRow])
+
+
+def _copy_extra(extra: Optional[Dict]) -> Optional[Dict]:
+    # Nested values such as the 'alternate_urls' list are copied too, so a copy never shares them with the original
+    if not extra:
+        return None
+    return {key: copy.deepcopy(value) if isinstance(value, (list, dict, set)) else value for key, value in extra.items()}
+
+
+def _restore(values: tuple, extra: Optional[Dict]) -> "PropertyRecord":
+    record = PropertyRecord.__new__(PropertyRecord)
+    for field, value in zip(PROPERTY_FIELDS, values):
+        setattr(record, field, value)
+    record._extra = _copy_extra(extra)
+    record._parse_numbers()
+    return record
+
+
+class PropertyRecord(MutableMapping):
+    """
+    A validated listing: the PropertyData fields in slots, plus price, size and rooms parsed once.
+
+    Behaves like the listing dicts used elsewhere (`record['price']`, `.get()`, `.setdefault()`), so stores,
+    dedup and the UI take it unchanged; keys other than the PropertyData fields (e.g. 'alternate_urls') are
+    kept in a small side dict. `price_chf` is infinity and `size_m2`/`rooms_count` NaN when unknown, the
+    same convention as ListingTable, and they are re-parsed whenever their text field is assigned.
+    The PropertyData keys are always present; deleting one resets it to None.
+    """
+
+    __slots__ = PROPERTY_FIELDS + ("price_chf", "size_m2", "rooms_count", "_extra")
+
+    def __init__(self, data: Mapping[str, Any] = (), **fields):
+        for field in PROPERTY_FIELDS:
+            setattr(self, field, None)
+        self._extra: Optional[Dict[str, Any]] = None
+        self.update(data, **fields)
+        self._parse_numbers()
+
+    @classmethod
+    def from_model(cls, model: PropertyData) -> "PropertyRecord":
+        values = model.__dict__
+        return _restore(tuple(values[field] for field in PROPERTY_FIELDS), model.__pydantic_extra__)
+
+    def _parse_numbers(self) -> None:
+        self.price_chf = parse_price(self.price)
+        self.size_m2 = parse_number(self.size)
+        self.rooms_count = parse_number(self.rooms)
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _FIELD_SET:
+            return getattr(self, key)
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in _FIELD_SET:
+            setattr(self, key, value)
+            if key in _NUMERIC_FIELDS and hasattr(self, "price_chf"):
+                self._parse_numbers()
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key in _FIELD_SET:
+            self[key] = None
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from PROPERTY_FIELDS
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return len(PROPERTY_FIELDS) + (len(self._extra) if self._extra else 0)
+
+    def __contains__(self, key: object) -> bool:
+        if key in _FIELD_SET:
+            return True
+        return self._extra is not None and key in self._extra
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Mapping) and dict(self.items()) == dict(other.items())
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"PropertyRecord({dict(self.items())!r})"
+
+    def __reduce__(self):
+        # copy, deepcopy (single-flight followers) and pickle go through the slots, not the mixin methods
+        return _restore, (tuple(getattr(self, field) for field in PROPERTY_FIELDS), self._extra)
+
+    def copy(self) -> "PropertyRecord":
+        return _restore(tuple(getattr(self, field) for field in PROPERTY_FIELDS), self._extra)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+
+_FIELD_SET = frozenset(PROPERTY_FIELDS)
+
+
+class Quarantine:
+    """
+    Rows rejected at ingest, kept for inspection instead of failing the whole payload.
+
+    The most recent `max_rows` rows are held in memory with their validation errors; with QUARANTINE_PATH
+    set, every rejected row is also appended to that JSONL file.
+    """
+
+    def __init__(self, max_rows: int = 200, path: Optional[str] = None):
+        self.rows: deque = deque(maxlen=max_rows)
+        self.total = 0
+        self.path = path
+        self._lock = threading.Lock()
+
+    def add(self, row: Any, errors: List[Dict], source: Optional[str] = None) -> None:
+        entry = {"source": source, "row": row, "errors": errors, "quarantined_at": time.time()}
+        with self._lock:
+            self.rows.append(entry)
+            self.total += 1
+            if self.path:
+                try:
+                    with open(self.path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+                except OSError as e:
+                    logging.warning(f"Could not write quarantined row to {self.path}: {str(e)}")
+
+    def recent(self, limit: Optional[int] = None) -> List[Dict]:
+        with self._lock:
+            rows = list(self.rows)
+        return rows[-limit:] if limit else rows
+
+    def clear(self) -> None:
+        with self._lock:
+            self.rows.clear()
+            self.total = 0
+
+
+def _error_summary(errors: Iterable[Dict]) -> List[Dict]:
+    return [{"field": ".".join(str(part) for part in error["loc"][1:]), "type": error["type"], "message": error["msg"]}
+            for error in errors]
+
+
+def ingest_properties(rows: Optional[Iterable[Any]], source: Optional[str] = None) -> List[PropertyRecord]:
+    """
+    Validate an extraction payload's listings against PropertyData in one batch and build PropertyRecords.
+
+    Rows that fail validation (missing name, a price that is an object, not a dict at all, ...) go to
+    the shared `quarantine` and are dropped; the rest of the payload is kept.
+
+    :param rows: Raw listing rows, e.g. response['data']['properties']
+    :param source: Portal or pipeline the rows came from, recorded with quarantined rows
+    """
+    rows = rows if isinstance(rows, list) else list(rows or ())
+    if not rows:
+        return []
+    try:
+        models = _ROWS.validate_python(rows)
+    except ValidationError as e:
+        errors: Dict[int, List[Dict]] = {}
+        for error in e.errors(include_url=False, include_input=False):
+            errors.setdefault(error["loc"][0], []).append(error)
+        for index in sorted(errors):
+            quarantine.add(rows[index], _error_summary(errors[index]), source)
+        annotate(quarantined=len(errors))
+        logging.warning(f"Quarantined {len(errors)} of {len(rows)} listings{f' from {source}' if source else ''}")
+        valid_rows = [row for index, row in enumerate(rows) if index not in errors]
+        # Every remaining row passed on its own, so the second pass cannot fail
+        models = _ROWS.validate_python(valid_rows) if valid_rows else []
+    return [PropertyRecord.from_model(model) for model in models]
+
+
+quarantine = Quarantine(path=os.getenv("QUARANTINE_PATH") or None)
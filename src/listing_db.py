@@ -0,0 +1,226 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Mapping
+from typing import Dict, Iterable, List, Optional
+
+from .cantons import normalize_name
+from .listing_table import numeric_fields
+
+DEFAULT_DB_PATH = os.path.join(".cache", "listings.sqlite3")
+# A city crawled less than this many seconds ago is answered from the database instead of a live scrape
+DEFAULT_MAX_AGE = 6 * 60 * 60
+# Fields that make up a listing's content hash; a change in any of them marks the listing as changed
+HASHED_FIELDS = ("building_name", "property_type", "location_address", "canton", "price", "size", "rooms", "description",
+                 "image_url")
+
+
+def listing_key(listing: Dict) -> str:
+    """Stable identity of a listing: its URL, or its name, address and price when the portal gave no URL."""
+    if listing.get("listing_url"):
+        return listing["listing_url"]
+    return "|".join(str(listing.get(field) or "") for field in ("building_name", "location_address", "price"))
+
+
+def content_hash(value) -> str:
+    """SHA-256 of a listing's hashed fields, or of a page's text."""
+    if isinstance(value, Mapping):
+        value = json.dumps([value.get(field) for field in HASHED_FIELDS], ensure_ascii=False)
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def _finite(value: float) -> Optional[float]:
+    return value if value == value and value not in (float("inf"), float("-inf")) else None
+
+
+class ListingDatabase:
+    """
+    SQLite store of crawled listings per city, with indexes for city/canton/price range queries.
+
+    Each listing keeps the page it was extracted from and a content hash, so a crawl can tell new,
+    changed, unchanged and removed listings apart. Crawled pages keep their own content hash so
+    unchanged pages can skip extraction entirely.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_age: float = DEFAULT_MAX_AGE):
+        self.path = path or os.getenv("LISTING_DB_PATH", DEFAULT_DB_PATH)
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        if self.path != ":memory:" and os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS listings (
+                    city TEXT NOT NULL,
+                    listing_key TEXT NOT NULL,
+                    canton TEXT,
+                    price REAL,
+                    size REAL,
+                    rooms REAL,
+                    source TEXT,
+                    page_url TEXT,
+                    content_hash TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    first_seen REAL NOT NULL,
+                    last_seen REAL NOT NULL,
+                    last_changed REAL NOT NULL,
+                    removed_at REAL,
+                    PRIMARY KEY (city, listing_key)
+                );
+                CREATE INDEX IF NOT EXISTS idx_listings_city_price ON listings (city, price) WHERE removed_at IS NULL;
+                CREATE INDEX IF NOT EXISTS idx_listings_city_canton_price ON listings (city, canton, price) WHERE removed_at IS NULL;
+                CREATE INDEX IF NOT EXISTS idx_listings_canton_price ON listings (canton, price) WHERE removed_at IS NULL;
+                CREATE INDEX IF NOT EXISTS idx_listings_page ON listings (city, page_url);
+                CREATE INDEX IF NOT EXISTS idx_listings_changed ON listings (last_changed);
+                CREATE INDEX IF NOT EXISTS idx_listings_removed ON listings (removed_at) WHERE removed_at IS NOT NULL;
+                CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    city TEXT NOT NULL,
+                    source TEXT,
+                    content_hash TEXT,
+                    last_crawled REAL NOT NULL,
+                    last_changed REAL
+                );
+                CREATE TABLE IF NOT EXISTS cities (
+                    city TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    last_crawled REAL NOT NULL
+                );
+            """)
+
+    @staticmethod
+    def city_key(city: str) -> str:
+        return normalize_name(city)
+
+    def page_hash(self, url: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT content_hash FROM pages WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def record_page(self, url: str, city: str, source: str, page_hash: Optional[str], changed: bool) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("""
+                INSERT INTO pages (url, city, source, content_hash, last_crawled, last_changed) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (url) DO UPDATE SET content_hash = excluded.content_hash, last_crawled = excluded.last_crawled,
+                    last_changed = COALESCE(excluded.last_changed, pages.last_changed)
+            """, (url, self.city_key(city), source, page_hash, now, now if changed else None))
+
+    def sync_page(self, city: str, source: str, page_url: str, listings: Iterable[Dict]) -> Dict[str, int]:
+        """
+        Store the listings extracted from one page and mark the page's missing listings as removed.
+
+        :return: Counts of 'new', 'changed', 'unchanged' and 'removed' listings
+        """
+        now = time.time()
+        city_key = self.city_key(city)
+        counts = {"new": 0, "changed": 0, "unchanged": 0, "removed": 0}
+        seen = set()
+        with self._lock, self._conn:
+            existing = dict(self._conn.execute(
+                "SELECT listing_key, content_hash FROM listings WHERE city = ? AND page_url = ? AND removed_at IS NULL",
+                (city_key, page_url)))
+            for listing in listings:
+                key = listing_key(listing)
+                if key in seen:
+                    continue
+                seen.add(key)
+                digest = content_hash(listing)
+                previous = existing.get(key)
+                if previous == digest:
+                    counts["unchanged"] += 1
+                    self._conn.execute("UPDATE listings SET last_seen = ? WHERE city = ? AND listing_key = ?", (now, city_key, key))
+                    continue
+                counts["new" if previous is None else "changed"] += 1
+                self._conn.execute("""
+                    INSERT INTO listings (listing_key, city, canton, price, size, rooms, source, page_url, content_hash, data,
+                                          first_seen, last_seen, last_changed, removed_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NULL)
+                    ON CONFLICT (city, listing_key) DO UPDATE SET canton = excluded.canton,
+                        price = excluded.price, size = excluded.size, rooms = excluded.rooms, source = excluded.source,
+                        page_url = excluded.page_url, content_hash = excluded.content_hash, data = excluded.data,
+                        last_seen = excluded.last_seen, last_changed = excluded.last_changed, removed_at = NULL
+                """, (key, city_key, (listing.get("canton") or "").strip().upper() or None,
+                      *(_finite(value) for value in numeric_fields(listing)), source, page_url, digest,
+                      json.dumps(listing, ensure_ascii=False, default=dict), now, now, now))
+            removed = [(now, city_key, key) for key in existing if key not in seen]
+            self._conn.executemany("UPDATE listings SET removed_at = ? WHERE city = ? AND listing_key = ?", removed)
+            counts["removed"] = len(removed)
+        return counts
+
+    def mark_city_crawled(self, city: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO cities (city, name, last_crawled) VALUES (?, ?, ?)",
+                               (self.city_key(city), city, time.time()))
+
+    def last_crawled(self, city: str) -> Optional[float]:
+        with self._lock:
+            row = self._conn.execute("SELECT last_crawled FROM cities WHERE city = ?", (self.city_key(city),)).fetchone()
+        return row[0] if row else None
+
+    def is_fresh(self, city: str, max_age: Optional[float] = None) -> bool:
+        """Whether the city was completely crawled within `max_age` seconds."""
+        crawled = self.last_crawled(city)
+        return crawled is not None and time.time() - crawled <= (self.max_age if max_age is None else max_age)
+
+    def search(self, city: str, min_price: Optional[float] = None, max_price: Optional[float] = None,
+               canton_code: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+        """Active listings of a city in a price range (and canton), cheapest first, from the city/canton/price indexes."""
+        query = "SELECT data FROM listings WHERE city = ? AND removed_at IS NULL"
+        params: List = [self.city_key(city)]
+        if canton_code:
+            query += " AND canton = ?"
+            params.append(canton_code.strip().upper())
+        if min_price is not None:
+            query += " AND price >= ?"
+            params.append(min_price)
+        if max_price is not None:
+            query += " AND price <= ?"
+            params.append(max_price)
+        query += " ORDER BY price"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def changed_since(self, since: float) -> List[Dict]:
+        """Numeric columns of the listings added, changed or removed at or after `since`, for MarketStatistics."""
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT city, listing_key, canton, price, size, rooms, json_extract(data, '$.property_type'),
+                       first_seen, removed_at
+                FROM listings WHERE last_changed >= ? OR removed_at >= ?
+            """, (since, since)).fetchall()
+        fields = ("city", "listing_key", "canton", "price", "size", "rooms", "property_type", "first_seen", "removed_at")
+        return [dict(zip(fields, row)) for row in rows]
+
+    def first_seen(self, city: str, keys: Iterable[str]) -> Dict[str, float]:
+        """When each of the given listings of a city was first crawled; keys the database never saw are left out."""
+        keys = list(keys)
+        found: Dict[str, float] = {}
+        with self._lock:
+            # Chunked to stay below SQLite's limit on bound parameters
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                found.update(self._conn.execute(
+                    f"SELECT listing_key, first_seen FROM listings WHERE city = ? AND listing_key IN ({', '.join('?' * len(chunk))})",
+                    (self.city_key(city), *chunk)))
+        return found
+
+    def city_listings(self, city: str) -> List[Dict]:
+        return self.search(city)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            active, removed = self._conn.execute(
+                "SELECT COUNT(*) - COUNT(removed_at), COUNT(removed_at) FROM listings").fetchone()
+            cities, pages = (self._conn.execute("SELECT COUNT(*) FROM cities").fetchone()[0],
+                             self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0])
+        return {"active_listings": active, "removed_listings": removed, "cities": cities, "pages": pages}
@@ -0,0 +1,137 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from .dedup import ListingDeduplicator
+from .listing_table import ListingTable
+
+# The fetched band extends the requested band by this factor on both sides
+WIDE_BAND_FACTOR = 2.0
+# Listings requested per result slot when fetching a wide band; cross-portal duplicates are merged, so
+# nearly every extracted listing is a distinct property
+WIDE_BAND_LISTINGS_PER_RESULT = 4
+
+
+def widen_price_band(min_price: float, max_price: float, factor: float = WIDE_BAND_FACTOR) -> Tuple[float, float]:
+    """
+    Widen a requested price band so later slider moves fall inside what was fetched.
+
+    :param min_price: Requested minimum price in CHF
+    :param max_price: Requested maximum price in CHF
+    :param factor: Widening factor applied to both ends of the band
+    :return: (min_price, max_price) of the band to fetch
+    """
+    return max(0.0, min_price / factor), max_price * factor
+
+
+class CityListings:
+    def __init__(self):
+        self.table = ListingTable()
+        self.deduplicator = ListingDeduplicator()
+        self.band: Optional[Tuple[float, float]] = None
+        self.max_results = 0
+        self.fetched_at = time.monotonic()
+
+
+class ListingStore:
+    """
+    In-memory store of the listings fetched for each city, together with the price band the fetch covered.
+
+    Refinements of price, canton and result count inside a covered band are answered locally. A city's
+    ListingTable is copy-on-write: add() changes a copy and swaps it in under the lock, so a table
+    returned by table() is never modified and can be read without the lock.
+    """
+
+    def __init__(self, max_cities: int = 32, ttl: float = 15 * 60):
+        self.max_cities = max_cities
+        self.ttl = ttl
+        self._cities: "OrderedDict[str, CityListings]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _city_key(city: str) -> str:
+        return city.strip().lower()
+
+    def _get_entry(self, city: str) -> Optional[CityListings]:
+        key = self._city_key(city)
+        entry = self._cities.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.fetched_at > self.ttl:
+            del self._cities[key]
+            return None
+        self._cities.move_to_end(key)
+        return entry
+
+    def add(self, city: str, listings: List[Dict]) -> List[Dict]:
+        """
+        Merge newly extracted listings into the city's listing set, collapsing cross-portal duplicates.
+
+        :return: The canonical record of every given listing, without duplicates, in input order
+        """
+        with self._lock:
+            key = self._city_key(city)
+            entry = self._get_entry(city)
+            if entry is None:
+                entry = self._cities[key] = CityListings()
+                while len(self._cities) > self.max_cities:
+                    self._cities.popitem(last=False)
+            new_indices = []
+            merged = set()
+            # Canonical indices in input order; a record merged again later in the batch is read at the end
+            canonical: Dict[int, None] = {}
+            for listing in listings:
+                index, is_new = entry.deduplicator.add(listing)
+                if is_new:
+                    new_indices.append(index)
+                elif index < len(entry.table):
+                    merged.add(index)
+                canonical.setdefault(index)
+            records = entry.deduplicator.records
+            if new_indices or merged:
+                table = entry.table.copy()
+                for index in merged:
+                    # A merge produces a new record; only the new table sees it
+                    table.replace(index, records[index])
+                table.extend(records[index] for index in new_indices)
+                entry.table = table
+            return [records[index] for index in canonical]
+
+    def mark_covered(self, city: str, min_price: float, max_price: float, max_results: int) -> None:
+        """Record that the city's listing set is complete for the given band and result count."""
+        with self._lock:
+            entry = self._get_entry(city)
+            if entry is None:
+                return
+            if entry.band and entry.band[0] <= max_price and min_price <= entry.band[1]:
+                # Overlapping fetches extend the covered band
+                min_price, max_price = min(min_price, entry.band[0]), max(max_price, entry.band[1])
+                max_results = min(max_results, entry.max_results)
+            entry.band = (min_price, max_price)
+            entry.max_results = max_results
+            entry.fetched_at = time.monotonic()
+
+    def covers(self, city: str, min_price: float, max_price: float, num_results: int) -> bool:
+        with self._lock:
+            entry = self._get_entry(city)
+            return bool(entry and entry.band and entry.band[0] <= min_price and max_price <= entry.band[1]
+                        and num_results <= entry.max_results)
+
+    def listings(self, city: str) -> List[Dict]:
+        with self._lock:
+            entry = self._get_entry(city)
+            return list(entry.table.records) if entry else []
+
+    def table(self, city: str) -> ListingTable:
+        """The city's listings as a columnar table (empty when nothing was fetched), a snapshot later adds do not change."""
+        with self._lock:
+            entry = self._get_entry(city)
+            return entry.table if entry else ListingTable()
+
+    def invalidate(self, city: Optional[str] = None) -> None:
+        with self._lock:
+            if city is None:
+                self._cities.clear()
+            else:
+                self._cities.pop(self._city_key(city), None)
@@ -0,0 +1,184 @@
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# A number with thousands separators (1'250'000, 1,250,000, 1 250 000) or a plain/decimal-comma number (3.5, 3,5)
+_NUMBER_PATTERN = re.compile(r"(?P<grouped>\d{1,3}(?:['’,\u00a0\u202f ]\d{3})+(?:\.\d+)?)|(?P<plain>\d+(?:[.,]\d+)?)")
+_SEPARATORS = str.maketrans("", "", "'’,\u00a0\u202f ")
+UNKNOWN_CANTON = -1
+
+
+def parse_number(value, default: float = float('nan')) -> float:
+    """
+    Parse the first number in a listing field such as "CHF 1'250'000.-", "120 m²" or "3.5 rooms".
+
+    :param value: Raw field value (string, number or None)
+    :param default: Value returned when no number can be found
+    :return: Parsed number as float
+    """
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _NUMBER_PATTERN.search(str(value))
+    if not match:
+        return default
+    if match.group('grouped'):
+        return float(match.group('grouped').translate(_SEPARATORS))
+    return float(match.group('plain').replace(',', '.'))
+
+
+def parse_price(value) -> float:
+    """Parse a listing price in CHF; unparseable prices ("Price on request") become infinity so they sort last."""
+    return parse_number(value, default=float('inf'))
+
+
+def numeric_fields(listing: Dict) -> Tuple[float, float, float]:
+    """Price, size and rooms of a listing; ingested PropertyRecords carry them already parsed."""
+    price = getattr(listing, 'price_chf', None)
+    if price is not None:
+        return price, listing.size_m2, listing.rooms_count
+    return parse_price(listing.get('price')), parse_number(listing.get('size')), parse_number(listing.get('rooms'))
+
+
+class ListingTable:
+    """
+    Columnar container for listings.
+
+    Price, size and rooms are parsed once at ingest into float64 arrays and cantons into integer codes,
+    so range filters, sorting and aggregates run as vectorized NumPy operations.
+    The original listing dicts are kept in `records`, aligned with the columns.
+    """
+
+    def __init__(self, listings: Iterable[Dict] = ()):
+        self.records: List[Dict] = []
+        self.price = np.empty(0, dtype=np.float64)
+        self.size = np.empty(0, dtype=np.float64)
+        self.rooms = np.empty(0, dtype=np.float64)
+        self.canton = np.empty(0, dtype=np.int16)
+        self._canton_codes: Dict[str, int] = {}
+        self._canton_labels: List[str] = []
+        self.extend(listings)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _canton_index(self, canton: Optional[str]) -> int:
+        if not canton:
+            return UNKNOWN_CANTON
+        key = canton.strip().upper()
+        index = self._canton_codes.get(key)
+        if index is None:
+            index = self._canton_codes[key] = len(self._canton_labels)
+            self._canton_labels.append(key)
+        return index
+
+    def extend(self, listings: Iterable[Dict]) -> None:
+        """Append listings, parsing their numeric fields once."""
+        new_records = list(listings)
+        if not new_records:
+            return
+        for record in new_records:
+            record.setdefault('image_url', None)
+            record.setdefault('listing_url', None)
+        self.records.extend(new_records)
+        numbers = np.array([numeric_fields(r) for r in new_records], dtype=np.float64).reshape(-1, 3)
+        self.price = np.concatenate([self.price, numbers[:, 0]])
+        self.size = np.concatenate([self.size, numbers[:, 1]])
+        self.rooms = np.concatenate([self.rooms, numbers[:, 2]])
+        self.canton = np.concatenate([self.canton, np.fromiter((self._canton_index(r.get('canton')) for r in new_records), np.int16, len(new_records))])
+
+    def copy(self) -> "ListingTable":
+        """A table with its own records list and columns; the listing dicts themselves are shared."""
+        table = ListingTable.__new__(ListingTable)
+        table.records = list(self.records)
+        table.price, table.size, table.rooms, table.canton = self.price.copy(), self.size.copy(), self.rooms.copy(), self.canton.copy()
+        table._canton_codes = dict(self._canton_codes)
+        table._canton_labels = list(self._canton_labels)
+        return table
+
+    def replace(self, index: int, record: Dict) -> None:
+        """Put a new record (e.g. a merged duplicate) in place of one listing and parse its numeric fields."""
+        self.records[index] = record
+        self.price[index], self.size[index], self.rooms[index] = numeric_fields(record)
+        self.canton[index] = self._canton_index(record.get('canton'))
+
+    def mask(self, min_price: Optional[float] = None, max_price: Optional[float] = None, canton_code: Optional[str] = None,
+             min_size: Optional[float] = None, max_size: Optional[float] = None,
+             min_rooms: Optional[float] = None, max_rooms: Optional[float] = None) -> np.ndarray:
+        """Boolean mask of the listings matching every given bound (None bounds are ignored)."""
+        mask = np.ones(len(self.records), dtype=bool)
+        for column, low, high in ((self.price, min_price, max_price), (self.size, min_size, max_size), (self.rooms, min_rooms, max_rooms)):
+            if low is not None:
+                mask &= column >= low
+            if high is not None:
+                mask &= column <= high
+        if canton_code:
+            code = self._canton_codes.get(canton_code.strip().upper())
+            if code is None:
+                return np.zeros(len(self.records), dtype=bool)
+            mask &= self.canton == code
+        return mask
+
+    def take(self, indices: Iterable[int]) -> List[Dict]:
+        return [self.records[i] for i in indices]
+
+    def filter(self, min_price: Optional[float] = None, max_price: Optional[float] = None, canton_code: Optional[str] = None,
+               limit: Optional[int] = None, **bounds) -> List[Dict]:
+        """Listings matching the bounds, in ingest order, capped at `limit`."""
+        indices = np.flatnonzero(self.mask(min_price, max_price, canton_code, **bounds))
+        return self.take(indices[:limit] if limit is not None else indices)
+
+    def sorted_indices(self, by: str = 'price', descending: bool = False, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Stable argsort of the (optionally masked) listings on a numeric column; NaNs sort last."""
+        column = self.price_per_sqm() if by == 'price_per_sqm' else getattr(self, by)
+        indices = np.flatnonzero(mask) if mask is not None else np.arange(len(self.records))
+        order = np.argsort(-column[indices] if descending else column[indices], kind='stable')
+        return indices[order]
+
+    def sort(self, by: str = 'price', descending: bool = False, limit: Optional[int] = None, **filters) -> List[Dict]:
+        mask = self.mask(**filters) if filters else None
+        indices = self.sorted_indices(by, descending, mask)
+        return self.take(indices[:limit] if limit is not None else indices)
+
+    def price_per_sqm(self) -> np.ndarray:
+        """CHF per m² for every listing; NaN where price or size is unknown."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values = self.price / self.size
+        values[~np.isfinite(values) | (self.size <= 0)] = np.nan
+        return values
+
+    def canton_labels(self) -> List[str]:
+        return list(self._canton_labels)
+
+    def group_by_canton(self, values: np.ndarray) -> Dict[str, np.ndarray]:
+        """Split a column into per-canton arrays of its finite values."""
+        valid = np.isfinite(values) & (self.canton != UNKNOWN_CANTON)
+        codes = self.canton[valid]
+        order = np.argsort(codes, kind='stable')
+        sorted_codes = codes[order]
+        sorted_values = values[valid][order]
+        boundaries = np.flatnonzero(np.diff(sorted_codes)) + 1
+        groups = {}
+        for group_codes, group_values in zip(np.split(sorted_codes, boundaries), np.split(sorted_values, boundaries)):
+            if len(group_codes):
+                groups[self._canton_labels[group_codes[0]]] = group_values
+        return groups
+
+    def median_price_per_sqm_by_canton(self) -> Dict[str, float]:
+        return {canton: float(np.median(values)) for canton, values in self.group_by_canton(self.price_per_sqm()).items()}
+
+    def canton_summary(self) -> Dict[str, Dict[str, float]]:
+        """Listing count, median price and median CHF/m² per canton."""
+        counts = np.bincount(self.canton[self.canton != UNKNOWN_CANTON], minlength=len(self._canton_labels))
+        median_prices = {canton: float(np.median(values)) for canton, values in self.group_by_canton(self.price).items()}
+        median_ppsqm = self.median_price_per_sqm_by_canton()
+        return {
+            canton: {
+                "count": int(counts[code]),
+                "median_price": median_prices.get(canton, float('nan')),
+                "median_price_per_sqm": median_ppsqm.get(canton, float('nan')),
+            }
+            for code, canton in enumerate(self._canton_labels)
+        }
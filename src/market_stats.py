@@ -0,0 +1,308 @@
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .listing_db import ListingDatabase, listing_key
+from .listing_table import numeric_fields, parse_number, parse_price
+
+# Inventory flow and price trends compare the last window with the one before it
+TREND_WINDOW = 30 * 24 * 60 * 60
+PERCENTILES = (10, 25, 50, 75, 90)
+# Groups with fewer priced listings are not reported; callers fall back to the portals' market-analysis pages
+MIN_LISTINGS = 5
+# Each side of a trend comparison needs at least this many listings with a price per m²
+MIN_TREND_LISTINGS = 5
+# The database is polled for changed rows at most this often on reads
+SYNC_INTERVAL = 60.0
+# Window-based figures age with the clock, so every group is recomputed at least this often
+RECOMPUTE_INTERVAL = 60 * 60
+UNKNOWN = -1
+
+
+def grouped_percentiles(codes: np.ndarray, values: np.ndarray, percentiles: Sequence[float] = PERCENTILES
+                        ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Percentiles of `values` for every group code at once, interpolated like np.percentile; NaNs are ignored.
+
+    :return: (group codes, value counts per group, matrix of shape (groups, len(percentiles)))
+    """
+    valid = np.isfinite(values) & (codes != UNKNOWN)
+    codes, values = codes[valid], values[valid]
+    order = np.lexsort((values, codes))
+    codes, values = codes[order], values[order]
+    groups, starts, counts = np.unique(codes, return_index=True, return_counts=True)
+    positions = (counts[:, None] - 1) * (np.asarray(percentiles, dtype=np.float64) / 100.0)[None, :]
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.minimum(lower + 1, counts[:, None] - 1)
+    low_values, high_values = values[starts[:, None] + lower], values[starts[:, None] + upper]
+    return groups, counts, low_values + (high_values - low_values) * (positions - lower)
+
+
+def grouped_median(codes: np.ndarray, values: np.ndarray) -> Dict[int, Tuple[float, int]]:
+    """Median and count of the finite values per group code."""
+    groups, counts, medians = grouped_percentiles(codes, values, (50,))
+    return {int(group): (float(median), int(count)) for group, count, median in zip(groups, counts, medians[:, 0])}
+
+
+def _same(a, b) -> bool:
+    return a == b or (a != a and b != b)
+
+
+class _Labels:
+    """Interns string labels as small integer codes for the group-by columns."""
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.labels: List[str] = []
+
+    def code(self, label: Optional[str]) -> int:
+        if not label:
+            return UNKNOWN
+        code = self.codes.get(label)
+        if code is None:
+            code = self.codes[label] = len(self.labels)
+            self.labels.append(label)
+        return code
+
+
+class MarketStatistics:
+    """
+    Per-city and per-canton market figures computed from collected listings.
+
+    Listings come from the crawler's ListingDatabase (polled incrementally for rows changed since the
+    last sync) and from live searches (`observe`). Each listing is one row of columnar arrays; a change
+    only marks its city and canton dirty, and dirty groups are recomputed together with vectorized
+    group-by percentiles, so reads return precomputed results without any remote call.
+    """
+
+    def __init__(self, database: Optional[ListingDatabase] = None, window: float = TREND_WINDOW,
+                 sync_interval: float = SYNC_INTERVAL):
+        self.database = database
+        self.window = window
+        self.sync_interval = sync_interval
+        self._rows: Dict[Tuple[str, str], int] = {}
+        self._cities, self._cantons, self._types = _Labels(), _Labels(), _Labels()
+        self._columns: Dict[str, List] = {name: [] for name in
+                                          ("city", "canton", "type", "price", "size", "rooms", "first_seen", "removed_at")}
+        self._dirty = {"city": set(), "canton": set()}
+        self._results: Dict[str, Dict[int, Dict]] = {"city": {}, "canton": {}}
+        self._synced_at: Optional[float] = None
+        self._last_sync = 0.0
+        self._computed_at = 0.0
+        # Bumped whenever a listing row changes, so derived views (e.g. the heatmap) know to rebuild
+        self.version = 0
+        self._lock = threading.Lock()
+
+    def _upsert(self, city_key: str, key: str, canton: Optional[str], property_type: Optional[str], price: float,
+                size: float, rooms: float, first_seen: float, removed_at: Optional[float]) -> None:
+        city = self._cities.code(city_key)
+        values = {
+            "city": city, "canton": self._cantons.code((canton or "").strip().upper() or None),
+            "type": self._types.code((property_type or "").strip().lower() or None),
+            "price": price, "size": size, "rooms": rooms, "first_seen": first_seen,
+            "removed_at": float("nan") if removed_at is None else removed_at,
+        }
+        index = self._rows.get((city_key, key))
+        if index is None:
+            self._rows[(city_key, key)] = len(self._columns["city"])
+            for name, value in values.items():
+                self._columns[name].append(value)
+        else:
+            if all(_same(self._columns[name][index], value) for name, value in values.items()):
+                return
+            # The canton it moved away from changes too
+            self._mark_dirty(self._columns["city"][index], self._columns["canton"][index])
+            for name, value in values.items():
+                self._columns[name][index] = value
+        self._mark_dirty(city, values["canton"])
+        self.version += 1
+
+    def _mark_dirty(self, city: int, canton: int) -> None:
+        self._dirty["city"].add(city)
+        if canton != UNKNOWN:
+            self._dirty["canton"].add(canton)
+
+    def observe(self, city: str, listings: Iterable[Dict]) -> None:
+        """
+        Add listings returned by a live search; listings the crawler already stored keep its history.
+
+        A listing not loaded yet takes its first-seen time from the database when the crawler knows it, so
+        long-standing inventory is never counted as new; only listings nobody saw before get the current time.
+        """
+        city_key = ListingDatabase.city_key(city)
+        now = time.time()
+        listings = [(listing_key(listing), listing) for listing in listings]
+        with self._lock:
+            unseen = {key for key, _ in listings if (city_key, key) not in self._rows}
+        known: Dict[str, float] = {}
+        if unseen and self.database is not None:
+            try:
+                known = self.database.first_seen(city_key, unseen)
+            except Exception as e:
+                logging.warning(f"Market statistics could not read first-seen dates: {str(e)}")
+        with self._lock:
+            for key, listing in listings:
+                index = self._rows.get((city_key, key))
+                self._upsert(city_key, key, listing.get("canton"), listing.get("property_type"),
+                             *numeric_fields(listing),
+                             self._columns["first_seen"][index] if index is not None else known.get(key, now), None)
+
+    def sync(self) -> int:
+        """Load the database rows added, changed or removed since the previous sync. Returns the number of rows read."""
+        if self.database is None:
+            return 0
+        started = time.time()
+        since = self._synced_at if self._synced_at is not None else float("-inf")
+        rows = self.database.changed_since(since)
+        with self._lock:
+            for row in rows:
+                self._upsert(row["city"], row["listing_key"], row["canton"], row["property_type"], parse_price(row["price"]),
+                             parse_number(row["size"]), parse_number(row["rooms"]), row["first_seen"], row["removed_at"])
+            self._synced_at = started
+            self._last_sync = time.monotonic()
+        return len(rows)
+
+    def refresh(self, now: Optional[float] = None) -> None:
+        """Sync with the database and recompute every dirty group (every group once RECOMPUTE_INTERVAL has passed)."""
+        try:
+            self.sync()
+        except Exception as e:
+            self._last_sync = time.monotonic()
+            logging.warning(f"Market statistics sync failed: {str(e)}")
+        with self._lock:
+            if time.monotonic() - self._computed_at >= RECOMPUTE_INTERVAL:
+                self._dirty["city"].update(range(len(self._cities.labels)))
+                self._dirty["canton"].update(range(len(self._cantons.labels)))
+                self._computed_at = time.monotonic()
+            for dimension in ("city", "canton"):
+                if self._dirty[dimension]:
+                    self._results[dimension].update(self._compute(dimension, self._dirty[dimension], now or time.time()))
+                    self._dirty[dimension] = set()
+
+    def _compute(self, dimension: str, groups: Iterable[int], now: float) -> Dict[int, Dict]:
+        groups = set(groups)
+        codes = np.asarray(self._columns[dimension], dtype=np.int64)
+        # Rows outside the dirty groups are masked out of every group-by below
+        codes = np.where(np.isin(codes, np.fromiter(groups, np.int64, len(groups))), codes, UNKNOWN)
+        price = np.asarray(self._columns["price"], dtype=np.float64)
+        size = np.asarray(self._columns["size"], dtype=np.float64)
+        rooms = np.asarray(self._columns["rooms"], dtype=np.float64)
+        first_seen = np.asarray(self._columns["first_seen"], dtype=np.float64)
+        removed_at = np.asarray(self._columns["removed_at"], dtype=np.float64)
+        types = np.asarray(self._columns["type"], dtype=np.int64)
+        price[~np.isfinite(price)] = np.nan
+        with np.errstate(divide="ignore", invalid="ignore"):
+            price_per_sqm = price / size
+        price_per_sqm[~np.isfinite(price_per_sqm) | (size <= 0)] = np.nan
+
+        active = np.isnan(removed_at)
+        active_codes = np.where(active, codes, UNKNOWN)
+        current = first_seen >= now - self.window
+        previous = (first_seen >= now - 2 * self.window) & ~current
+        removed_recently = removed_at >= now - self.window
+
+        results: Dict[int, Dict] = {}
+        ppsqm_groups, counts, percentiles = grouped_percentiles(active_codes, price_per_sqm)
+        for group, count, values in zip(ppsqm_groups, counts, percentiles):
+            results[int(group)] = {
+                "price_per_sqm_count": int(count),
+                "price_per_sqm": {f"p{p}": float(v) for p, v in zip(PERCENTILES, values)},
+            }
+        medians = {name: grouped_median(active_codes, column) for name, column in (("price", price), ("size", size), ("rooms", rooms))}
+        trend = {name: grouped_median(np.where(mask, codes, UNKNOWN), price_per_sqm)
+                 for name, mask in (("current", current), ("previous", previous))}
+        days_on_market = grouped_median(np.where(removed_recently, codes, UNKNOWN), (removed_at - first_seen) / 86400)
+        valid = codes != UNKNOWN
+        active_counts = np.bincount(codes[valid & active], minlength=len(self._labels(dimension)))
+        new_counts = np.bincount(codes[valid & current], minlength=len(self._labels(dimension)))
+        removed_counts = np.bincount(codes[valid & removed_recently], minlength=len(self._labels(dimension)))
+        type_counts = self._type_counts(active_codes, types)
+
+        for group in np.unique(codes[valid]):
+            group = int(group)
+            stats = results.setdefault(group, {"price_per_sqm_count": 0, "price_per_sqm": {}})
+            current_ppsqm, current_count = trend["current"].get(group, (float("nan"), 0))
+            previous_ppsqm, previous_count = trend["previous"].get(group, (float("nan"), 0))
+            stats.update({
+                "active_listings": int(active_counts[group]),
+                "priced_listings": medians["price"].get(group, (None, 0))[1],
+                "median_price": medians["price"].get(group, (None, 0))[0],
+                "median_size": medians["size"].get(group, (None, 0))[0],
+                "median_rooms": medians["rooms"].get(group, (None, 0))[0],
+                "new_listings": int(new_counts[group]),
+                "removed_listings": int(removed_counts[group]),
+                "median_days_on_market": days_on_market.get(group, (None, 0))[0],
+                "price_per_sqm_change": (current_ppsqm / previous_ppsqm - 1) * 100
+                if current_count >= MIN_TREND_LISTINGS and previous_count >= MIN_TREND_LISTINGS else None,
+                "property_types": type_counts.get(group, {}),
+                "computed_at": now,
+            })
+        # Groups whose last row moved away report nothing
+        for group in groups:
+            results.setdefault(group, {})
+        return results
+
+    def _labels(self, dimension: str) -> List[str]:
+        return (self._cities if dimension == "city" else self._cantons).labels
+
+    def _type_counts(self, codes: np.ndarray, types: np.ndarray) -> Dict[int, Dict[str, int]]:
+        valid = (codes != UNKNOWN) & (types != UNKNOWN)
+        if not valid.any():
+            return {}
+        # One bincount over (group, type) pairs
+        width = len(self._types.labels)
+        pairs = np.bincount(codes[valid] * width + types[valid])
+        counts: Dict[int, Dict[str, int]] = {}
+        for pair in np.flatnonzero(pairs):
+            group, property_type = divmod(int(pair), width)
+            counts.setdefault(group, {})[self._types.labels[property_type]] = int(pairs[pair])
+        return {group: dict(sorted(mix.items(), key=lambda item: -item[1])) for group, mix in counts.items()}
+
+    def refresh_if_stale(self) -> None:
+        """Refresh when the database is due for a poll or listings changed since the last computation."""
+        if time.monotonic() - self._last_sync >= self.sync_interval or self._dirty["city"] or self._dirty["canton"]:
+            self.refresh()
+
+    def snapshot(self) -> Dict:
+        """
+        Columns of the active listings for derived aggregates: city and canton codes with their labels,
+        price per m² (NaN when unknown) and the data version they reflect.
+        """
+        with self._lock:
+            removed_at = np.asarray(self._columns["removed_at"], dtype=np.float64)
+            active = np.isnan(removed_at)
+            price = np.asarray(self._columns["price"], dtype=np.float64)[active]
+            size = np.asarray(self._columns["size"], dtype=np.float64)[active]
+            snapshot = {
+                "version": self.version,
+                "city": np.asarray(self._columns["city"], dtype=np.int64)[active],
+                "canton": np.asarray(self._columns["canton"], dtype=np.int64)[active],
+                "city_labels": list(self._cities.labels),
+                "canton_labels": list(self._cantons.labels),
+            }
+        with np.errstate(divide="ignore", invalid="ignore"):
+            price_per_sqm = price / size
+        price_per_sqm[~np.isfinite(price_per_sqm) | (size <= 0)] = np.nan
+        snapshot["price_per_sqm"] = price_per_sqm
+        return snapshot
+
+    def _get(self, dimension: str, label: str) -> Optional[Dict]:
+        if time.monotonic() - self._last_sync >= self.sync_interval or self._dirty[dimension]:
+            self.refresh()
+        labels = self._cities if dimension == "city" else self._cantons
+        code = labels.codes.get(label)
+        stats = self._results[dimension].get(code) if code is not None else None
+        if not stats or stats.get("priced_listings", 0) < MIN_LISTINGS:
+            return None
+        return stats
+
+    def city(self, city: str) -> Optional[Dict]:
+        """Precomputed figures for a city, or None when too few listings were collected."""
+        return self._get("city", ListingDatabase.city_key(city))
+
+    def canton(self, canton_code: str) -> Optional[Dict]:
+        """Precomputed figures for a canton (by code), or None when too few listings were collected."""
+        return self._get("canton", canton_code.strip().upper())
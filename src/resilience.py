@@ -0,0 +1,311 @@
+import logging
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .tracing import annotate
+
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+_STATUS_IN_MESSAGE = re.compile(r"[Ss]tatus code:? (\d{3})")
+# Prefixes of the Firecrawl SDK's error messages for the statuses it names instead of numbering
+_NAMED_STATUSES = {"Payment Required:": 402, "Request Timeout:": 408, "Conflict:": 409, "Internal Server Error:": 500}
+# requests/urllib3 timeouts and dropped connections, once the SDK has flattened them into a message
+_TRANSPORT_ERROR_IN_MESSAGE = re.compile(r"timed out|timeout|Max retries exceeded|Failed to establish a new connection|"
+                                         r"Connection (?:aborted|refused|reset)|RemoteDisconnected", re.IGNORECASE)
+# Extract jobs the SDK polled until they failed or were cancelled upstream
+_FAILED_JOB_IN_MESSAGE = re.compile(r"Extract job (?:failed|cancelled)|Failed to extract")
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the upstream while its circuit breaker is open."""
+
+
+class RateLimitTimeout(Exception):
+    """Raised when no rate-limit token became available before the caller's deadline."""
+
+
+def _unwrap(error: BaseException) -> Tuple[str, Optional[int]]:
+    """
+    Message and status of an error. The Firecrawl SDK re-raises everything, HTTP errors and requests
+    timeouts alike, as ValueError(message, 500), so its status is only a fallback for the message.
+    """
+    args = error.args
+    if isinstance(error, ValueError) and len(args) == 2 and isinstance(args[0], str) and isinstance(args[1], int):
+        return args[0], args[1]
+    return str(error), None
+
+
+def _is_transport_error(error: BaseException, message: str) -> bool:
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    # Matched by name so this module does not import requests, httpx or openai
+    if type(error).__name__ in ("ConnectionError", "Timeout", "ReadTimeout", "ConnectTimeout", "APIConnectionError",
+                                "APITimeoutError", "ConnectError"):
+        return True
+    return bool(_TRANSPORT_ERROR_IN_MESSAGE.search(message))
+
+
+def status_code_of(error: BaseException) -> Optional[int]:
+    """HTTP status behind an exception from requests, httpx, openai or the Firecrawl SDK (which embeds it in the message)."""
+    for candidate in (getattr(error, "status_code", None), getattr(getattr(error, "response", None), "status_code", None)):
+        if isinstance(candidate, int):
+            return candidate
+    message, wrapped_status = _unwrap(error)
+    match = _STATUS_IN_MESSAGE.search(message)
+    if match:
+        return int(match.group(1))
+    for prefix, status in _NAMED_STATUSES.items():
+        if prefix in message:
+            return status
+    # A flattened timeout has no status of its own; the wrapper's 500 would only hide that
+    return None if _is_transport_error(error, message) else wrapped_status
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Throttling, server errors, timeouts, dropped connections and failed extract jobs are worth retrying; anything else is not."""
+    status = status_code_of(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    message = _unwrap(error)[0]
+    return _is_transport_error(error, message) or bool(_FAILED_JOB_IN_MESSAGE.search(message))
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket with additive-increase/multiplicative-decrease of its rate.
+
+    Each throttling response halves the rate (down to `min_rate`); each success recovers a little of it
+    (up to `max_rate`), so the client settles just below what the upstream accepts.
+    """
+
+    def __init__(self, rate: float, burst: int, min_rate: Optional[float] = None):
+        self.max_rate = rate
+        self.min_rate = min_rate if min_rate is not None else rate / 16
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Take one token, waiting up to `timeout` seconds (forever when None). Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def throttled(self) -> None:
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def succeeded(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+class CircuitBreaker:
+    """
+    Closed → open after `failure_threshold` consecutive failures; open → half-open after `recovery_timeout`
+    seconds, when a single probe call is let through; the probe's outcome closes or re-opens the circuit.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        """Whether a call would currently be allowed, without claiming the half-open probe."""
+        with self._lock:
+            return self.state != self.OPEN or time.monotonic() - self.opened_at >= self.recovery_timeout
+
+    def allow(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.OPEN and now - self.opened_at >= self.recovery_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_started = None
+            if self.state == self.CLOSED:
+                return True
+            # A probe that never reported back (e.g. its caller gave up) is replaced after another recovery period
+            if self.state == self.HALF_OPEN and (self._probe_started is None or now - self._probe_started >= self.recovery_timeout):
+                self._probe_started = now
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_started = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+            self._probe_started = None
+
+    def release(self) -> None:
+        """End a call that says nothing about the upstream's health, freeing the half-open probe slot."""
+        with self._lock:
+            self._probe_started = None
+
+
+class Upstream:
+    """
+    Resilience policy for one remote dependency: a shared token bucket, retries with full-jitter
+    exponential backoff on retryable errors, and one circuit breaker per key (e.g. per portal host).
+
+    A call never sleeps past the caller's deadline: it fails fast with the last error instead, so the
+    caller can return a partial result. Each call, however many attempts it makes, reports one outcome
+    to its breakers: a success, one failure, or nothing for errors that say nothing about the upstream.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int, max_attempts: int = 3, base_delay: float = 0.5,
+                 max_delay: float = 10.0, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, key: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = self._breakers[key] = CircuitBreaker(self.failure_threshold, self.recovery_timeout)
+            return breaker
+
+    def available(self, key: str) -> bool:
+        return self.breaker(key).available()
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given (0-based) attempt."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def call(self, func: Callable[[], Any], keys: Iterable[str] = ("default",), deadline: Optional[float] = None) -> Any:
+        """
+        Call `func` under the rate limit, retry policy and the circuit breakers of `keys`.
+
+        :param keys: Breaker keys the call depends on; it is rejected while any of them is open
+        :param deadline: time.monotonic() value after which no further attempt or backoff is started. A call
+            still running at the deadline has been given up by its caller and counts as one failure, even if
+            it succeeds afterwards
+        """
+        breakers = [self.breaker(key) for key in keys]
+        # Check every breaker before claiming any half-open probe; the claim lasts for all of the call's attempts
+        if not all(breaker.available() for breaker in breakers) or not all([breaker.allow() for breaker in breakers]):
+            annotate(circuit="open")
+            raise CircuitOpenError(f"{self.name} circuit open for {', '.join(keys)}")
+        for attempt in range(self.max_attempts):
+            if attempt and not all(breaker.available() for breaker in breakers):
+                # Another call opened a breaker while this one was backing off
+                self._settle(breakers, failed=True)
+                annotate(circuit="open")
+                raise CircuitOpenError(f"{self.name} circuit open for {', '.join(keys)}")
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if (remaining is not None and remaining <= 0) or not self.bucket.acquire(remaining):
+                # Attempts that already failed count; without one, the call says nothing about the upstream
+                self._settle(breakers, failed=attempt > 0)
+                raise RateLimitTimeout(f"{self.name} rate limit: no request slot before the deadline")
+            try:
+                result = func()
+            except Exception as e:
+                retryable = is_retryable(e)
+                if status_code_of(e) == 429:
+                    self.bucket.throttled()
+                annotate(attempts=attempt + 1)
+                delay = (retry_after(e) or self.backoff(attempt)) if retryable else 0.0
+                if (not retryable or attempt == self.max_attempts - 1
+                        or (deadline is not None and time.monotonic() + delay >= deadline)):
+                    # Client errors (bad key, invalid schema) say nothing about the upstream's health and do not count
+                    self._settle(breakers, failed=retryable or (deadline is not None and time.monotonic() > deadline))
+                    raise
+                logging.warning(f"{self.name} call failed ({str(e)[:200]}); retrying in {delay:.1f}s "
+                                f"(attempt {attempt + 2}/{self.max_attempts})")
+                time.sleep(delay)
+                continue
+            if deadline is not None and time.monotonic() > deadline:
+                # The caller stopped waiting, so a late result must not reset the failures it saw
+                self._settle(breakers, failed=True)
+                return result
+            for breaker in breakers:
+                breaker.record_success()
+            self.bucket.succeeded()
+            if attempt:
+                annotate(attempts=attempt + 1)
+            return result
+
+    @staticmethod
+    def _settle(breakers: List[CircuitBreaker], failed: bool) -> None:
+        for breaker in breakers:
+            if failed:
+                breaker.record_failure()
+            else:
+                breaker.release()
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+_upstreams: Dict[str, Upstream] = {}
+_upstreams_lock = threading.Lock()
+
+
+def get_upstream(name: str) -> Upstream:
+    """
+    Process-wide resilience policy for 'firecrawl', 'openai' or 'images'.
+
+    Rates (requests per second) are configurable with FIRECRAWL_RATE_LIMIT, OPENAI_RATE_LIMIT and
+    IMAGES_RATE_LIMIT; retries with RETRY_MAX_ATTEMPTS.
+    """
+    with _upstreams_lock:
+        upstream = _upstreams.get(name)
+        if upstream is None:
+            defaults = {"firecrawl": (5.0, 10), "openai": (3.0, 5), "images": (20.0, 40)}
+            rate, burst = defaults.get(name, (5.0, 10))
+            rate = _env_float(f"{name.upper()}_RATE_LIMIT", rate)
+            upstream = _upstreams[name] = Upstream(
+                name, rate=rate, burst=max(burst, int(rate)),
+                max_attempts=int(os.getenv("RETRY_MAX_ATTEMPTS", "3")),
+            )
+        return upstream
@@ -0,0 +1,329 @@
+"""
+Saved searches with new-listing alerts.
+
+A scheduler re-runs the saved searches in the background and queues a notification in a local outbox
+for every listing a search has not returned before. Searches for the same city share one extraction.
+Run from the repository root:
+    python -m src.saved_searches add --city Zurich --canton ZH --min-price 800000 --max-price 1500000
+    python -m src.saved_searches run --interval 1800
+    python -m src.saved_searches outbox --mark-delivered
+"""
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from .cantons import get_canton_code
+from .listing_db import ListingDatabase, listing_key
+from .listing_table import ListingTable
+from .tracing import annotate, propagate, tracer
+
+DEFAULT_DB_PATH = os.path.join(".cache", "saved_searches.sqlite3")
+# Scheduled runs fetch from the portals (find_properties(fresh=True)), so alerts lag by at most one interval
+DEFAULT_SEARCH_INTERVAL = 30 * 60
+DEFAULT_SCHEDULER_WORKERS = 4
+DEFAULT_RESULTS_PER_SEARCH = 20
+# Upper bound on the listings requested for one city, however many searches share it
+MAX_RESULTS_PER_CITY = 200
+
+
+class SavedSearch:
+    __slots__ = ("search_id", "name", "city", "canton", "min_price", "max_price", "num_results", "last_run")
+
+    def __init__(self, search_id: int, name: Optional[str], city: str, canton: Optional[str], min_price: float,
+                 max_price: float, num_results: int = DEFAULT_RESULTS_PER_SEARCH, last_run: Optional[float] = None):
+        self.search_id = search_id
+        self.name = name
+        self.city = city
+        self.canton = canton
+        self.min_price = min_price
+        self.max_price = max_price
+        self.num_results = num_results
+        self.last_run = last_run
+
+    @property
+    def label(self) -> str:
+        return self.name or f"{self.city}{f' ({self.canton})' if self.canton else ''}, CHF {self.min_price:,.0f}–{self.max_price:,.0f}"
+
+    def to_dict(self) -> Dict:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+
+class SavedSearchStore:
+    """
+    SQLite store of saved searches, the listings each one has already returned, and the notification outbox.
+
+    The first run of a search only records what it finds; later runs queue the listings it has not seen.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("SAVED_SEARCHES_PATH", DEFAULT_DB_PATH)
+        self._lock = threading.Lock()
+        if self.path != ":memory:" and os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS saved_searches (
+                    search_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT,
+                    city TEXT NOT NULL,
+                    canton TEXT,
+                    min_price REAL NOT NULL,
+                    max_price REAL NOT NULL,
+                    num_results INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_run REAL
+                );
+                CREATE TABLE IF NOT EXISTS seen_listings (
+                    search_id INTEGER NOT NULL,
+                    listing_key TEXT NOT NULL,
+                    first_seen REAL NOT NULL,
+                    PRIMARY KEY (search_id, listing_key)
+                );
+                CREATE TABLE IF NOT EXISTS outbox (
+                    notification_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    search_id INTEGER NOT NULL,
+                    listing_key TEXT NOT NULL,
+                    listing TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    delivered_at REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_outbox_pending ON outbox (created_at) WHERE delivered_at IS NULL;
+            """)
+
+    _FIELDS = "search_id, name, city, canton, min_price, max_price, num_results, last_run"
+
+    def add(self, city: str, min_price: float, max_price: float, canton: Optional[str] = None, name: Optional[str] = None,
+            num_results: int = DEFAULT_RESULTS_PER_SEARCH) -> SavedSearch:
+        if min_price >= max_price:
+            raise ValueError("Minimum price must be less than maximum price")
+        canton_code = get_canton_code(canton) if canton else None
+        if canton and canton_code is None:
+            raise ValueError(f"Unknown canton: {canton}")
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO saved_searches (name, city, canton, min_price, max_price, num_results, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (name, city.strip(), canton_code, float(min_price), float(max_price), int(num_results), time.time()))
+        return SavedSearch(cursor.lastrowid, name, city.strip(), canton_code, float(min_price), float(max_price), int(num_results))
+
+    def remove(self, search_id: int) -> bool:
+        with self._lock, self._conn:
+            removed = self._conn.execute("DELETE FROM saved_searches WHERE search_id = ?", (search_id,)).rowcount
+            self._conn.execute("DELETE FROM seen_listings WHERE search_id = ?", (search_id,))
+            self._conn.execute("DELETE FROM outbox WHERE search_id = ? AND delivered_at IS NULL", (search_id,))
+        return bool(removed)
+
+    def searches(self) -> List[SavedSearch]:
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {self._FIELDS} FROM saved_searches ORDER BY search_id").fetchall()
+        return [SavedSearch(*row) for row in rows]
+
+    def due(self, interval: float, now: Optional[float] = None) -> List[SavedSearch]:
+        """Searches never run, or last run at least `interval` seconds ago."""
+        cutoff = (now or time.time()) - interval
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {self._FIELDS} FROM saved_searches WHERE last_run IS NULL OR last_run <= ? "
+                                      "ORDER BY search_id", (cutoff,)).fetchall()
+        return [SavedSearch(*row) for row in rows]
+
+    def record_run(self, search: SavedSearch, listings: List[Dict], now: Optional[float] = None) -> List[Dict]:
+        """
+        Store a run's listings and queue the ones this search has not returned before.
+
+        :return: The listings that were queued (none on a search's first run, which sets the baseline)
+        """
+        now = now or time.time()
+        keys = {listing_key(listing): listing for listing in listings}
+        with self._lock, self._conn:
+            seen = set()
+            key_list = list(keys)
+            # Chunked to stay below SQLite's host parameter limit
+            for start in range(0, len(key_list), 500):
+                chunk = key_list[start:start + 500]
+                seen.update(row[0] for row in self._conn.execute(
+                    f"SELECT listing_key FROM seen_listings WHERE search_id = ? AND listing_key IN ({', '.join('?' * len(chunk))})",
+                    (search.search_id, *chunk)))
+            new = {key: listing for key, listing in keys.items() if key not in seen}
+            self._conn.executemany("INSERT INTO seen_listings (search_id, listing_key, first_seen) VALUES (?, ?, ?)",
+                                   [(search.search_id, key, now) for key in new])
+            notify = search.last_run is not None
+            if notify:
+                self._conn.executemany(
+                    "INSERT INTO outbox (search_id, listing_key, listing, created_at) VALUES (?, ?, ?, ?)",
+                    [(search.search_id, key, json.dumps(listing, ensure_ascii=False, default=dict), now)
+                     for key, listing in new.items()])
+            self._conn.execute("UPDATE saved_searches SET last_run = ? WHERE search_id = ?", (now, search.search_id))
+        search.last_run = now
+        return list(new.values()) if notify else []
+
+    def pending(self, limit: Optional[int] = None) -> List[Dict]:
+        """Undelivered notifications, oldest first, with the saved search they belong to."""
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT o.notification_id, o.search_id, s.name, s.city, s.canton, s.min_price, s.max_price, o.listing, o.created_at
+                FROM outbox o JOIN saved_searches s ON s.search_id = o.search_id
+                WHERE o.delivered_at IS NULL ORDER BY o.created_at, o.notification_id LIMIT ?
+            """, (-1 if limit is None else limit,)).fetchall()
+        return [{"notification_id": row[0], "search": SavedSearch(row[1], *row[2:7]).label, "search_id": row[1],
+                 "listing": json.loads(row[7]), "created_at": row[8]} for row in rows]
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox WHERE delivered_at IS NULL").fetchone()[0]
+
+    def mark_delivered(self, notification_ids: List[int]) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany("UPDATE outbox SET delivered_at = ? WHERE notification_id = ?",
+                                   [(now, notification_id) for notification_id in notification_ids])
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class SavedSearchScheduler:
+    """
+    Re-runs due saved searches in batches, off the interactive path.
+
+    Due searches are grouped by city: each city gets one find_properties call over the union of their
+    price bands (any canton), and every search is then answered by filtering that result locally. That call
+    bypasses the listing store, listing database and extraction cache, whose stale-while-revalidate answers
+    would otherwise hold back new listings until a background refresh (which a one-shot run never waits for).
+    """
+
+    def __init__(self, agent, store: Optional[SavedSearchStore] = None, interval: float = DEFAULT_SEARCH_INTERVAL,
+                 max_workers: int = DEFAULT_SCHEDULER_WORKERS):
+        self.agent = agent
+        self.store = store or SavedSearchStore()
+        self.interval = interval
+        self.max_workers = max_workers
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_city(self, city: str, searches: List[SavedSearch]) -> Optional[Dict[int, int]]:
+        """
+        Run one city's searches from a single extraction.
+
+        :return: Number of new listings queued per search id, or None when the extraction failed
+        """
+        with tracer.span("saved_searches.city", city=city, searches=len(searches)):
+            num_results = min(MAX_RESULTS_PER_CITY, sum(search.num_results for search in searches))
+            properties = self.agent.find_properties(city, min(search.min_price for search in searches),
+                                                    max(search.max_price for search in searches), None, num_results,
+                                                    fresh=True)
+            if properties is None:
+                return None
+            table = ListingTable(properties)
+            queued = {}
+            for search in searches:
+                matches = table.filter(search.min_price, search.max_price, search.canton)
+                queued[search.search_id] = len(self.store.record_run(search, matches))
+            annotate(listings=len(properties), queued=sum(queued.values()))
+            return queued
+
+    def run_once(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Run every due search. Returns totals of searches run and failed and notifications queued."""
+        by_city: Dict[str, List[SavedSearch]] = {}
+        for search in self.store.due(self.interval, now):
+            by_city.setdefault(ListingDatabase.city_key(search.city), []).append(search)
+        totals = {"searches": 0, "failed": 0, "extractions": len(by_city), "queued": 0}
+        if not by_city:
+            return totals
+        with tracer.span("saved_searches.run", cities=len(by_city)), ThreadPoolExecutor(
+                max_workers=max(1, min(self.max_workers, len(by_city))), thread_name_prefix="saved-search") as executor:
+            futures = {executor.submit(propagate(self.run_city), searches[0].city, searches): searches
+                       for searches in by_city.values()}
+            for future, searches in futures.items():
+                try:
+                    queued = future.result()
+                except Exception as e:
+                    logging.error(f"Saved searches for {searches[0].city} failed: {str(e)}")
+                    queued = None
+                if queued is None:
+                    # Left due, so the next run retries them
+                    totals["failed"] += len(searches)
+                    continue
+                totals["searches"] += len(searches)
+                totals["queued"] += sum(queued.values())
+        logging.info(f"Saved searches: {totals}")
+        return totals
+
+    def run(self) -> None:
+        """Run due searches, then wait for the next check, until stop() is called."""
+        # Checking more often than the interval picks up newly saved searches promptly
+        check_every = min(self.interval, 60.0)
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(check_every)
+
+    def start(self) -> threading.Thread:
+        """Run the scheduler loop on a daemon thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name="saved-search-scheduler", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Manage saved searches and run the new-listing scheduler")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="Save a search")
+    add.add_argument("--city", required=True)
+    add.add_argument("--canton", help="Canton name or code")
+    add.add_argument("--min-price", type=float, required=True, help="Minimum price in CHF")
+    add.add_argument("--max-price", type=float, required=True, help="Maximum price in CHF")
+    add.add_argument("--name", help="Label shown with its notifications")
+    add.add_argument("--num-results", type=int, default=DEFAULT_RESULTS_PER_SEARCH, help="Listings requested per run")
+    commands.add_parser("list", help="List saved searches")
+    remove = commands.add_parser("remove", help="Delete a saved search")
+    remove.add_argument("search_id", type=int)
+    run = commands.add_parser("run", help="Run due searches on a schedule")
+    run.add_argument("--interval", type=float, default=DEFAULT_SEARCH_INTERVAL, help="Seconds between runs of a search")
+    run.add_argument("--workers", type=int, default=DEFAULT_SCHEDULER_WORKERS, help="Cities searched at the same time")
+    run.add_argument("--once", action="store_true", help="Run the due searches once and exit")
+    outbox = commands.add_parser("outbox", help="Print undelivered notifications as JSON lines")
+    outbox.add_argument("--limit", type=int)
+    outbox.add_argument("--mark-delivered", action="store_true", help="Mark the printed notifications as delivered")
+    args = parser.parse_args(argv)
+
+    store = SavedSearchStore()
+    if args.command == "add":
+        search = store.add(args.city, args.min_price, args.max_price, args.canton, args.name, args.num_results)
+        print(json.dumps(search.to_dict(), ensure_ascii=False))
+    elif args.command == "list":
+        for search in store.searches():
+            print(json.dumps(search.to_dict(), ensure_ascii=False))
+    elif args.command == "remove":
+        if not store.remove(args.search_id):
+            raise SystemExit(f"No saved search {args.search_id}")
+    elif args.command == "outbox":
+        notifications = store.pending(args.limit)
+        for notification in notifications:
+            print(json.dumps(notification, ensure_ascii=False))
+        if args.mark_delivered:
+            store.mark_delivered([notification["notification_id"] for notification in notifications])
+    else:
+        from .swiss_real_estate_agent import SwissPropertyAgent
+
+        scheduler = SavedSearchScheduler(SwissPropertyAgent(), store, args.interval, args.workers)
+        if args.once:
+            print(json.dumps(scheduler.run_once()))
+        else:
+            scheduler.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+# Swiss-specific property data schema
+class PropertyData(BaseModel):
+    # Portals sometimes return bare numbers for price, size or rooms
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+    building_name: str = Field(description="Name of the building/property")
+    property_type: str = Field(description="Type (e.g., apartment, chalet, house)")
+    location_address: str = Field(description="Address including city/canton")
+    canton: str = Field(description="Canton code (e.g., ZH for Zurich)")
+    price: str = Field(description="Price in CHF")
+    description: str = Field(description="Property details")
+    size: Optional[str] = Field(description="Size of the property in square meters")
+    rooms: Optional[str] = Field(description="Number of rooms")
+    image_url: Optional[str] = Field(description="URL of the property image")
+    listing_url: Optional[str] = Field(description="URL of the original property listing")
+
+class PropertiesResponse(BaseModel):
+    properties: List[PropertyData] = Field(description="List of properties")
+
+# Location trends schema
+class LocationData(BaseModel):
+    location: str
+    price_per_sqm: float  # Swiss standard: price per square meter
+    annual_increase: float
+    rental_yield: float
+
+class LocationsResponse(BaseModel):
+    locations: List[LocationData] = Field(description="List of location data")
+
+# Built once at import; every extraction sends (and cache-keys on) the same schema
+PROPERTIES_SCHEMA = PropertiesResponse.model_json_schema()
+LOCATIONS_SCHEMA = LocationsResponse.model_json_schema()
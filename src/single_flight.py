@@ -0,0 +1,77 @@
+import copy
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "followers")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it is in flight wait for it and
+    receive its exception or their own deep copy of its result, so sessions never share mutable listing dicts.
+    When there are followers, the leader snapshots the result before it returns it to its own caller,
+    so the followers never copy a result that the leader's caller is already changing.
+    Nothing is remembered once the call completes; caching is left to ExtractionCache.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run `func` once for all concurrent callers with the same key.
+
+        :return: (result, coalesced) where coalesced is True for callers that waited on another caller's call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.followers += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result), True
+
+        try:
+            result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                followers = call.followers
+            try:
+                # No caller can join any more; the result is still untouched by the leader's caller
+                if call.error is None and followers:
+                    call.result = copy.deepcopy(result)
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                call.done.set()
+        return result, False
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+# Shared by every agent in the process, so identical searches from different Streamlit sessions coalesce
+remote_calls = SingleFlight()
@@ -0,0 +1,108 @@
+import heapq
+import math
+from typing import List, Optional, Sequence, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+# Reference latitude for projecting Swiss coordinates onto a flat km grid
+SWISS_REFERENCE_LATITUDE = 46.8
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two WGS84 coordinates in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def project_km(latitude: float, longitude: float) -> Tuple[float, float]:
+    """
+    Project a WGS84 coordinate onto an equirectangular km grid centred on Switzerland.
+
+    Distances on the grid are within a few percent of great-circle distances across the country.
+    """
+    scale = math.cos(math.radians(SWISS_REFERENCE_LATITUDE))
+    return (EARTH_RADIUS_KM * math.radians(longitude) * scale, EARTH_RADIUS_KM * math.radians(latitude))
+
+
+def unproject_km(x: float, y: float) -> Tuple[float, float]:
+    """(latitude, longitude) of a point on the project_km grid."""
+    scale = math.cos(math.radians(SWISS_REFERENCE_LATITUDE))
+    return math.degrees(y / EARTH_RADIUS_KM), math.degrees(x / (EARTH_RADIUS_KM * scale))
+
+
+class KDTree:
+    """
+    Static k-d tree over points of any dimension, supporting radius and k-nearest-neighbour queries.
+
+    Leaves hold up to `leaf_size` point indices; queries return indices into the original point sequence.
+    """
+
+    def __init__(self, points: Sequence[Sequence[float]], leaf_size: int = 16):
+        self.points = [tuple(float(v) for v in point) for point in points]
+        self.dimensions = len(self.points[0]) if self.points else 0
+        self.leaf_size = max(1, leaf_size)
+        self._root = self._build(list(range(len(self.points))), 0) if self.points else None
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def _build(self, indices: List[int], depth: int):
+        if len(indices) <= self.leaf_size:
+            return indices
+        axis = depth % self.dimensions
+        indices.sort(key=lambda i: self.points[i][axis])
+        middle = len(indices) // 2
+        split = self.points[indices[middle]][axis]
+        return (axis, split, self._build(indices[:middle], depth + 1), self._build(indices[middle:], depth + 1))
+
+    def _squared_distance(self, index: int, point: Sequence[float]) -> float:
+        return sum((a - b) ** 2 for a, b in zip(self.points[index], point))
+
+    def query_radius(self, point: Sequence[float], radius: float) -> List[int]:
+        """Indices of all points within `radius` (Euclidean) of `point`."""
+        if self._root is None:
+            return []
+        radius_sq = radius * radius
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, list):
+                found.extend(i for i in node if self._squared_distance(i, point) <= radius_sq)
+                continue
+            axis, split, left, right = node
+            offset = point[axis] - split
+            if offset - radius <= 0:
+                stack.append(left)
+            if offset + radius >= 0:
+                stack.append(right)
+        return found
+
+    def query(self, point: Sequence[float], k: int = 1, exclude: Optional[int] = None) -> List[Tuple[float, int]]:
+        """The `k` nearest points as (distance, index) pairs, closest first."""
+        if self._root is None or k <= 0:
+            return []
+        best: List[Tuple[float, int]] = []  # max-heap of (-squared distance, index)
+
+        def visit(node):
+            if isinstance(node, list):
+                for i in node:
+                    if i == exclude:
+                        continue
+                    distance_sq = self._squared_distance(i, point)
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance_sq, i))
+                    elif distance_sq < -best[0][0]:
+                        heapq.heapreplace(best, (-distance_sq, i))
+                return
+            axis, split, left, right = node
+            offset = point[axis] - split
+            near, far = (left, right) if offset < 0 else (right, left)
+            visit(near)
+            if len(best) < k or offset * offset < -best[0][0]:
+                visit(far)
+
+        visit(self._root)
+        return sorted((math.sqrt(-negative_sq), i) for negative_sq, i in best)
@@ -1,28 +1,250 @@
-class SwissCitiesDatabase:
+import csv
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from .cantons import get_canton_code, get_canton_name, normalize_name
+from .spatial import KDTree, haversine_km, project_km
+
+DEFAULT_DATA_PATH = os.path.join(os.path.dirname(__file__), "data", "swiss_municipalities.csv")
+# Slack applied to radius queries on the projected grid before the exact great-circle check
+_PROJECTION_SLACK = 1.05
+# The BFS register lists about 2,100 municipalities (fewer each year through mergers); a smaller file is a subset.
+# The bundled file only has the larger municipalities, so lookups report the names and cantons it does not cover.
+# SWISS_MUNICIPALITIES_PATH points the default database at a full register with the same columns instead.
+FULL_REGISTER_MIN_SIZE = 2000
+
+
+class CityRecord:
+    __slots__ = ("name", "canton", "population", "latitude", "longitude", "region", "languages", "features", "aliases")
+
+    def __init__(self, name, canton, population, latitude, longitude, region, languages, features, aliases=()):
+        self.name = name
+        self.canton = canton
+        self.population = population
+        self.latitude = latitude
+        self.longitude = longitude
+        self.region = region
+        self.languages = tuple(languages)
+        self.features = features
+        self.aliases = tuple(aliases)
+
+    def to_info(self) -> Dict:
+        canton_name = get_canton_name(self.canton) if self.canton else None
+        return {
+            "Population": self.population,
+            "Canton": canton_name,
+            "Geographic Location": self.region,
+            "Main Language(s)": list(self.languages),
+            "Notable Features": self.features or f"A municipality in the canton of {canton_name}",
+        }
+
+
+class _TrieNode:
+    __slots__ = ("children", "top")
+
     def __init__(self):
-        self.cities = {}
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.top: List[int] = []
+
+
+class SwissCitiesDatabase:
+    """
+    Swiss municipalities loaded lazily from a bundled CSV file.
+
+    The file is read and parsed on first use. Lookups go through a normalized-name hash index
+    (accent- and case-insensitive, including aliases), a prefix trie for autocomplete and a k-d tree over
+    projected coordinates for radius queries.
+    """
+
+    def __init__(self, data_path: Optional[str] = DEFAULT_DATA_PATH, autocomplete_limit: int = 10):
+        self.data_path = data_path
+        self.autocomplete_limit = autocomplete_limit
+        self._records: List[CityRecord] = []
+        self._name_index: Dict[str, List[int]] = {}
+        self._trie: Optional[_TrieNode] = None
+        self._kdtree: Optional[KDTree] = None
+        self._kdtree_indices: List[int] = []
+        self._loaded = data_path is None
+        self._lock = threading.RLock()
+        # Unknown names and partially covered cantons already reported, so each is logged once
+        self._reported = set()
+
+    @property
+    def cities(self) -> Dict[str, Dict]:
+        self._ensure_loaded()
+        return {record.name: record.to_info() for record in self._records}
+
+    @property
+    def complete(self) -> bool:
+        """Whether the loaded data covers the full municipality register rather than a subset of it."""
+        self._ensure_loaded()
+        return len(self._records) >= FULL_REGISTER_MIN_SIZE
+
+    def _report_once(self, key, message: str) -> None:
+        with self._lock:
+            if key in self._reported:
+                return
+            self._reported.add(key)
+        logging.warning(message)
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            # Resolved on first use rather than at import, so a path set in .env is picked up
+            if self.data_path == DEFAULT_DATA_PATH:
+                self.data_path = os.getenv("SWISS_MUNICIPALITIES_PATH") or DEFAULT_DATA_PATH
+            for record in self._read_records(self.data_path):
+                self._index_record(record)
+            self._loaded = True
+
+    @staticmethod
+    def _read_records(path: str):
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                yield CityRecord(
+                    name=row["name"],
+                    canton=row["canton"],
+                    population=int(row["population"]) if row["population"] else None,
+                    latitude=float(row["latitude"]) if row["latitude"] else None,
+                    longitude=float(row["longitude"]) if row["longitude"] else None,
+                    region=row["region"],
+                    languages=[language for language in row["languages"].split(";") if language],
+                    features=row["features"],
+                    aliases=[alias for alias in row["aliases"].split(";") if alias],
+                )
+
+    def _index_record(self, record: CityRecord) -> int:
+        index = len(self._records)
+        self._records.append(record)
+        for name in (record.name,) + record.aliases:
+            matches = self._name_index.setdefault(normalize_name(name), [])
+            if index not in matches:
+                matches.append(index)
+        # Derived indexes are rebuilt on next use
+        self._trie = None
+        self._kdtree = None
+        return index
 
     def add_city(self, name, population, canton, location, languages, features):
-        self.cities[name] = {
-            "Population": population,
-            "Canton": canton,
-            "Geographic Location": location,
-            "Main Language(s)": languages,
-            "Notable Features": features
-        }
+        with self._lock:
+            self._ensure_loaded()
+            record = CityRecord(name, get_canton_code(canton) or canton, population, None, None, location, languages, features)
+            existing = self._lookup(name, record.canton)
+            if existing is not None:
+                # Replacing keeps the record's coordinates and aliases from the dataset
+                record.latitude, record.longitude, record.aliases = existing.latitude, existing.longitude, existing.aliases
+                self._records[self._records.index(existing)] = record
+            else:
+                self._index_record(record)
+
+    def _lookup(self, name: str, canton: Optional[str] = None) -> Optional[CityRecord]:
+        matches = self._name_index.get(normalize_name(name), [])
+        if canton:
+            canton_code = get_canton_code(canton) or canton
+            matches = [i for i in matches if self._records[i].canton == canton_code]
+        if not matches:
+            return None
+        # Homonyms (e.g. several "Reinach") resolve to the most populous municipality
+        return max((self._records[i] for i in matches), key=lambda record: record.population or 0)
+
+    def find(self, name: str, canton: Optional[str] = None) -> Optional[CityRecord]:
+        """
+        Record for a municipality by name or alias, in any spelling; optionally restricted to a canton.
+
+        Returns None for a name the data does not contain, and logs it once, since with the bundled subset
+        that need not mean the place is not a Swiss municipality.
+        """
+        self._ensure_loaded()
+        record = self._lookup(name, canton)
+        if record is None and normalize_name(name) not in self._name_index:
+            coverage = "" if self.complete else f" (the bundled list has {len(self._records)} of about 2,100 municipalities)"
+            self._report_once(("name", normalize_name(name)), f"Unknown municipality '{name}'{coverage}")
+        return record
+
+    def in_canton(self, canton: str, limit: Optional[int] = None) -> List[CityRecord]:
+        """
+        Municipalities of a canton (name or code), most populous first.
+
+        :raises ValueError: For an unknown canton
+        """
+        self._ensure_loaded()
+        canton_code = get_canton_code(canton)
+        if canton_code is None:
+            raise ValueError(f"Unknown canton: {canton}")
+        records = sorted((record for record in self._records if record.canton == canton_code),
+                         key=lambda record: -(record.population or 0))
+        if not self.complete and (limit is None or len(records) < limit):
+            self._report_once(("canton", canton_code), f"The bundled municipality list has only {len(records)} "
+                                                       f"municipalities of {canton_code}, not the canton's full register")
+        return records[:limit] if limit is not None else records
+
+    def get_city_info(self, name, canton=None):
+        record = self.find(name, canton)
+        return record.to_info() if record else None
+
+    def _build_trie(self) -> _TrieNode:
+        root = _TrieNode()
+        by_population = sorted(range(len(self._records)), key=lambda i: -(self._records[i].population or 0))
+        for index in by_population:
+            record = self._records[index]
+            for name in (record.name,) + record.aliases:
+                node = root
+                for char in normalize_name(name):
+                    node = node.children.setdefault(char, _TrieNode())
+                    # Each node keeps only its most populous matches, so completion is O(len(prefix))
+                    if len(node.top) < self.autocomplete_limit and index not in node.top:
+                        node.top.append(index)
+        return root
+
+    def autocomplete(self, prefix: str, limit: Optional[int] = None) -> List[str]:
+        """Municipality names starting with `prefix` (accent-insensitive), most populous first."""
+        self._ensure_loaded()
+        key = normalize_name(prefix)
+        if not key:
+            return []
+        with self._lock:
+            if self._trie is None:
+                self._trie = self._build_trie()
+            node = self._trie
+        for char in key:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return [self._records[i].name for i in node.top[:limit or self.autocomplete_limit]]
+
+    def _located(self) -> Tuple[KDTree, List[int]]:
+        with self._lock:
+            if self._kdtree is None:
+                located = [i for i, record in enumerate(self._records) if record.latitude is not None and record.longitude is not None]
+                self._kdtree = KDTree([project_km(self._records[i].latitude, self._records[i].longitude) for i in located])
+                self._kdtree_indices = located
+            return self._kdtree, self._kdtree_indices
+
+    def within_radius(self, latitude: float, longitude: float, radius_km: float) -> List[Tuple[CityRecord, float]]:
+        """Municipalities within `radius_km` of a coordinate as (record, distance_km) pairs, nearest first."""
+        self._ensure_loaded()
+        tree, located = self._located()
+        results = []
+        for tree_index in tree.query_radius(project_km(latitude, longitude), radius_km * _PROJECTION_SLACK):
+            record = self._records[located[tree_index]]
+            distance = haversine_km(latitude, longitude, record.latitude, record.longitude)
+            if distance <= radius_km:
+                results.append((record, distance))
+        return sorted(results, key=lambda item: item[1])
+
+    def cities_near(self, name: str, radius_km: float, canton: Optional[str] = None) -> List[Tuple[CityRecord, float]]:
+        """Municipalities within `radius_km` of the named municipality, excluding itself."""
+        origin = self.find(name, canton)
+        if origin is None or origin.latitude is None:
+            return []
+        return [(record, distance) for record, distance in self.within_radius(origin.latitude, origin.longitude, radius_km)
+                if record is not origin]
 
-    def get_city_info(self, name):
-        return self.cities.get(name, None)
 
-# Initialize and populate the database
+# Shared instance; the dataset is loaded on first lookup, not at import time
 swiss_cities = SwissCitiesDatabase()
-swiss_cities.add_city("Zürich", 402762, "Zürich", "Northern Switzerland", ["German"], "Financial hub, largest city")
-swiss_cities.add_city("Geneva", 203856, "Geneva", "Western Switzerland", ["French"], "International organizations, CERN")
-swiss_cities.add_city("Basel", 172258, "Basel-Stadt", "Northwestern Switzerland", ["German"], "Pharmaceutical industry, art and culture")
-swiss_cities.add_city("Bern", 133883, "Bern", "Central Switzerland", ["German"], "Capital city, UNESCO World Heritage Old Town")
-swiss_cities.add_city("Lausanne", 139111, "Vaud", "Western Switzerland", ["French"], "Olympic Capital, university city")
-swiss_cities.add_city("Winterthur", 111851, "Zürich", "Northern Switzerland", ["German"], "Cultural city, museums")
-swiss_cities.add_city("Lucerne", 81592, "Lucerne", "Central Switzerland", ["German"], "Tourism, Lake Lucerne")
-swiss_cities.add_city("St. Gallen", 75833, "St. Gallen", "Eastern Switzerland", ["German"], "Textile industry, University of St. Gallen")
-swiss_cities.add_city("Lugano", 62615, "Ticino", "Southern Switzerland", ["Italian"], "Financial center, Mediterranean flair")
-swiss_cities.add_city("Biel/Bienne", 55206, "Bern", "Northwestern Switzerland", ["German", "French"], "Bilingual city, watchmaking industry")
@@ -1,134 +1,462 @@
-from typing import Dict, List, Optional, Tuple
-from pydantic import BaseModel, Field
-from agno.agent import Agent
-from agno.models.openai import OpenAIChat
-from firecrawl import FirecrawlApp
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed, wait
 import os
 from dotenv import load_dotenv
 from .cantons import get_canton_code, get_canton_name, get_all_canton_names
 from .swiss_cities_database import swiss_cities
-import requests
+from .extraction_cache import ExtractionCache, make_cache_key
+from .single_flight import remote_calls
+from .resilience import get_upstream
+from .listing_db import ListingDatabase
+from .market_stats import MarketStatistics
+from .comparables import ComparablesIndex
+from .dedup import deduplicate
+from .backends import ExtractionBackend, LLMBackend, create_fake_backends, create_firecrawl_extractor, create_openai_llm, use_fake_backends
+from .analysis import DEFAULT_DESCRIPTION_CHARS, DEFAULT_PROMPT_TOKEN_BUDGET, chunk_by_budget, compact_properties, listing_header
+from .listing_table import ListingTable, parse_price
+from .listing_store import WIDE_BAND_LISTINGS_PER_RESULT, ListingStore, widen_price_band
+from .tracing import annotate, log_payload, mark_error, propagate, traced, tracer
+from .schemas import LOCATIONS_SCHEMA, PROPERTIES_SCHEMA
+from .ingest import ingest_properties
 import logging
+import time
+from urllib.parse import urlparse
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Swiss-specific property data schema
-class PropertyData(BaseModel):
-    building_name: str = Field(description="Name of the building/property")
-    property_type: str = Field(description="Type (e.g., apartment, chalet, house)")
-    location_address: str = Field(description="Address including city/canton")
-    canton: str = Field(description="Canton code (e.g., ZH for Zurich)")
-    price: str = Field(description="Price in CHF")
-    description: str = Field(description="Property details")
-    size: Optional[str] = Field(description="Size of the property in square meters")
-    rooms: Optional[str] = Field(description="Number of rooms")
-    image_url: Optional[str] = Field(description="URL of the property image")
-    listing_url: Optional[str] = Field(description="URL of the original property listing")
-
-class PropertiesResponse(BaseModel):
-    properties: List[PropertyData] = Field(description="List of properties")
-
-# Location trends schema
-class LocationData(BaseModel):
-    location: str
-    price_per_sqm: float  # Swiss standard: price per square meter
-    annual_increase: float
-    rental_yield: float
-
-class LocationsResponse(BaseModel):
-    locations: List[LocationData] = Field(description="List of location data")
+# Listing portals queried by find_properties, one extraction per portal in concurrent mode
+PORTAL_URL_TEMPLATES = {
+    "homegate": [
+        "https://www.homegate.ch/buy/apartment/city-{city}",
+        "https://www.homegate.ch/buy/house/city-{city}",
+    ],
+    "immoscout24": ["https://www.immoscout24.ch/en/real-estate/buy/city-{city}"],
+    "comparis": ["https://www.comparis.ch/immobilien/marktplatz/{city}/kaufen"],
+}
+DEFAULT_PORTAL_WORKERS = 4
+DEFAULT_PORTAL_TIMEOUT = 60.0
+
+# Independent lookups assembled by get_dashboard
+DASHBOARD_SECTIONS = ("properties", "location_trends", "canton_statistics", "city_overview")
+DEFAULT_DASHBOARD_DEADLINE = 90.0
 
 class SwissPropertyAgent:
-    def __init__(self, model_id: str = "gpt-4o"):
+    def __init__(self, model_id: str = "gpt-4o", cache: Optional[ExtractionCache] = None, use_cache: bool = True,
+                 extractor: Optional[ExtractionBackend] = None, llm: Optional[LLMBackend] = None,
+                 listing_db: Optional[ListingDatabase] = None, use_listing_db: bool = True,
+                 market_stats: Optional[MarketStatistics] = None):
         load_dotenv()
         self.firecrawl_api_key = os.getenv("FIRECRAWL_API_KEY")
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
 
-        if not self.firecrawl_api_key or not self.openai_api_key:
+        # SWISS_RE_BACKEND=fake swaps in the local replay backends, which need no API keys
+        if extractor is None and llm is None and use_fake_backends():
+            extractor, llm = create_fake_backends()
+
+        if (extractor is None and not self.firecrawl_api_key) or (llm is None and not self.openai_api_key):
             raise ValueError("Missing API keys. Please check your .env file.")
 
         try:
-            self.agent = Agent(
-                model=OpenAIChat(id=model_id, api_key=self.openai_api_key),
-                markdown=True,
-                description="I am a Swiss real estate expert assisting with property search and analysis."
-            )
-            self.firecrawl = FirecrawlApp(api_key=self.firecrawl_api_key)
+            self.agent = llm if llm is not None else create_openai_llm(model_id, self.openai_api_key)
+            self.firecrawl = extractor if extractor is not None else create_firecrawl_extractor(self.firecrawl_api_key)
         except Exception as e:
             raise ValueError(f"Error initializing APIs: {str(e)}")
 
-    def find_properties(self, city: str, min_price: float, max_price: float, canton: Optional[str] = None, num_results: int = 10) -> Optional[List[Dict]]:
-        formatted_city = city.lower().replace(" ", "-")
+        # Per-portal latency (seconds) of the last concurrent find_properties call
+        self.last_source_latencies: Dict[str, float] = {}
+        self.listing_store = ListingStore()
+        self._dashboard_executor: Optional[ThreadPoolExecutor] = None
+        # Per-city comparables indexes, extended with the listings each search adds
+        self._comparables: Dict[str, ComparablesIndex] = {}
+        self.cache = cache
+        if self.cache is None and use_cache:
+            try:
+                self.cache = ExtractionCache()
+            except Exception as e:
+                logging.warning(f"Extraction cache disabled: {str(e)}")
+        # Listings kept fresh by the background crawler (src/crawler.py); searches of crawled cities never scrape
+        self.listing_db = listing_db
+        if self.listing_db is None and use_listing_db:
+            try:
+                self.listing_db = ListingDatabase()
+            except Exception as e:
+                logging.warning(f"Listing database disabled: {str(e)}")
+        # Market figures computed from crawled and searched listings; trends and canton statistics come from here first
+        self.market_stats = market_stats if market_stats is not None else MarketStatistics(self.listing_db)
+
+    @staticmethod
+    def _portal_hosts(urls: Iterable[str]) -> List[str]:
+        """Circuit breaker keys of an extraction: one per portal host it scrapes."""
+        return sorted({urlparse(url).hostname or url for url in urls})
+
+    def _portal_available(self, urls: Iterable[str]) -> bool:
+        """Whether none of the portals behind these URLs is currently tripped."""
+        upstream = get_upstream("firecrawl")
+        return all(upstream.available(host) for host in self._portal_hosts(urls))
+
+    def _extract(self, method: str, urls: List[str], prompt: str, schema: Dict, use_cache: bool = True,
+                 deadline: Optional[float] = None, refresh: bool = False) -> Dict:
+        params = {'prompt': prompt, 'schema': schema}
+
+        def call_backend():
+            # The backend stops waiting for the job at the deadline, so an abandoned portal does not hold its thread
+            if deadline is None:
+                return self.firecrawl.extract(urls, params)
+            return self.firecrawl.extract(urls, params, deadline=deadline)
+
+        def request():
+            with tracer.span("firecrawl.extract", urls=len(urls)):
+                # Rate limited, retried with jittered backoff, and rejected outright while a portal's circuit is open
+                response = get_upstream("firecrawl").call(call_backend, keys=self._portal_hosts(urls), deadline=deadline)
+            log_payload(f"{method} raw API response", response)
+            # Raising here keeps failed extractions out of the cache
+            if not response or 'data' not in response:
+                raise ValueError(f"Extraction returned no data: {str(response)[:200]}")
+            return response
+
+        def extract():
+            # Identical extractions already in flight (e.g. from other sessions searching the same city) are shared
+            response, coalesced = remote_calls.do((id(self.firecrawl), make_cache_key(urls, prompt, schema)), request)
+            if coalesced:
+                annotate(coalesced=True)
+            return response
+
+        with tracer.span("extract", method=method):
+            if self.cache is None or not use_cache:
+                return extract()
+            if refresh:
+                # Never served from the cache, but the fresh response replaces the cached one for everyone else
+                response = extract()
+                self.cache.set(method, make_cache_key(urls, prompt, schema), response)
+                return response
+            return self.cache.get_or_extract(method, urls, prompt, schema, extract)
+
+    @traced("find_properties")
+    def find_properties(self, city: str, min_price: float, max_price: float, canton: Optional[str] = None, num_results: int = 10,
+                        concurrent: bool = False, max_workers: int = DEFAULT_PORTAL_WORKERS,
+                        portal_timeout: float = DEFAULT_PORTAL_TIMEOUT, fresh: bool = False) -> Optional[List[Dict]]:
+        """
+        :param fresh: Fetch from the portals even when the listing store, listing database or extraction cache
+            could answer, e.g. for scheduled runs that must see listings published since the previous run
+        """
         canton_code = get_canton_code(canton) if canton else None
-        
-        urls = [
-            f"https://www.homegate.ch/buy/apartment/city-{formatted_city}",
-            f"https://www.homegate.ch/buy/house/city-{formatted_city}",
-            f"https://www.immoscout24.ch/en/real-estate/buy/city-{formatted_city}",
-            f"https://www.comparis.ch/immobilien/marktplatz/{formatted_city}/kaufen",
-        ]
+
+        # Price, canton and count refinements inside an already fetched band never hit the API
+        if not fresh and self.listing_store.covers(city, min_price, max_price, num_results):
+            filtered_properties = self.listing_store.table(city).filter(min_price, max_price, canton_code, limit=num_results)
+            annotate(listing_store="hit", results=len(filtered_properties))
+            logging.debug(f"Answered from listing store: {len(filtered_properties)} properties")
+            return filtered_properties
+
+        if not fresh and self._listing_db_is_fresh(city):
+            return self._search_listing_db(city, min_price, max_price, canton_code, num_results)
+
+        if concurrent:
+            return self._find_properties_concurrent(city, min_price, max_price, canton, num_results, max_workers, portal_timeout,
+                                                    fresh)
+
+        portals = self._portal_urls(city)
+        # Portals with an open circuit are left out, so a degraded portal costs a smaller result rather than the whole search
+        available = {source: urls for source, urls in portals.items() if self._portal_available(urls)}
+        if not available:
+            logging.error("Every portal is currently unavailable (circuit open)")
+            annotate(circuit="open")
+            return None
+        degraded = len(available) < len(portals)
+        if degraded:
+            annotate(skipped_portals=len(portals) - len(available))
+            logging.warning(f"Skipping unavailable portals: {sorted(set(portals) - set(available))}")
+        urls = [url for portal_urls in available.values() for url in portal_urls]
+        fetch_min_price, fetch_max_price = widen_price_band(min_price, max_price)
         
         try:
-            prompt = f"Extract at least {num_results * 2} property listings in {city} between {min_price} and {max_price} CHF, including image URLs and original listing URLs"
-            if canton_code:
-                prompt += f" in the canton of {get_canton_name(canton_code)}"
+            prompt = self._properties_prompt(city, fetch_min_price, fetch_max_price, None, num_results * WIDE_BAND_LISTINGS_PER_RESULT)
             
-            print(f"API Request - URLs: {urls}, Prompt: {prompt}")  # Debug log
-            response = self.firecrawl.extract(urls, {
-                'prompt': prompt,
-                'schema': PropertiesResponse.model_json_schema(),
-            })
-            print(f"Raw API Response: {response}")  # Debug log
+            logging.debug(f"API Request - URLs: {urls}, Prompt: {prompt}")
+            response = self._extract("find_properties", urls, prompt, PROPERTIES_SCHEMA, refresh=fresh)
             
-            properties = response['data']['properties']
-            print(f"Number of properties before filtering: {len(properties)}")  # Debug log
-            
-            # Process properties to ensure image URLs and listing URLs are present and filter by price range
-            filtered_properties = []
-            for prop in properties:
-                if 'image_url' not in prop or not prop['image_url'] or 'listing_url' not in prop or not prop['listing_url']:
-                    prop['image_url'], prop['listing_url'] = self._extract_urls(prop)
-                price = self._parse_price(prop['price'])
-                if min_price <= price <= max_price:
-                    filtered_properties.append(prop)
-                if len(filtered_properties) >= num_results:
-                    break
+            properties = ingest_properties(response['data']['properties'], source="find_properties")
+            annotate(listings=len(properties))
+
+            self.market_stats.observe(city, self.listing_store.add(city, properties))
+            # A partial fetch must not answer later refinements locally
+            if not degraded:
+                self.listing_store.mark_covered(city, fetch_min_price, fetch_max_price, num_results)
             
-            if canton_code:
-                filtered_properties = [prop for prop in filtered_properties if prop['canton'] == canton_code][:num_results]
+            filtered_properties = self.listing_store.table(city).filter(min_price, max_price, canton_code, limit=num_results)
             
-            print(f"Number of properties after filtering: {len(filtered_properties)}")  # Debug log
+            annotate(results=len(filtered_properties))
             
             if len(filtered_properties) < num_results:
-                print(f"Warning: Only found {len(filtered_properties)} properties matching the criteria")
+                logging.warning(f"Only found {len(filtered_properties)} properties matching the criteria")
             
-            return filtered_properties[:num_results]
+            return filtered_properties
         except Exception as e:
-            error_message = f"Error finding properties: {str(e)}"
-            print(error_message)
-            if hasattr(e, 'response'):
-                print(f"API Response: {e.response.text}")
+            mark_error(e)
+            logging.error(f"Error finding properties: {str(e)}")
+            if getattr(e, 'response', None) is not None:
+                log_payload("find_properties error response", e.response.text, sample_rate=1.0)
+            return None
+
+    def iter_portal_results(self, city: str, min_price: float, max_price: float, canton: Optional[str] = None, num_results: int = 10,
+                            max_workers: int = DEFAULT_PORTAL_WORKERS,
+                            portal_timeout: float = DEFAULT_PORTAL_TIMEOUT, fresh: bool = False) -> Iterator[Dict]:
+        """
+        Run one extraction per portal on a bounded thread pool and yield each portal's result as soon as it finishes.
+
+        :param max_workers: Maximum number of portals extracted at the same time
+        :param portal_timeout: Seconds a single portal may run before it is abandoned
+        :param fresh: Bypass the extraction cache (the response still replaces the cached one)
+        :return: Iterator of dicts with 'source', 'properties' (filtered), 'latency' (seconds) and 'error' keys
+        """
+        canton_code = get_canton_code(canton) if canton else None
+        fetch_min_price, fetch_max_price = widen_price_band(min_price, max_price)
+        prompt = self._properties_prompt(city, fetch_min_price, fetch_max_price, None, num_results * WIDE_BAND_LISTINGS_PER_RESULT)
+        portals = self._portal_urls(city)
+        failed = False
+
+        started: Dict[str, float] = {}
+
+        def extract_portal(source: str, urls: List[str]) -> List[Dict]:
+            started[source] = time.monotonic()
+            with tracer.span("portal", source=source):
+                # Retries stop at the portal's own timeout instead of running on after it was abandoned
+                response = self._extract("find_properties", urls, prompt, PROPERTIES_SCHEMA,
+                                         deadline=started[source] + portal_timeout, refresh=fresh)
+                properties = ingest_properties(response['data']['properties'], source=source)
+                annotate(listings=len(properties))
+                return properties
+
+        executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(portals))), thread_name_prefix="portal-extract")
+        futures = {executor.submit(propagate(extract_portal), source, urls): source for source, urls in portals.items()}
+        pending = set(futures)
+        try:
+            while pending:
+                now = time.monotonic()
+                deadlines = [started[futures[f]] + portal_timeout for f in pending if futures[f] in started]
+                wait_for = max(0.0, min(deadlines) - now) if deadlines else portal_timeout
+                done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    source = futures[future]
+                    latency = time.monotonic() - started.get(source, now)
+                    try:
+                        # Listings another portal already returned come back as the merged record
+                        unique_properties = self.listing_store.add(city, future.result())
+                        self.market_stats.observe(city, unique_properties)
+                        properties = self._filter_properties(unique_properties, min_price, max_price, canton_code, num_results)
+                        yield {"source": source, "properties": properties, "latency": latency, "error": None}
+                    except Exception as e:
+                        failed = True
+                        logging.error(f"Error extracting properties from {source}: {str(e)}")
+                        # An extraction that gave up at the portal's deadline reports the same way as one abandoned here
+                        error = "timeout" if latency >= portal_timeout else str(e)
+                        yield {"source": source, "properties": [], "latency": latency, "error": error}
+
+                now = time.monotonic()
+                for future in list(pending):
+                    source = futures[future]
+                    if source in started and now - started[source] >= portal_timeout:
+                        pending.discard(future)
+                        future.cancel()
+                        failed = True
+                        # The extraction stops at the same deadline and counts itself as one failure on the portal's breaker
+                        logging.warning(f"Timed out extracting properties from {source} after {portal_timeout:.1f}s")
+                        yield {"source": source, "properties": [], "latency": now - started[source], "error": "timeout"}
+
+            # Only a complete fetch may answer later refinements locally
+            if not failed:
+                self.listing_store.mark_covered(city, fetch_min_price, fetch_max_price, num_results)
+        finally:
+            # Abandon stragglers instead of blocking the caller on the slowest portal
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def iter_properties(self, city: str, min_price: float, max_price: float, canton: Optional[str] = None, num_results: int = 10,
+                        max_workers: int = DEFAULT_PORTAL_WORKERS,
+                        portal_timeout: float = DEFAULT_PORTAL_TIMEOUT) -> Iterator[Dict]:
+        """
+        Yield matching listings as soon as they are available instead of waiting for the full search.
+
+        Listings already in the listing store are yielded immediately; otherwise each portal's listings are
+        yielded as that portal's extraction finishes. Stops after `num_results` distinct listings.
+        """
+        canton_code = get_canton_code(canton) if canton else None
+        if self.listing_store.covers(city, min_price, max_price, num_results):
+            yield from self.listing_store.table(city).filter(min_price, max_price, canton_code, limit=num_results)
+            return
+        if self._listing_db_is_fresh(city):
+            yield from self._search_listing_db(city, min_price, max_price, canton_code, num_results)
+            return
+
+        seen = set()
+        self.last_source_latencies = {}
+        for result in self.iter_portal_results(city, min_price, max_price, canton, num_results, max_workers, portal_timeout):
+            self.last_source_latencies[result["source"]] = result["latency"]
+            for prop in result["properties"]:
+                listing_key = prop.get('listing_url') or id(prop)
+                if listing_key in seen:
+                    continue
+                seen.add(listing_key)
+                yield prop
+                if len(seen) >= num_results:
+                    return
+
+    def _find_properties_concurrent(self, city: str, min_price: float, max_price: float, canton: Optional[str], num_results: int,
+                                    max_workers: int, portal_timeout: float, fresh: bool = False) -> Optional[List[Dict]]:
+        merged: List[Dict] = []
+        seen = set()
+        failed_sources = []
+        self.last_source_latencies = {}
+        for result in self.iter_portal_results(city, min_price, max_price, canton, num_results, max_workers, portal_timeout,
+                                               fresh):
+            self.last_source_latencies[result["source"]] = result["latency"]
+            if result["error"]:
+                failed_sources.append(result["source"])
+            for prop in result["properties"]:
+                if id(prop) not in seen:
+                    seen.add(id(prop))
+                    merged.append(prop)
+            logging.debug(f"Portal {result['source']} finished in {result['latency']:.2f}s with {len(result['properties'])} properties")
+
+        # A single failing portal only drops its own listings; None is reserved for every portal failing
+        if len(failed_sources) == len(PORTAL_URL_TEMPLATES):
+            logging.error("Error finding properties: all portals failed")
             return None
+        if len(merged) < num_results:
+            logging.warning(f"Only found {len(merged)} properties matching the criteria")
+        return merged[:num_results]
+
+    def _listing_db_is_fresh(self, city: str) -> bool:
+        try:
+            return self.listing_db is not None and self.listing_db.is_fresh(city)
+        except Exception as e:
+            logging.warning(f"Listing database unavailable: {str(e)}")
+            return False
+
+    def _search_listing_db(self, city: str, min_price: float, max_price: float, canton_code: Optional[str], num_results: int) -> List[Dict]:
+        # The database keeps one row per portal listing; a few spare rows leave room for cross-portal duplicates
+        rows = self.listing_db.search(city, min_price, max_price, canton_code, limit=num_results * 3)
+        properties = ingest_properties(deduplicate(rows)[:num_results], source="listing_db")
+        annotate(listing_db="hit", results=len(properties))
+        return properties
+
+    def _portal_urls(self, city: str) -> Dict[str, List[str]]:
+        formatted_city = city.lower().replace(" ", "-")
+        return {source: [template.format(city=formatted_city) for template in templates]
+                for source, templates in PORTAL_URL_TEMPLATES.items()}
+
+    def _properties_prompt(self, city: str, min_price: float, max_price: float, canton_code: Optional[str], num_listings: int) -> str:
+        prompt = f"Extract at least {num_listings} property listings in {city} between {min_price} and {max_price} CHF, including image URLs and original listing URLs"
+        if canton_code:
+            prompt += f" in the canton of {get_canton_name(canton_code)}"
+        return prompt
+
+    def _filter_properties(self, properties: List[Dict], min_price: float, max_price: float, canton_code: Optional[str], num_results: int) -> List[Dict]:
+        # Prices are parsed once into a columnar table and filtered by price range and canton in one vectorized pass
+        return ListingTable(properties).filter(min_price, max_price, canton_code, limit=num_results)
 
     def _extract_urls(self, property_data: Dict) -> Tuple[Optional[str], Optional[str]]:
         try:
             # Extract image URL and listing URL from the property data
             return property_data.get('image_url'), property_data.get('listing_url')
         except Exception as e:
-            print(f"Error extracting image URL or listing URL: {str(e)}")
+            logging.error(f"Error extracting image URL or listing URL: {str(e)}")
             return None, None
 
     def filter_properties_by_canton(self, properties: List[Dict], canton: str) -> List[Dict]:
+        # Works on any listing list, e.g. the city's full set from self.listing_store.listings(city)
         canton_code = get_canton_code(canton)
-        return [prop for prop in properties if prop['canton'] == canton_code]
+        return ListingTable(properties).filter(canton_code=canton_code) if canton_code else []
+
+    def comparables_index(self, city: str) -> ComparablesIndex:
+        """The city's comparables index, brought up to date with the listing store and the listing database."""
+        key = ListingDatabase.city_key(city)
+        index = self._comparables.get(key)
+        if index is None:
+            index = self._comparables[key] = ComparablesIndex()
+        listings = self.listing_store.listings(city)
+        if self.listing_db is not None:
+            try:
+                listings += self.listing_db.city_listings(city)
+            except Exception as e:
+                logging.warning(f"Listing database unavailable: {str(e)}")
+        # Already indexed listings are skipped by key; only new ones are featurized
+        index.add(listings, city)
+        return index
+
+    @traced("find_comparables")
+    def find_comparables(self, listing: Dict, city: str, k: int = 5) -> List[Dict]:
+        """
+        The `k` collected listings most similar to `listing` by location, size, rooms, type and CHF/m².
+
+        Each result is a copy of the listing with its feature-space distance under 'similarity_distance'.
+        """
+        comparables = self.comparables_index(city).comparables(listing, k, city)
+        annotate(results=len(comparables))
+        return [{**comparable, "similarity_distance": round(distance, 3)} for comparable, distance in comparables]
+
+    def _precomputed_stats(self, dimension: str, key: str) -> Optional[Dict]:
+        try:
+            stats = self.market_stats.city(key) if dimension == "city" else self.market_stats.canton(key)
+        except Exception as e:
+            logging.warning(f"Market statistics unavailable: {str(e)}")
+            return None
+        annotate(market_stats="hit" if stats else "miss")
+        return stats
+
+    def _window_days(self) -> int:
+        return round(self.market_stats.window / 86400)
+
+    def _price_trend_text(self, stats: Dict) -> str:
+        if stats["price_per_sqm_change"] is None:
+            return "Not enough listings yet to measure a trend"
+        return f"Price per m² {stats['price_per_sqm_change']:+.1f}% versus the previous {self._window_days()} days"
 
+    def _market_trend_items(self, stats: Dict) -> List[Dict[str, str]]:
+        days = self._window_days()
+        ppsqm = stats["price_per_sqm"]
+        removed = stats["removed_listings"]
+        rooms = f"{stats['median_rooms']:g} rooms, " if stats["median_rooms"] is not None else ""
+        size = f"{stats['median_size']:.0f} m²" if stats["median_size"] is not None else "size unknown"
+        return [
+            {"header": "Price Trends", "subheader": f"Median CHF {ppsqm['p50']:,.0f} per m² (middle half CHF {ppsqm['p25']:,.0f}–{ppsqm['p75']:,.0f}) "
+                                                    f"across {stats['price_per_sqm_count']} listings" if ppsqm else "Data not available"},
+            {"header": "Demand", "subheader": f"{removed} listings taken off the market in the last {days} days, after a median of "
+                                              f"{stats['median_days_on_market']:.0f} days" if removed else f"No listings taken off the market in the last {days} days"},
+            {"header": "Supply", "subheader": f"{stats['active_listings']} active listings, {stats['new_listings']} new in the last {days} days"},
+            {"header": "Typical Listing", "subheader": f"Median CHF {stats['median_price']:,.0f} for {rooms}{size}"},
+            {"header": "Future Outlook", "subheader": self._price_trend_text(stats)},
+        ]
+
+    def _canton_statistic_items(self, stats: Dict) -> List[Dict[str, str]]:
+        days = self._window_days()
+        ppsqm = stats["price_per_sqm"]
+        types = stats["property_types"]
+        total = sum(types.values())
+        mix = ", ".join(f"{count / total:.0%} {name}" for name, count in list(types.items())[:3]) if total else "Data not available"
+        return [
+            {"header": "Property Types", "subheader": mix},
+            {"header": "Price Range", "subheader": f"CHF {ppsqm['p10']:,.0f}–{ppsqm['p90']:,.0f} per m² (median CHF {ppsqm['p50']:,.0f})"
+                                                   if ppsqm else f"Median price CHF {stats['median_price']:,.0f}"},
+            {"header": "Market Activity", "subheader": f"{stats['active_listings']} active listings; {stats['new_listings']} new and "
+                                                       f"{stats['removed_listings']} taken off the market in the last {days} days"},
+            {"header": "Price Trend", "subheader": self._price_trend_text(stats)},
+            {"header": "Regulations", "subheader": "Standard Swiss property regulations apply"},
+        ]
+
+    @traced("get_location_trends")
     def get_location_trends(self, city: str, canton: Optional[str] = None) -> Dict:
         formatted_city = city.lower().replace(' ', '-')
         canton_code = get_canton_code(canton) if canton else None
         canton_name = get_canton_name(canton_code) if canton_code else None
         
         default_item = {"header": "Data Unavailable", "subheader": "Unable to retrieve information"}
+
+        # Cities with enough collected listings are answered from precomputed statistics, without a scrape
+        stats = self._precomputed_stats("city", city)
+        if stats:
+            return {"market_trends": self._market_trend_items(stats)}
         
         try:
             urls = [f"https://www.homegate.ch/market-analysis/{formatted_city}"]
@@ -139,12 +467,8 @@ class SwissPropertyAgent:
             if canton_code:
                 prompt += f" and the canton of {canton_name}"
             
-            print(f"Location Trends API Request - URLs: {urls}, Prompt: {prompt}")  # Debug log
-            response = self.firecrawl.extract(urls, {
-                'prompt': prompt,
-                'schema': LocationsResponse.model_json_schema(),
-            })
-            print(f"Location Trends Raw API Response: {response}")  # Debug log
+            logging.debug(f"Location Trends API Request - URLs: {urls}, Prompt: {prompt}")
+            response = self._extract("get_location_trends", urls, prompt, LOCATIONS_SCHEMA)
             
             trends = response['data']['locations']
             
@@ -162,17 +486,13 @@ class SwissPropertyAgent:
             return {"market_trends": market_trends}
         
         except Exception as e:
-            print(f"Error getting location trends: {str(e)}")
+            mark_error(e)
+            logging.error(f"Error getting location trends: {str(e)}")
             return {"market_trends": [default_item] * 5}
 
     def _parse_price(self, price_str: str) -> float:
-        try:
-            # Remove 'CHF', commas, and any other non-numeric characters (except '.')
-            cleaned_price = ''.join(char for char in price_str if char.isdigit() or char == '.')
-            return float(cleaned_price)
-        except ValueError:
-            print(f"Unable to parse price: {price_str}")  # Debug log
-            return float('inf')  # Return infinity for unparseable prices
+        # Unparseable prices become infinity so they fall outside every range and sort last
+        return parse_price(price_str)
 
     def test_api_connection(self):
         try:
@@ -181,12 +501,13 @@ class SwissPropertyAgent:
                 'prompt': "Extract the title of the page",
                 'schema': {"type": "object", "properties": {"title": {"type": "string"}}}
             })
-            print("API connection successful")
+            logging.info("API connection successful")
             return True
         except Exception as e:
-            print(f"API connection failed: {str(e)}")
+            logging.error(f"API connection failed: {str(e)}")
             return False
 
+    @traced("get_city_overview")
     def get_city_overview(self, city: str, canton: str) -> Dict[str, str]:
         if not city or not canton:
             raise ValueError("Both city and canton must be provided")
@@ -231,6 +552,80 @@ class SwissPropertyAgent:
                 "Notable Features": "Data not available"
             }
 
+    def submit_dashboard(self, city: str, min_price: float, max_price: float, canton: Optional[str] = None, num_results: int = 10,
+                         sections: Iterable[str] = DASHBOARD_SECTIONS) -> Dict[str, Future]:
+        """
+        Start the dashboard lookups concurrently and return their futures without waiting.
+
+        Each future resolves to (data, latency_seconds). Sections that need a canton are skipped without one.
+        """
+        calls = {
+            "properties": lambda: self.find_properties(city, min_price, max_price, canton, num_results=num_results, concurrent=True),
+            "location_trends": lambda: self.get_location_trends(city, canton),
+            "canton_statistics": lambda: self.get_canton_statistics(canton),
+            "city_overview": lambda: self.get_city_overview(city, canton),
+        }
+        if not canton:
+            calls.pop("canton_statistics")
+            calls.pop("city_overview")
+
+        def timed(call):
+            start = time.monotonic()
+            return call(), time.monotonic() - start
+
+        if self._dashboard_executor is None:
+            self._dashboard_executor = ThreadPoolExecutor(max_workers=len(DASHBOARD_SECTIONS), thread_name_prefix="dashboard")
+        # Each section inherits the caller's trace, so its spans show up in the caller's waterfall
+        return {section: self._dashboard_executor.submit(propagate(timed), calls[section]) for section in sections if section in calls}
+
+    def collect_dashboard(self, futures: Dict[str, Future], deadline: float = DEFAULT_DASHBOARD_DEADLINE) -> Iterator[Dict]:
+        """
+        Yield dashboard sections as they complete, sharing one deadline across all of them.
+
+        :return: Iterator of dicts with 'section', 'data', 'error' and 'latency' keys; sections still running
+                 at the deadline are yielded with error 'timeout'
+        """
+        sections = {future: section for section, future in futures.items()}
+        started = time.monotonic()
+        try:
+            for future in as_completed(sections, timeout=deadline):
+                section = sections.pop(future)
+                try:
+                    data, latency = future.result()
+                    error = "No data returned" if data is None else None
+                    yield {"section": section, "data": data, "error": error, "latency": latency}
+                except Exception as e:
+                    logging.error(f"Dashboard section {section} failed: {str(e)}")
+                    yield {"section": section, "data": None, "error": str(e), "latency": time.monotonic() - started}
+        except FutureTimeoutError:
+            for future, section in sections.items():
+                future.cancel()
+                logging.warning(f"Dashboard section {section} missed the {deadline:.0f}s deadline")
+                yield {"section": section, "data": None, "error": "timeout", "latency": time.monotonic() - started}
+
+    def iter_dashboard(self, city: str, min_price: float, max_price: float, canton: Optional[str] = None, num_results: int = 10,
+                       deadline: float = DEFAULT_DASHBOARD_DEADLINE, sections: Iterable[str] = DASHBOARD_SECTIONS) -> Iterator[Dict]:
+        futures = self.submit_dashboard(city, min_price, max_price, canton, num_results, sections)
+        yield from self.collect_dashboard(futures, deadline)
+
+    def get_dashboard(self, city: str, min_price: float, max_price: float, canton: Optional[str] = None, num_results: int = 10,
+                      deadline: float = DEFAULT_DASHBOARD_DEADLINE, sections: Iterable[str] = DASHBOARD_SECTIONS) -> Dict[str, Any]:
+        """
+        Run listings, location trends, canton statistics and city overview concurrently.
+
+        Latency is bounded by the slowest lookup (or the deadline), not their sum. Failed or late sections are
+        None in the result and described in 'errors'.
+        """
+        dashboard: Dict[str, Any] = {section: None for section in sections}
+        dashboard["errors"] = {}
+        dashboard["latencies"] = {}
+        for piece in self.iter_dashboard(city, min_price, max_price, canton, num_results, deadline, sections):
+            dashboard[piece["section"]] = piece["data"]
+            dashboard["latencies"][piece["section"]] = piece["latency"]
+            if piece["error"]:
+                dashboard["errors"][piece["section"]] = piece["error"]
+        return dashboard
+
     def get_population(self, city: str) -> str:
         # Placeholder for a more robust population data fetching method
         # In a real implementation, this would use a reliable API or database
@@ -312,36 +707,81 @@ class SwissPropertyAgent:
         logging.info(f"Notable features for {city}, {canton_name}: {features}")
         return features
 
-    def analyze_properties(self, properties: List[Dict], city: str, min_price: float, max_price: float, canton: Optional[str] = None) -> str:
+    def _run_llm(self, prompt: str) -> str:
+        def request():
+            with tracer.span("llm.request"):
+                response = get_upstream("openai").call(lambda: self.agent.run(prompt), keys=("openai",))
+            return getattr(response, 'content', response)
+
+        def run():
+            # Keyed on the model rather than the per-session agent, so identical analyses coalesce across sessions
+            model = getattr(self.agent, 'model', self.agent)
+            response, coalesced = remote_calls.do((getattr(model, 'id', id(model)), make_cache_key([], prompt, {})), request)
+            if coalesced:
+                annotate(coalesced=True)
+            return response
+
+        # Identical prompts (same listings, context and instructions) are answered from the cache
+        with tracer.span("llm", prompt_chars=len(prompt)):
+            if self.cache is None:
+                return run()
+            return self.cache.get_or_extract("analyze_properties", [], prompt, {}, run)
+
+    @traced("analyze_properties")
+    def analyze_properties(self, properties: List[Dict], city: str, min_price: float, max_price: float, canton: Optional[str] = None,
+                           token_budget: int = DEFAULT_PROMPT_TOKEN_BUDGET, max_description_chars: int = DEFAULT_DESCRIPTION_CHARS) -> str:
         canton_name = get_canton_name(get_canton_code(canton)) if canton else None
         context = f"from {city} with prices between {min_price} and {max_price} CHF" + (f" in the canton of {canton_name}" if canton_name else "")
         
         city_overview = self.get_city_overview(city, canton) if canton else {}
         overview_str = "\n".join([f"{k}: {v}" for k, v in city_overview.items()])
-        
-        return self.agent.run(f"""
+
+        # Only the fields the analysis needs, one line per listing, descriptions truncated
+        chunks = chunk_by_budget(compact_properties(properties, max_description_chars), token_budget)
+        if len(chunks) <= 1:
+            listings = "\n".join([listing_header()] + (chunks[0] if chunks else []))
+            return self._run_llm(f"""
         City Overview:
         {overview_str}
 
         Analyze these properties {context} and provide recommendations, considering the city overview, specified price range, and any canton-specific factors:
-        {properties}
+        {listings}
         """)
 
+        # Map: summarize each chunk independently; Reduce: combine the summaries into one recommendation
+        chunk_summaries = []
+        for index, chunk in enumerate(chunks, start=1):
+            listings = "\n".join([listing_header()] + chunk)
+            chunk_summaries.append(self._run_llm(f"""
+        Summarize the notable properties {context} in this batch ({index} of {len(chunks)}): best value, price per m², standout features and red flags. Keep building names so they can be referenced later:
+        {listings}
+        """))
+        summaries = "\n\n".join(f"Batch {index}:\n{summary}" for index, summary in enumerate(chunk_summaries, start=1))
+        return self._run_llm(f"""
+        City Overview:
+        {overview_str}
+
+        The following are batch summaries of {len(properties)} properties {context}. Combine them and provide recommendations, considering the city overview, specified price range, and any canton-specific factors:
+        {summaries}
+        """)
+
+    @traced("get_canton_statistics")
     def get_canton_statistics(self, canton: str) -> Dict:
         canton_code = get_canton_code(canton)
         canton_name = get_canton_name(canton_code)
         
         default_item = {"header": "Data Unavailable", "subheader": "Unable to retrieve information"}
+
+        stats = self._precomputed_stats("canton", canton_code)
+        if stats:
+            return {"canton_name": canton_name, "real_estate_statistics": self._canton_statistic_items(stats)}
         
         try:
             urls = [f"https://www.homegate.ch/market-analysis/canton-{canton_code.lower()}"]
             
             prompt = f"Extract information on property types, price ranges, market activity, construction projects, and key regulations for the canton of {canton_name}"
             
-            response = self.firecrawl.extract(urls, {
-                'prompt': prompt,
-                'schema': LocationsResponse.model_json_schema(),
-            })
+            response = self._extract("get_canton_statistics", urls, prompt, LOCATIONS_SCHEMA)
             stats = response['data']['locations']
             
             canton_data = next((loc for loc in stats if loc['location'].lower() == canton_name.lower()), None)
@@ -357,5 +797,6 @@ class SwissPropertyAgent:
             return {"canton_name": canton_name, "real_estate_statistics": real_estate_statistics}
         
         except Exception as e:
-            print(f"Error getting canton statistics: {str(e)}")
+            mark_error(e)
+            logging.error(f"Error getting canton statistics: {str(e)}")
             return {"canton_name": canton_name, "real_estate_statistics": [default_item] * 5}
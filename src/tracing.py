@@ -0,0 +1,314 @@
+import contextvars
+import functools
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Upper bounds (seconds) of the duration histogram buckets exported to Prometheus
+DURATION_BUCKETS = (0.005, 0.025, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Fraction of raw API payloads written to the debug log, and the maximum characters logged per payload
+DEFAULT_PAYLOAD_SAMPLE_RATE = 0.05
+DEFAULT_PAYLOAD_MAX_CHARS = 2000
+METRIC_PREFIX = "swiss_re"
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    """A timed operation. Start and end are perf_counter() readings, comparable across threads."""
+
+    __slots__ = ("name", "span_id", "parent_id", "trace", "start", "end", "attributes", "error", "thread")
+
+    def __init__(self, name: str, parent: Optional["Span"], trace: Optional["Trace"], attributes: Dict[str, Any]):
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.trace = trace
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        self.thread = threading.current_thread().name
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace.trace_id if self.trace else None,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration": self.duration,
+            "thread": self.thread,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class Trace:
+    """All spans recorded under one root span, e.g. a single search in the UI."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.trace_id = uuid.uuid4().hex
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def waterfall(self) -> List[Dict[str, Any]]:
+        """Finished spans ordered by start time, with offsets relative to the trace start and nesting depth."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start)
+        if not spans:
+            return []
+        origin = spans[0].start
+        depths: Dict[str, int] = {}
+        rows = []
+        for span in spans:
+            depth = depths.get(span.parent_id, -1) + 1 if span.parent_id else 0
+            depths[span.span_id] = depth
+            rows.append({"name": span.name, "depth": depth, "offset": span.start - origin, "duration": span.duration,
+                         "error": span.error, "attributes": dict(span.attributes)})
+        return rows
+
+
+class _SpanStats:
+    __slots__ = ("count", "errors", "duration_sum", "buckets", "payload_bytes", "cache")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.duration_sum = 0.0
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.payload_bytes = 0
+        self.cache: Dict[str, int] = {}
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """
+    Records spans around agent methods and remote calls.
+
+    Every finished span updates per-name aggregates (count, errors, duration histogram, payload bytes,
+    cache results) exported in Prometheus text format, is kept in a bounded ring of recent spans and,
+    when a JSON log path is configured, appended to it as one JSON line.
+    """
+
+    def __init__(self, max_recent_spans: int = 1000, json_log_path: Optional[str] = None):
+        self.recent: "deque[Span]" = deque(maxlen=max_recent_spans)
+        self.json_log_path = json_log_path
+        self._stats: Dict[str, _SpanStats] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span]:
+        parent = _current_span.get()
+        with self._activate(Span(name, parent, parent.trace if parent else None, attributes)) as span:
+            yield span
+
+    @contextmanager
+    def trace(self, name: str, **attributes) -> Iterator[Trace]:
+        """Start a new trace whose root span is `name`; spans opened inside it, in any propagated thread, belong to it."""
+        trace = Trace(name)
+        with self._activate(Span(name, None, trace, attributes)):
+            yield trace
+
+    @contextmanager
+    def _activate(self, span: Span) -> Iterator[Span]:
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {str(e)}"
+            raise
+        finally:
+            _current_span.reset(token)
+            self._finish(span)
+
+    def _finish(self, span: Span) -> None:
+        span.end = time.perf_counter()
+        duration = span.end - span.start
+        if span.trace is not None:
+            span.trace.add(span)
+        with self._lock:
+            self.recent.append(span)
+            stats = self._stats.get(span.name)
+            if stats is None:
+                stats = self._stats[span.name] = _SpanStats()
+            stats.count += 1
+            stats.errors += span.error is not None
+            stats.duration_sum += duration
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    stats.buckets[index] += 1
+            stats.payload_bytes += span.attributes.get("payload_bytes", 0)
+            cache_result = span.attributes.get("cache")
+            if cache_result:
+                stats.cache[cache_result] = stats.cache.get(cache_result, 0) + 1
+        if self.json_log_path:
+            self._write_json(span)
+
+    def _write_json(self, span: Span) -> None:
+        try:
+            line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+            with self._lock, open(self.json_log_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            logger.warning(f"Unable to write span to {self.json_log_path}: {str(e)}")
+
+    def prometheus_text(self) -> str:
+        """Aggregated span metrics in the Prometheus text exposition format."""
+        lines = [
+            f"# HELP {METRIC_PREFIX}_span_duration_seconds Duration of agent methods and remote calls",
+            f"# TYPE {METRIC_PREFIX}_span_duration_seconds histogram",
+        ]
+        with self._lock:
+            stats = sorted(self._stats.items())
+            for name, s in stats:
+                for bound, count in zip(DURATION_BUCKETS, s.buckets):
+                    lines.append(f'{METRIC_PREFIX}_span_duration_seconds_bucket{{span="{name}",le="{bound}"}} {count}')
+                lines.append(f'{METRIC_PREFIX}_span_duration_seconds_bucket{{span="{name}",le="+Inf"}} {s.count}')
+                lines.append(f'{METRIC_PREFIX}_span_duration_seconds_sum{{span="{name}"}} {s.duration_sum:.6f}')
+                lines.append(f'{METRIC_PREFIX}_span_duration_seconds_count{{span="{name}"}} {s.count}')
+            lines.append(f"# TYPE {METRIC_PREFIX}_span_errors_total counter")
+            lines.extend(f'{METRIC_PREFIX}_span_errors_total{{span="{name}"}} {s.errors}' for name, s in stats)
+            lines.append(f"# TYPE {METRIC_PREFIX}_payload_bytes_total counter")
+            lines.extend(f'{METRIC_PREFIX}_payload_bytes_total{{span="{name}"}} {s.payload_bytes}'
+                         for name, s in stats if s.payload_bytes)
+            lines.append(f"# TYPE {METRIC_PREFIX}_cache_requests_total counter")
+            lines.extend(f'{METRIC_PREFIX}_cache_requests_total{{span="{name}",result="{result}"}} {count}'
+                         for name, s in stats for result, count in sorted(s.cache.items()))
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per-span counters as plain numbers, e.g. for JSON output."""
+        with self._lock:
+            return {name: {"count": s.count, "errors": s.errors, "duration_sum": s.duration_sum,
+                           "payload_bytes": s.payload_bytes, **{f"cache_{k}": v for k, v in s.cache.items()}}
+                    for name, s in self._stats.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self.recent.clear()
+
+
+tracer = Tracer(json_log_path=os.getenv("TRACE_LOG_PATH") or None)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator recording a span around every call of the function."""
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def annotate(**attributes) -> None:
+    """Add attributes to the active span; a no-op outside of one (e.g. on background refresh threads)."""
+    span = _current_span.get()
+    if span is not None:
+        span.attributes.update(attributes)
+
+
+def mark_error(error: BaseException) -> None:
+    """Flag the active span as failed for errors that are handled instead of raised."""
+    span = _current_span.get()
+    if span is not None:
+        span.error = f"{type(error).__name__}: {str(error)}"
+
+
+def propagate(func: Callable) -> Callable:
+    """Bind `func` to the caller's trace context so spans opened on a worker thread nest under the caller's span."""
+    context = contextvars.copy_context()
+    return functools.partial(context.run, func)
+
+
+def log_payload(label: str, payload: Any, sample_rate: Optional[float] = None, max_chars: Optional[int] = None) -> None:
+    """
+    Log a raw API payload at DEBUG level, sampled and truncated.
+
+    The payload is only converted to text when debug logging is enabled and the call is sampled, so large
+    responses cost nothing on the hot path.
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    rate = sample_rate if sample_rate is not None else float(os.getenv("TRACE_PAYLOAD_SAMPLE_RATE", DEFAULT_PAYLOAD_SAMPLE_RATE))
+    if random.random() >= rate:
+        return
+    limit = max_chars if max_chars is not None else int(os.getenv("TRACE_PAYLOAD_MAX_CHARS", DEFAULT_PAYLOAD_MAX_CHARS))
+    text = str(payload)
+    if len(text) > limit:
+        text = f"{text[:limit]}… ({len(text) - limit} more characters)"
+    logger.debug(f"{label}: {text}")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = tracer.prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_metrics_server: Optional[ThreadingHTTPServer] = None
+_metrics_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: Optional[int] = None, host: str = "127.0.0.1") -> Optional[ThreadingHTTPServer]:
+    """
+    Serve the Prometheus metrics on http://host:port/metrics from a daemon thread.
+
+    The port defaults to the METRICS_PORT environment variable; without either, no server is started.
+    Safe to call repeatedly (e.g. on every Streamlit rerun): only the first call starts the server.
+    """
+    global _metrics_server
+    port = port if port is not None else int(os.getenv("METRICS_PORT", "0"))
+    if not port:
+        return None
+    with _metrics_server_lock:
+        if _metrics_server is None:
+            try:
+                _metrics_server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError as e:
+                logger.warning(f"Unable to start metrics server on port {port}: {str(e)}")
+                return None
+            threading.Thread(target=_metrics_server.serve_forever, name="metrics-server", daemon=True).start()
+            logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+        return _metrics_server
@@ -1,19 +1,37 @@
 import streamlit as st
-from src.swiss_real_estate_agent import SwissPropertyAgent
-from src.cantons import get_all_canton_names, get_canton_name, get_canton_code
+from src.cantons import CANTONS, get_canton_name
+from src.i18n import DEFAULT_LANGUAGE, LANGUAGE_OPTIONS, canton_display_name, translate_term, translations
 import os
 from dotenv import load_dotenv
-from PIL import Image, UnidentifiedImageError
-import requests
-from io import BytesIO
-from requests.exceptions import RequestException
+from src.tracing import start_metrics_server, tracer
+from src.backends import warm_up_backends
 import logging
+import bisect
+from concurrent.futures import ThreadPoolExecutor
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+RESULTS_PAGE_SIZE = 5
+# Search form values, kept under fixed keys so a language switch (which relabels the widgets) keeps them
+SEARCH_FORM_DEFAULTS = {"city": "", "min_price": 500000.0, "max_price": 2000000.0, "canton": "All"}
+
 st.set_page_config(page_title="Swiss Real Estate Agent", page_icon="🏡", layout="wide")
 
+def current_language():
+    # Set by the sidebar selector (key 'language') before the rerun starts, so widgets above it are translated too
+    return LANGUAGE_OPTIONS.get(st.session_state.get('language'), DEFAULT_LANGUAGE)
+
+def restore_search_form():
+    # A widget's identity includes its label; re-assigning the values carries them over to the relabelled widgets
+    for key, default in SEARCH_FORM_DEFAULTS.items():
+        st.session_state[key] = st.session_state.get(key, default)
+
+def text(key, **values):
+    # Per-language tables are compiled once per process; a language switch is a cached lookup
+    template = translations(current_language())[key]
+    return template.format(**values) if values else template
+
 # Load environment variables
 load_dotenv()
 
@@ -112,45 +130,90 @@ def apply_custom_css():
     </style>
     """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_shared_stores():
+    """
+    Extraction cache, listing database and market statistics shared by every Streamlit session of this process.
+
+    Both serialize access to their SQLite connection with a lock, so concurrent script threads can use them.
+    """
+    # Imported here rather than at module load: they pull in NumPy, so the first page paints without them
+    from src.extraction_cache import ExtractionCache
+    from src.heatmap import MarketHeatmap
+    from src.listing_db import ListingDatabase
+    from src.market_stats import MarketStatistics
+    from src.saved_searches import SavedSearchStore
+
+    stores = {}
+    for name, factory in (("cache", ExtractionCache), ("listing_db", ListingDatabase), ("saved_searches", SavedSearchStore)):
+        try:
+            stores[name] = factory()
+        except Exception as e:
+            logging.warning(f"Shared {name} unavailable: {str(e)}")
+            stores[name] = None
+    # Built once per process from the listing database, then kept up to date incrementally
+    stores["market_stats"] = MarketStatistics(stores["listing_db"])
+    # Tiles are precomputed off the request path and rebuilt in the background when listings change
+    stores["heatmap"] = MarketHeatmap(stores["market_stats"])
+    get_warm_up_executor().submit(stores["heatmap"].refresh)
+    return stores
+
+@st.cache_resource
+def get_warm_up_executor():
+    """
+    Background threads that prepare slow objects while the first page renders.
+
+    The SDK imports and shared clients are started once per process; each session's agent is
+    constructed as soon as its first page loads, so the first search does not wait for it.
+    """
+    executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="warm-up")
+    executor.submit(warm_up_backends)
+    return executor
+
+def build_property_agent(stores):
+    # Firecrawl and OpenAI connection pools are process-wide (see src/backends.py); only the
+    # per-user state (listing store, LLM conversation) is created for each session
+    # The agent (pydantic schemas, NumPy tables) is imported by the warm-up thread, not at module load
+    from src.swiss_real_estate_agent import SwissPropertyAgent
+
+    return SwissPropertyAgent(
+        model_id="gpt-4o",
+        cache=stores["cache"], use_cache=stores["cache"] is not None,
+        listing_db=stores["listing_db"], use_listing_db=stores["listing_db"] is not None,
+        market_stats=stores["market_stats"],
+    )
+
+def warm_property_agent():
+    if 'property_agent' not in st.session_state and 'property_agent_future' not in st.session_state:
+        st.session_state.property_agent_future = get_warm_up_executor().submit(build_property_agent, get_shared_stores())
+
 def create_property_agent():
     if 'property_agent' not in st.session_state:
+        future = st.session_state.pop('property_agent_future', None)
         try:
-            st.session_state.property_agent = SwissPropertyAgent(model_id="gpt-4o")
+            st.session_state.property_agent = future.result() if future is not None else build_property_agent(get_shared_stores())
         except ValueError as e:
-            st.error(f"Error initializing SwissPropertyAgent: {str(e)}")
+            st.error(text("agent_error", error=str(e)))
             st.session_state.property_agent = None
 
-def load_image(url, max_retries=3):
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            img = Image.open(BytesIO(response.content))
-            img.load()  # This will raise an exception for corrupt images
-            return img
-        except RequestException as e:
-            logging.error(f"Network error loading image from {url}: {str(e)}")
-        except UnidentifiedImageError:
-            logging.error(f"Unidentified image format from {url}")
-        except Exception as e:
-            logging.error(f"Error loading image from {url}: {str(e)}")
-        
-        if attempt < max_retries - 1:
-            logging.info(f"Retrying image load from {url} (attempt {attempt + 2}/{max_retries})")
-    
-    logging.warning(f"Failed to load image from {url} after {max_retries} attempts")
-    return None  # Return None for failed image loads
+def load_image(url):
+    from src.image_cache import get_thumbnail_cache
+
+    # Thumbnails come from the shared memory/disk cache; only uncached images are downloaded
+    return get_thumbnail_cache().get(url)
+
+def prefetch_images(properties):
+    from src.image_cache import get_thumbnail_cache
+
+    # Download a whole result page concurrently before the cards render
+    return get_thumbnail_cache().prefetch(property.get('image_url') for property in properties)
 
 def display_property(property):
-    price = property['price']
-    if not price.startswith('CHF'):
-        price = f"CHF {price}"
-    
-    # Remove 'CHF' and any commas, then convert to float
-    numeric_price = float(price.replace('CHF', '').replace(',', '').strip())
-    
-    # Format the price with commas for display
-    formatted_price = f"{numeric_price:,.0f}"
+    from src.listing_table import numeric_fields
+
+    # Portals format prices as "CHF 1,250,000", "1'250'000" or "Price on request"; show the raw text when unparseable
+    numeric_price = numeric_fields(property)[0]
+    formatted_price = f"CHF {numeric_price:,.0f}" if numeric_price != float('inf') else (property.get('price') or text("price_on_request"))
     
     st.markdown("<div class='property-card'>", unsafe_allow_html=True)
     
@@ -173,31 +236,26 @@ def display_property(property):
     with col2:
         st.markdown(f"<h3 class='property-title'>{property['building_name']}</h3>", unsafe_allow_html=True)
         
-        st.markdown(f"<p class='property-detail-item' style='font-size: 24px;'>📍 <strong>Location:</strong> {property['location_address']}</p>", unsafe_allow_html=True)
-        st.markdown(f"<p class='property-detail-item' style='font-size: 24px;'>🏠 <strong>Type:</strong> {property['property_type']}</p>", unsafe_allow_html=True)
-        st.markdown(f"<p class='property-detail-item' style='font-size: 24px;'>📐 <strong>Size:</strong> {property.get('size', 'N/A')}</p>", unsafe_allow_html=True)
-        st.markdown(f"<p class='property-detail-item' style='font-size: 24px;'>🛏️ <strong>Rooms:</strong> {property.get('rooms', 'N/A')}</p>", unsafe_allow_html=True)
+        st.markdown(f"<p class='property-detail-item' style='font-size: 24px;'>📍 <strong>{text('location')}:</strong> {property['location_address']}</p>", unsafe_allow_html=True)
+        st.markdown(f"<p class='property-detail-item' style='font-size: 24px;'>🏠 <strong>{text('type')}:</strong> {property['property_type']}</p>", unsafe_allow_html=True)
+        st.markdown(f"<p class='property-detail-item' style='font-size: 24px;'>📐 <strong>{text('size')}:</strong> {property.get('size') or text('not_available')}</p>", unsafe_allow_html=True)
+        st.markdown(f"<p class='property-detail-item' style='font-size: 24px;'>🛏️ <strong>{text('rooms')}:</strong> {property.get('rooms') or text('not_available')}</p>", unsafe_allow_html=True)
         
-        st.markdown(f"<h4 class='property-detail-item' style='font-size: 24px;'>📝 <strong>Description:</strong></h4>", unsafe_allow_html=True)
+        st.markdown(f"<h4 class='property-detail-item' style='font-size: 24px;'>📝 <strong>{text('description')}:</strong></h4>", unsafe_allow_html=True)
         st.markdown(f"<p class='property-description'>{property['description']}</p>", unsafe_allow_html=True)
         
         st.markdown("<div class='price-button-container'>", unsafe_allow_html=True)
-        st.markdown(f"<h4 class='property-price'>CHF {formatted_price}</h4>", unsafe_allow_html=True)
-        st.markdown(f"<a href='{property['listing_url']}' class='view-listing-button' target='_blank'>View Listing</a>", unsafe_allow_html=True)
+        st.markdown(f"<h4 class='property-price'>{formatted_price}</h4>", unsafe_allow_html=True)
+        st.markdown(f"<a href='{property['listing_url']}' class='view-listing-button' target='_blank'>{text('view_listing')}</a>", unsafe_allow_html=True)
         st.markdown("</div>", unsafe_allow_html=True)
     
     st.markdown("</div>", unsafe_allow_html=True)
 
 def parse_price(price_str):
-    if price_str == 'Price on request':
-        return float('inf')
-    # Remove 'CHF', commas, and any other non-numeric characters (except '.')
-    cleaned_price = ''.join(char for char in price_str if char.isdigit() or char == '.')
-    try:
-        return float(cleaned_price)
-    except ValueError:
-        # If we can't parse the price, return infinity so it appears at the end of sorted lists
-        return float('inf')
+    from src.listing_table import parse_price as parse_listing_price
+
+    # Unparseable prices ("Price on request") parse to infinity so they appear at the end of sorted lists
+    return parse_listing_price(price_str)
 
 def display_bullet_points(data, title):
     st.subheader(title)
@@ -214,90 +272,260 @@ def get_emoji_for_key(key):
     }
     return emoji_map.get(key, "•")
 
+def localize_city_value(key, value, language):
+    # The overview comes from the municipality catalog in English; cantons, regions and languages have translations
+    if key == "Canton" and isinstance(value, str):
+        return canton_display_name(value, language)
+    if key == "Geographic Location" and isinstance(value, str):
+        return translate_term(value, language)
+    if key == "Main Language(s)" and isinstance(value, (str, list, tuple)):
+        items = value.split(", ") if isinstance(value, str) else value
+        return ", ".join(translate_term(str(item), language) for item in items)
+    return value
+
 def render_city_overview(city_overview):
-    st.markdown("<h2 style='font-size: 28px;'>🏙️ City Overview</h2>", unsafe_allow_html=True)
+    language = current_language()
+    labels = translations(language)
+    st.markdown(f"<h2 style='font-size: 28px;'>{text('panel_city_overview')}</h2>", unsafe_allow_html=True)
     for key, value in city_overview.items():
         emoji = get_emoji_for_key(key)
-        st.markdown(f"<p style='font-size: 24px;'>{emoji} <strong>{key}:</strong> {value}</p>", unsafe_allow_html=True)
+        value = localize_city_value(key, value, language)
+        st.markdown(f"<p style='font-size: 24px;'>{emoji} <strong>{labels.get(key, key)}:</strong> {value}</p>", unsafe_allow_html=True)
+
+def render_results_page(placeholder, sorted_properties, page):
+    start = page * RESULTS_PAGE_SIZE
+    page_properties = sorted_properties[start:start + RESULTS_PAGE_SIZE]
+    with placeholder.container():
+        # Only the visible page is downloaded and rendered
+        prefetch_images(page_properties)
+        for property in page_properties:
+            display_property(property)
+        if page_properties:
+            st.write(text("showing_range", first=start + 1, last=start + len(page_properties), total=len(sorted_properties)))
+
+def set_results_page(page):
+    st.session_state.results_page = page
+
+def render_pagination(total, page):
+    page_count = max(1, -(-total // RESULTS_PAGE_SIZE))
+    if page_count <= 1:
+        return
+    col_prev, col_info, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        st.button(text("previous_page"), disabled=page == 0, on_click=set_results_page, args=(page - 1,), key="results_prev")
+    with col_info:
+        st.write(text("page_of", page=page + 1, pages=page_count))
+    with col_next:
+        st.button(text("next_page"), disabled=page >= page_count - 1, on_click=set_results_page, args=(page + 1,), key="results_next")
 
 def search_properties(city, min_price, max_price, canton, debug_mode):
+    from src.listing_table import numeric_fields
+
     selected_canton = None if canton == "All" else canton
     num_results = 10
-    with st.spinner('Searching for properties...'):
-        properties = st.session_state.property_agent.find_properties(city, min_price, max_price, selected_canton, num_results=num_results)
+    page = st.session_state.get('results_page', 0)
+
+    status = st.empty()
+    results_placeholder = st.empty()
+    status.info(text("searching"))
+
+    # Listings arrive per portal; keep them in ascending price order as they are inserted
+    sorted_properties = []
+    sorted_prices = []
+    page_end = (page + 1) * RESULTS_PAGE_SIZE
+    for property in st.session_state.property_agent.iter_properties(city, min_price, max_price, selected_canton, num_results=num_results):
+        price = numeric_fields(property)[0]
+        position = bisect.bisect_right(sorted_prices, price)
+        sorted_prices.insert(position, price)
+        sorted_properties.insert(position, property)
+        if position < page_end:
+            render_results_page(results_placeholder, sorted_properties, page)
+        status.info(text("searching_found", count=len(sorted_properties)))
+    status.empty()
     
     if debug_mode:
-        st.write(f"Raw properties data: {properties}")
+        st.write(f"Raw properties data: {sorted_properties}")
+        st.write(f"Per-portal latency (s): {st.session_state.property_agent.last_source_latencies}")
     
-    if properties:
-        # Sort properties from lowest to highest price
-        sorted_properties = sorted(properties, key=lambda x: parse_price(x['price']))
-        
-        # Display all properties without pagination
-        for property in sorted_properties:
-            display_property(property)
-        
-        st.write(f"Showing {len(sorted_properties)} properties")
+    render_search_results(results_placeholder, sorted_properties, page, (city, min_price, max_price, canton), debug_mode)
+    return selected_canton, sorted_properties
+
+def render_search_results(placeholder, sorted_properties, page, search, debug_mode):
+    if sorted_properties:
+        render_results_page(placeholder, sorted_properties, page)
+        render_pagination(len(sorted_properties), page)
     else:
-        st.error("No properties found. Please try adjusting your search criteria.")
+        city, min_price, max_price, canton = search
+        st.error(text("no_results"))
         if debug_mode:
             st.write("Debug information:")
             st.write(f"City: {city}")
             st.write(f"Price Range: {min_price} - {max_price} CHF")
             st.write(f"Canton: {canton}")
-    
-    return selected_canton
 
-def display_city_overview(city, selected_canton, debug_mode):
-    with st.spinner("🏙️ Fetching City Overview..."):
-        try:
-            if not city or not selected_canton:
-                st.warning("Both city and canton must be selected to display the city overview.")
-                return
-
-            logging.info(f"Fetching city overview for {city}, {selected_canton}")
-            city_overview = st.session_state.property_agent.get_city_overview(city, selected_canton)
-            
-            if city_overview:
-                logging.info(f"City overview fetched successfully for {city}, {selected_canton}")
-                render_city_overview(city_overview)
-            else:
-                logging.warning(f"No city overview data available for {city}, {selected_canton}")
-                st.warning("No city overview data available for the selected city and canton.")
-        except ValueError as e:
-            logging.error(f"Invalid input for city overview: {str(e)}")
-            st.error(f"Error fetching city overview: {str(e)}")
-        except Exception as e:
-            logging.error(f"Error fetching city overview for {city}, {selected_canton}: {str(e)}")
-            st.error("An unexpected error occurred while fetching the city overview. Please try again.")
-        
-        if debug_mode:
-            st.write("Debug information:")
-            st.write(f"City: {city}")
-            st.write(f"Canton: {selected_canton}")
+# Dashboard section -> title string key
+DASHBOARD_PANELS = {
+    "city_overview": "panel_city_overview",
+    "location_trends": "panel_location_trends",
+    "canton_statistics": "panel_canton_statistics",
+}
+
+def start_dashboard(city, min_price, max_price, canton):
+    # Runs concurrently with the property search; collected by display_dashboard afterwards
+    selected_canton = None if canton == "All" else canton
+    return st.session_state.property_agent.submit_dashboard(city, min_price, max_price, selected_canton, sections=tuple(DASHBOARD_PANELS))
+
+def render_dashboard_section(section, data):
+    if section == "city_overview":
+        render_city_overview(data)
+    elif section == "location_trends":
+        display_bullet_points(data["market_trends"], text(DASHBOARD_PANELS[section]))
+    elif section == "canton_statistics":
+        canton_name = canton_display_name(data['canton_name'], current_language())
+        display_bullet_points(data["real_estate_statistics"], text("canton_statistics_title", canton=canton_name))
+
+def display_dashboard(pending, city, selected_canton, debug_mode):
+    if not city or not selected_canton:
+        st.warning(text("overview_needs_canton"))
+
+    # Fixed slots keep the layout stable while sections arrive in completion order
+    placeholders = {section: st.empty() for section in DASHBOARD_PANELS if section in pending}
+    for section, placeholder in placeholders.items():
+        placeholder.info(text("panel_loading", panel=text(DASHBOARD_PANELS[section])))
+
+    pieces = []
+    for piece in st.session_state.property_agent.collect_dashboard(pending):
+        section = piece["section"]
+        if piece["error"]:
+            logging.error(f"Error fetching {section} for {city}, {selected_canton}: {piece['error']}")
+        else:
+            logging.info(f"{section} fetched for {city}, {selected_canton} in {piece['latency']:.2f}s")
+        with placeholders[section].container():
+            render_dashboard_piece(piece, debug_mode)
+        pieces.append(piece)
+    return pieces
+
+def render_dashboard_piece(piece, debug_mode):
+    section = piece["section"]
+    if piece["error"]:
+        st.warning(text("panel_unavailable", panel=text(DASHBOARD_PANELS[section])))
+    else:
+        render_dashboard_section(section, piece["data"])
+    if debug_mode:
+        st.write(f"Debug: {section} took {piece['latency']:.2f}s")
+
+def redisplay_dashboard(pieces, city, selected_canton, debug_mode):
+    if not city or not selected_canton:
+        st.warning(text("overview_needs_canton"))
+    order = list(DASHBOARD_PANELS)
+    for piece in sorted(pieces, key=lambda piece: order.index(piece["section"])):
+        render_dashboard_piece(piece, debug_mode)
+
+HEATMAP_LOW_COLOR = (34, 197, 94)
+HEATMAP_HIGH_COLOR = (220, 38, 38)
+
+def heatmap_color(fraction):
+    return [round(low + (high - low) * fraction) for low, high in zip(HEATMAP_LOW_COLOR, HEATMAP_HIGH_COLOR)] + [170]
+
+def render_heatmap():
+    import pandas as pd
+
+    tiles = get_shared_stores()["heatmap"].tiles()
+    cells = [cell for cell in tiles.cells() if cell["price_per_sqm"] is not None]
+    if not cells:
+        st.info(text("heatmap_empty"))
+        return
+    values = sorted(cell["price_per_sqm"] for cell in cells)
+    # Colours are scaled between the 5th and 95th percentile so a few extreme cells do not wash out the map
+    low, high = values[int(0.05 * (len(values) - 1))], values[int(0.95 * (len(values) - 1))]
+    for cell in cells:
+        cell["color"] = heatmap_color(min(1.0, max(0.0, (cell["price_per_sqm"] - low) / (high - low or 1.0))))
+        cell["size"] = tiles.cell_km * 450
+    st.caption(text("heatmap_caption", cell_km=f"{tiles.cell_km:g}", listings=f"{tiles.total_listings:,}",
+                    low=f"{low:,.0f}", high=f"{high:,.0f}"))
+    st.map(pd.DataFrame(cells), latitude="latitude", longitude="longitude", color="color", size="size")
+    language = current_language()
+    rows = [{text("canton"): get_canton_name(code, language), text("listings"): figures["listings"],
+             text("median_price_per_sqm"): None if figures["price_per_sqm"] != figures["price_per_sqm"] else round(figures["price_per_sqm"])}
+            for code, figures in tiles.cantons.items()]
+    st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+
+def save_search(city, min_price, max_price, canton):
+    store = get_shared_stores()["saved_searches"]
+    try:
+        store.add(city, min_price, max_price, None if canton == "All" else canton)
+        st.success(text("search_saved", city=city))
+    except ValueError as e:
+        st.error(str(e))
+
+def render_notifications():
+    store = get_shared_stores()["saved_searches"]
+    if store is None:
+        return
+    # Filled by the saved-search scheduler (python -m src.saved_searches run)
+    notifications = store.pending(limit=20)
+    st.sidebar.markdown("---")
+    st.sidebar.markdown(f"### {text('new_listings', count=store.pending_count())}")
+    if not notifications:
+        st.sidebar.caption(text("no_new_listings"))
+        return
+    for notification in notifications:
+        listing = notification["listing"]
+        st.sidebar.markdown(f"**{listing.get('building_name')}**, {listing.get('price')}  \n"
+                            f"{notification['search']} · [{text('view_listing')}]({listing.get('listing_url')})")
+    if st.sidebar.button(text("mark_as_read")):
+        store.mark_delivered([notification["notification_id"] for notification in notifications])
+        st.rerun()
+
+def render_waterfall(trace):
+    rows = trace.waterfall()
+    if not rows:
+        return
+    total = max(row["offset"] + row["duration"] for row in rows) or 1.0
+    st.markdown("#### ⏱️ Request waterfall")
+    for row in rows:
+        left = row["offset"] / total * 100
+        width = max(row["duration"] / total * 100, 0.5)
+        color = "#dc2626" if row["error"] else "#2563eb"
+        details = ", ".join(f"{k}={v}" for k, v in row["attributes"].items())
+        st.markdown(f"""
+        <div style='display: flex; align-items: center; font-size: 13px;'>
+            <div style='width: 35%; padding-left: {row["depth"] * 12}px; white-space: nowrap; overflow: hidden;' title='{details}'>{row["name"]} <span style='color: #6b7280;'>{row["duration"] * 1000:,.0f} ms</span></div>
+            <div style='width: 65%; background: #f3f4f6; height: 12px; position: relative;'>
+                <div style='position: absolute; left: {left:.2f}%; width: {width:.2f}%; height: 12px; background: {color};'></div>
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
 
 def main():
     apply_custom_css()
+    # Prometheus metrics endpoint, only when METRICS_PORT is set
+    start_metrics_server()
+    warm_property_agent()
+    restore_search_form()
     
     with st.sidebar:
-        st.title("🔑 Configuration")
-        st.info("API keys are loaded from environment variables.")
+        st.title(text("configuration"))
+        st.info(text("api_keys_info"))
         
-        language = st.selectbox("Language / Sprache / Langue / Lingua", ["English", "Deutsch", "Français", "Italiano"])
-        debug_mode = st.checkbox("Debug Mode")
+        st.selectbox("Language / Sprache / Langue / Lingua", list(LANGUAGE_OPTIONS), key="language")
+        debug_mode = st.checkbox(text("debug_mode"))
     
-    st.markdown("<h1 class='app-header'>🏠 Swiss Property Finder</h1>", unsafe_allow_html=True)
+    language = current_language()
+    st.markdown(f"<h1 class='app-header'>{text('app_title')}</h1>", unsafe_allow_html=True)
     
     st.markdown("<div class='centered-content'>", unsafe_allow_html=True)
     
-    city = st.text_input("City", placeholder="e.g., Zurich, Geneva")
-    min_price = st.number_input("Min Price (CHF)", min_value=0.0, step=100000.0, value=500000.0)
-    max_price = st.number_input("Max Price (CHF)", min_value=0.0, step=100000.0, value=2000000.0)
+    city = st.text_input(text("city"), placeholder=text("city_placeholder"), key="city")
+    min_price = st.number_input(text("min_price"), min_value=0.0, step=100000.0, key="min_price")
+    max_price = st.number_input(text("max_price"), min_value=0.0, step=100000.0, key="max_price")
     
-    canton = st.selectbox("Canton", ["All"] + get_all_canton_names())
+    # Options are canton codes, so the selection survives a language switch and needs no reverse lookup
+    canton = st.selectbox(text("canton"), ["All"] + list(CANTONS),
+                          format_func=lambda code: text("all_cantons") if code == "All" else get_canton_name(code, language), key="canton")
 
     selected_canton = None
-    if st.button("🔍 Search Properties"):
+    if st.button(text("search")):
         logging.info("Search button clicked")
         create_property_agent()
         if st.session_state.property_agent is None:
@@ -312,27 +540,56 @@ def main():
         
         if min_price >= max_price:
             logging.warning(f"Invalid price range: {min_price} - {max_price}")
-            st.error("Minimum price must be less than maximum price.")
+            st.error(text("invalid_price_range"))
+            st.session_state.active_search = None
+        else:
+            # Kept across reruns so pagination clicks and other widgets re-render the same results
+            st.session_state.active_search = (city, min_price, max_price, canton)
+            st.session_state.results_page = 0
+            # An explicit search always fetches again, even with unchanged parameters
+            st.session_state.pop('search_results', None)
+
+    active_search = st.session_state.get('active_search')
+    if active_search and st.session_state.get('property_agent') is not None:
+        city, min_price, max_price, canton = active_search
+        if get_shared_stores()["saved_searches"] is not None and city:
+            st.button(text("save_search"), on_click=save_search, args=active_search, key="save_search")
+        results = st.session_state.get('search_results')
+        if results is not None and results["search"] == active_search:
+            # Reruns from pagination or unrelated widgets render the stored results without calling the agent
+            render_search_results(st.empty(), results["properties"], st.session_state.get('results_page', 0),
+                                  active_search, debug_mode)
+            redisplay_dashboard(results["dashboard"], city, results["canton"], debug_mode)
+            trace = results["trace"]
         else:
             logging.info(f"Searching properties for {city}, {canton}, price range: {min_price} - {max_price}")
-            selected_canton = search_properties(city, min_price, max_price, canton, debug_mode)
-            logging.info(f"Displaying city overview for {city}, {selected_canton}")
-            display_city_overview(city, selected_canton, debug_mode)
+            with tracer.trace("search", city=city) as trace:
+                pending_dashboard = start_dashboard(city, min_price, max_price, canton)
+                selected_canton, properties = search_properties(city, min_price, max_price, canton, debug_mode)
+                logging.info(f"Displaying dashboard for {city}, {selected_canton}")
+                dashboard = display_dashboard(pending_dashboard, city, selected_canton, debug_mode)
+            # Stored only once complete; a rerun that interrupts the fetch starts it again
+            st.session_state.search_results = {"search": active_search, "canton": selected_canton,
+                                               "properties": properties, "dashboard": dashboard, "trace": trace}
+        if debug_mode:
+            render_waterfall(trace)
+
+    with st.expander(text("heatmap_title")):
+        render_heatmap()
+
+    render_notifications()
 
     st.sidebar.markdown("---")
-    st.sidebar.markdown("### Swiss Real Estate Regulations")
-    if st.sidebar.button("Show Regulations"):
+    st.sidebar.markdown(f"### {text('regulations_title')}")
+    if st.sidebar.button(text("show_regulations")):
         # This is a placeholder. In a real application, you would fetch this data from a reliable source.
-        st.sidebar.markdown("""
-        - Non-residents need a permit (Lex Koller) to buy property
-        - Annual property tax varies by canton
-        - Rental properties: Landlords can only increase rent with interest rate changes
-        """)
+        st.sidebar.markdown(text("regulations"))
         
         if canton != "All":
-            st.sidebar.markdown(f"### {canton} Specific Regulations")
+            canton_name = get_canton_name(canton, language)
+            st.sidebar.markdown(f"### {text('canton_regulations_title', canton=canton_name)}")
             # Placeholder for canton-specific regulations
-            st.sidebar.markdown(f"Displaying regulations specific to {canton}...")
+            st.sidebar.markdown(text("canton_regulations", canton=canton_name))
             # In a real application, you would fetch canton-specific regulations here
 
 if __name__ == "__main__":
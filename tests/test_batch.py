@@ -0,0 +1,66 @@
+import json
+import os
+
+import pytest
+
+from src.batch import BatchJob, BatchRunner, Checkpoint, ParquetSink, main, read_jobs
+
+
+def test_resume_removes_only_orphaned_parts(tmp_path):
+    pytest.importorskip("pyarrow")
+    output = tmp_path / "output"
+    (output / "subdirectory").mkdir(parents=True)
+    for name in ("notes.txt", "part-00000.parquet", "part-00001.parquet.tmp"):
+        (output / name).write_text("")
+
+    ParquetSink(str(output), Checkpoint(str(tmp_path / "checkpoint.jsonl")))
+
+    assert sorted(os.listdir(output)) == ["notes.txt", "subdirectory"]
+
+
+class FlakyAgent:
+    """Returns two listings per job; cities in `failing` fail until they are removed from it."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.searched = []
+
+    def find_properties(self, city, min_price, max_price, canton=None, num_results=10):
+        self.searched.append(city)
+        if city in self.failing:
+            return None
+        return [{"building_name": f"{city} {i}", "price": f"CHF {900_000 + i}", "size": "100 m²",
+                 "listing_url": f"https://example.ch/{city}/{i}"} for i in range(2)]
+
+
+def read_rows(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_rerun_skips_completed_jobs_and_retries_failed_ones(tmp_path):
+    output = str(tmp_path / "report.jsonl")
+    jobs = [BatchJob(city, None, 0, 2_000_000) for city in ("Zürich", "Bern", "Basel")]
+
+    agent = FlakyAgent(failing=["Bern"])
+    assert BatchRunner(agent, output, max_workers=2).run(jobs) == {"completed": 2, "skipped": 0, "failed": 1, "listings": 4}
+    # Rows of a job that was never checkpointed (an interrupted run) are discarded on resume
+    with open(output, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"job_id": "uncommitted", "city": "Luzern"}) + "\n")
+
+    agent.failing.clear()
+    assert BatchRunner(agent, output, max_workers=2).run(jobs) == {"completed": 1, "skipped": 2, "failed": 0, "listings": 2}
+    assert agent.searched.count("Bern") == 2 and agent.searched.count("Zürich") == 1
+    rows = read_rows(output)
+    assert sorted({row["city"] for row in rows}) == ["Basel", "Bern", "Zürich"] and len(rows) == 6
+
+
+def test_jobs_with_an_unknown_canton_are_rejected(tmp_path):
+    jobs_file = tmp_path / "jobs.csv"
+    jobs_file.write_text("city,canton,min_price,max_price\nZürich,Zurich,0,1000000\nBern,Bernese,0,1000000\n", encoding="utf-8")
+
+    with pytest.raises(ValueError, match=r"job 2: Unknown canton: Bernese"):
+        read_jobs(str(jobs_file), {"min_price": 0, "max_price": 1, "num_results": 10})
+    assert BatchJob("Zürich", "Zurich", 0, 1).canton == "ZH"
+    with pytest.raises(SystemExit):
+        main(["--jobs", str(jobs_file), "--output", str(tmp_path / "out.jsonl")])
@@ -0,0 +1,77 @@
+import random
+
+import numpy as np
+
+from src import comparables
+from src.comparables import ComparablesIndex, listing_location, property_category
+from src.swiss_cities_database import swiss_cities
+
+TOWNS = ("8001 Zürich", "8400 Winterthur", "3011 Bern", "1204 Genève", "4051 Basel")
+
+
+def listing(number: int, town: str, size: int, rooms: float, price: int, property_type: str = "Apartment") -> dict:
+    return {"building_name": f"Listing {number}", "property_type": property_type, "location_address": f"Street {number}, {town}",
+            "price": f"CHF {price:,}", "size": f"{size} m²", "rooms": str(rooms), "listing_url": f"https://example.ch/{number}"}
+
+
+def random_listings(count: int, seed: int = 5):
+    rng = random.Random(seed)
+    return [listing(i, rng.choice(TOWNS), rng.randint(40, 250), rng.choice((1.5, 2.5, 3.5, 4.5, 5.5)),
+                    rng.randint(300, 3000) * 1000, rng.choice(("Apartment", "Wohnung", "Villa", "Chalet")))
+            for i in range(count)]
+
+
+def brute_force(index: ComparablesIndex, listing: dict, k: int):
+    point = index.features(listing)
+    distances = [(float(np.linalg.norm(index.features(other) - point)), i) for i, other in enumerate(index.records)
+                 if other["listing_url"] != listing["listing_url"]]
+    return [index.records[i] for _, i in sorted(distances)[:k]]
+
+
+def test_property_category_understands_the_national_languages():
+    assert property_category("Wohnung") == property_category("Appartement") == "apartment"
+    assert property_category("Villa individuelle") == property_category("Rustico") == "house"
+    assert property_category("Parking space") is None and property_category(None) is None
+
+
+def test_listing_location_uses_the_address_before_the_searched_city():
+    winterthur, bern = swiss_cities.find("Winterthur"), swiss_cities.find("Bern")
+    assert listing_location({"location_address": "Seestrasse 1, 8400 Winterthur"}, "Bern") == (winterthur.latitude, winterthur.longitude)
+    assert listing_location({"location_address": "somewhere"}, "Bern") == (bern.latitude, bern.longitude)
+    assert listing_location({"location_address": "somewhere"}) is None
+
+
+def test_comparables_match_brute_force_while_buffered_and_after_rebuild(monkeypatch):
+    monkeypatch.setattr(comparables, "MIN_REBUILD", 100)
+    listings = random_listings(200)
+    index = ComparablesIndex(listings[:120])
+    index.add(listings[120:])
+    assert index._indexed == 120 and len(index) == 200
+
+    for probe in listings[::17]:
+        assert [c for c, _ in index.comparables(probe, k=4)] == brute_force(index, probe, 4)
+
+    index.comparables_many([])
+    assert index._indexed == 200
+    for probe in listings[::23]:
+        assert [c for c, _ in index.comparables(probe, k=4)] == brute_force(index, probe, 4)
+
+
+def test_comparables_skip_the_listing_itself_and_known_listings_are_not_added_twice():
+    listings = random_listings(30)
+    index = ComparablesIndex(listings)
+
+    assert index.add([dict(listings[0])]) == 0
+    assert all(c["listing_url"] != listings[0]["listing_url"] for c, _ in index.comparables(listings[0], k=29))
+    distances = [d for _, d in index.comparables(listings[0], k=10)]
+    assert distances == sorted(distances)
+
+
+def test_estimate_price_per_sqm_from_similar_listings():
+    listings = [listing(i, "8001 Zürich", 100, 3.5, 1_200_000 + 10_000 * i) for i in range(5)]
+    index = ComparablesIndex(listings + [listing(99, "1204 Genève", 300, 8.5, 9_000_000, "Villa")], include_price=False)
+
+    estimate = index.estimate_price_per_sqm(listing(50, "8001 Zürich", 100, 3.5, 0), k=5)
+
+    assert 12_000 <= estimate <= 12_400
+    assert ComparablesIndex().estimate_price_per_sqm(listings[0]) is None
@@ -0,0 +1,60 @@
+from src.dedup import ListingDeduplicator, address_key, deduplicate, merge_listings
+from src.ingest import ingest_properties
+
+DESCRIPTION = ("Bright 4.5 room apartment on the third floor with a large balcony facing the lake, "
+               "renovated kitchen, parquet floors throughout, cellar compartment and an underground parking space")
+
+
+def listing(url, address="Seefeldstrasse 120, 8008 Zürich", price="CHF 1'250'000", size="120 m²", **fields):
+    return dict({"building_name": "Seefeld", "property_type": "Apartment", "location_address": address, "canton": "ZH",
+                 "price": price, "size": size, "rooms": "4.5", "description": DESCRIPTION, "listing_url": url}, **fields)
+
+
+def test_address_key_normalizes_street_spelling():
+    assert address_key("Seefeldstrasse 120, 8008 Zürich") == address_key("Seefeldstr. 120, 8008 Zurich") == "seefeldstrasse 120 8008"
+    assert address_key("8008 Zürich") is None
+
+
+def test_same_address_and_matching_numbers_are_duplicates():
+    records = deduplicate([
+        listing("https://www.homegate.ch/1", size=None),
+        listing("https://www.comparis.ch/1", address="Seefeldstr. 120, 8008 Zurich", price="CHF 1'240'000"),
+        # Same building, but a different flat
+        listing("https://www.immoscout24.ch/1", price="CHF 2'100'000", size="190 m²"),
+    ])
+    assert [record["listing_url"] for record in records] == ["https://www.homegate.ch/1", "https://www.immoscout24.ch/1"]
+    assert records[0]["size"] == "120 m²" and records[0]["price"] == "CHF 1'250'000"
+    assert records[0]["alternate_urls"] == ["https://www.comparis.ch/1"]
+
+
+def test_near_duplicate_descriptions_match_without_an_address():
+    reworded = DESCRIPTION.replace("renovated kitchen", "newly renovated kitchen")
+    records = deduplicate([listing("https://www.homegate.ch/2", address="Zürich"),
+                           listing("https://www.comparis.ch/2", address="Zurich", description=reworded),
+                           listing("https://www.comparis.ch/3", address="Zurich", description="Detached chalet with garden")])
+    assert len(records) == 2 and records[0]["alternate_urls"] == ["https://www.comparis.ch/2"]
+
+
+def test_merge_returns_a_new_record_and_leaves_its_inputs_untouched():
+    for primary, duplicate in ((listing("https://www.homegate.ch/1", size=None, alternate_urls=["https://a.ch/1"]),
+                                listing("https://www.comparis.ch/1")),
+                               tuple(ingest_properties([listing("https://www.homegate.ch/1", size=None, alternate_urls=["https://a.ch/1"]),
+                                                        listing("https://www.comparis.ch/1")]))):
+        before = (dict(primary), list(primary["alternate_urls"]), dict(duplicate))
+        merged = merge_listings(primary, duplicate)
+
+        assert merged is not primary and merged["size"] == "120 m²"
+        assert merged["alternate_urls"] == ["https://a.ch/1", "https://www.comparis.ch/1"]
+        assert (dict(primary), list(primary["alternate_urls"]), dict(duplicate)) == before
+
+
+def test_deduplicator_replaces_the_canonical_record_on_merge():
+    deduplicator = ListingDeduplicator()
+    first = listing("https://www.homegate.ch/1", size=None)
+    assert deduplicator.add(first) == (0, True)
+    assert deduplicator.add(listing("https://www.comparis.ch/1")) == (0, False)
+    # The same URL again is recognized without comparing fields
+    assert deduplicator.add(listing("https://www.comparis.ch/1", price="CHF 9")) == (0, False)
+
+    assert deduplicator.records[0] is not first and first["size"] is None
+    assert deduplicator.records[0]["size"] == "120 m²"
@@ -0,0 +1,126 @@
+import threading
+
+import pytest
+
+from src import extraction_cache
+from src.extraction_cache import ExtractionCache, make_cache_key
+
+
+class Clock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(extraction_cache.time, "time", clock)
+    return clock
+
+
+def memory_cache(**kwargs) -> ExtractionCache:
+    return ExtractionCache(":memory:", ttls={"find": 60}, max_stale={"find": 120}, **kwargs)
+
+
+def test_cache_key_depends_on_urls_prompt_and_schema():
+    key = make_cache_key(["https://a.ch"], "prompt", {"type": "object", "required": ["a"]})
+    assert key == make_cache_key(["https://a.ch"], "prompt", {"required": ["a"], "type": "object"})
+    assert key != make_cache_key(["https://b.ch"], "prompt", {"type": "object", "required": ["a"]})
+    assert key != make_cache_key(["https://a.ch"], "other", {"type": "object", "required": ["a"]})
+
+
+def test_entries_are_fresh_then_stale_then_expired(clock):
+    cache = memory_cache()
+    cache.set("find", "k", {"listings": [1]})
+
+    clock.now += 59
+    assert cache.get("find", "k") == ({"listings": [1]}, False)
+    clock.now += 60
+    assert cache.get("find", "k") == ({"listings": [1]}, True)
+    clock.now += 62
+    assert cache.get("find", "k") == (None, False)
+    clock.now -= 100
+    assert cache.get("find", "k") == (None, False)  # the expired entry was deleted
+
+
+def test_unknown_methods_use_the_fallback_ttl(clock):
+    cache = memory_cache()
+    cache.set("other", "k", 1)
+    clock.now += extraction_cache.FALLBACK_TTL - 1
+    assert cache.get("other", "k") == (1, False)
+    clock.now += 2
+    assert cache.get("other", "k") == (None, False)
+
+
+def test_least_recently_used_entry_is_evicted_first(clock):
+    cache = memory_cache(max_entries=2)
+    cache.set("find", "a", "A")
+    clock.now += 1
+    cache.set("find", "b", "B")
+    clock.now += 1
+    cache.get("find", "a")
+    clock.now += 1
+    cache.set("find", "c", "C")
+
+    assert cache.get("find", "b") == (None, False)
+    assert cache.get("find", "a")[0] == "A" and cache.get("find", "c")[0] == "C"
+
+
+def test_byte_limit_evicts_until_the_total_fits(clock):
+    cache = memory_cache(max_bytes=25)
+    for key in "abc":
+        cache.set("find", key, key * 8)  # 10 bytes serialized
+        clock.now += 1
+
+    assert [cache.get("find", key)[0] for key in "abc"] == [None, "b" * 8, "c" * 8]
+
+
+def test_entries_survive_a_restart(tmp_path):
+    path = str(tmp_path / "cache" / "extractions.sqlite3")
+    ExtractionCache(path).set("find_properties", "k", ["listing"])
+    assert ExtractionCache(path).get("find_properties", "k") == (["listing"], False)
+
+
+def test_get_or_extract_serves_stale_values_and_refreshes_once(clock):
+    cache = memory_cache()
+    calls, release = [], threading.Event()
+
+    def extract():
+        calls.append(len(calls))
+        if len(calls) > 1:
+            release.wait(5)
+        return f"value {len(calls)}"
+
+    assert cache.get_or_extract("find", ["https://a.ch"], "p", {}, extract) == "value 1"
+    assert cache.get_or_extract("find", ["https://a.ch"], "p", {}, extract) == "value 1" and len(calls) == 1
+
+    clock.now += 90
+    threads_before = set(threading.enumerate())
+    assert cache.get_or_extract("find", ["https://a.ch"], "p", {}, extract) == "value 1"
+    assert cache.get_or_extract("find", ["https://a.ch"], "p", {}, extract) == "value 1"
+    release.set()
+    for thread in set(threading.enumerate()) - threads_before:
+        thread.join(5)
+
+    assert len(calls) == 2
+    assert cache.get("find", make_cache_key(["https://a.ch"], "p", {})) == ("value 2", False)
+
+
+def test_failed_refresh_keeps_the_stale_value(clock, caplog):
+    cache = memory_cache()
+    cache.set("find", make_cache_key(["https://a.ch"], "p", {}), "old")
+    clock.now += 90
+
+    def extract():
+        raise RuntimeError("portal down")
+
+    threads_before = set(threading.enumerate())
+    assert cache.get_or_extract("find", ["https://a.ch"], "p", {}, extract) == "old"
+    for thread in set(threading.enumerate()) - threads_before:
+        thread.join(5)
+
+    assert cache.get("find", make_cache_key(["https://a.ch"], "p", {})) == ("old", True)
+    assert "portal down" in caplog.text
@@ -0,0 +1,32 @@
+import copy
+import math
+import pickle
+
+from src.ingest import PropertyRecord, ingest_properties, quarantine
+
+LISTING = {"building_name": "Seeblick", "property_type": "Apartment", "location_address": "Seestrasse 1, 8002 Zürich",
+           "canton": "ZH", "price": "CHF 1'250'000", "description": "Lake view", "size": "120 m²", "rooms": 4.5,
+           "listing_url": "https://www.homegate.ch/buy/1"}
+
+
+def test_ingest_parses_numbers_and_quarantines_invalid_rows():
+    quarantine.clear()
+    records = ingest_properties([LISTING, {"building_name": "No price"}, "not a listing"], source="test")
+
+    assert len(records) == 1 and quarantine.total == 2
+    record = records[0]
+    assert (record.price_chf, record.size_m2, record.rooms_count) == (1_250_000.0, 120.0, 4.5)
+    assert record["rooms"] == "4.5" and record["image_url"] is None
+    record["price"] = "Price on request"
+    assert math.isinf(record.price_chf)
+
+
+def test_copies_do_not_share_nested_values():
+    record = ingest_properties([dict(LISTING, alternate_urls=["https://www.comparis.ch/1"])])[0]
+
+    for duplicate in (record.copy(), copy.copy(record), copy.deepcopy(record), pickle.loads(pickle.dumps(record))):
+        assert duplicate == record and isinstance(duplicate, PropertyRecord)
+        duplicate["alternate_urls"].append("https://www.immoscout24.ch/1")
+        duplicate["price"] = "CHF 990'000"
+        assert record["alternate_urls"] == ["https://www.comparis.ch/1"]
+        assert record.price_chf == 1_250_000.0
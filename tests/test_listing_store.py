@@ -0,0 +1,49 @@
+import math
+
+from src.ingest import ingest_properties
+from src.listing_store import ListingStore
+
+
+def listing(number: int, price: str) -> dict:
+    return {"building_name": f"Listing {number}", "property_type": "Apartment", "location_address": f"Street {number}, 8000 Zürich",
+            "canton": "ZH", "price": price, "description": "", "listing_url": f"https://example.ch/{number}"}
+
+
+def test_table_is_a_snapshot_later_adds_do_not_change():
+    store = ListingStore()
+    store.add("Zurich", ingest_properties([listing(1, "CHF 900,000")]))
+    snapshot = store.table("Zurich")
+
+    store.add("Zurich", ingest_properties([listing(2, "CHF 1,100,000")]))
+
+    assert len(snapshot) == 1 and len(snapshot.price) == 1
+    assert len(store.table("Zurich")) == 2
+    assert len(store.table("Zurich").filter(1_000_000, 1_200_000)) == 1
+
+
+def test_merged_duplicate_does_not_change_an_earlier_snapshot():
+    store = ListingStore()
+    first = dict(listing(1, "CHF 900,000"), size=None)
+    store.add("Zurich", ingest_properties([first]))
+    snapshot = store.table("Zurich")
+
+    # The same flat on another portal, with the size the first one did not show
+    duplicate = dict(listing(1, "CHF 900,000"), size="100 m²", listing_url="https://other.example.ch/1")
+    canonical = store.add("Zurich", ingest_properties([duplicate]))
+
+    assert snapshot.records[0]["size"] is None and "alternate_urls" not in snapshot.records[0]
+    assert math.isnan(snapshot.size[0])
+    table = store.table("Zurich")
+    assert len(table) == 1 and table.size[0] == 100.0 and table.records[0] is canonical[0]
+    assert canonical[0]["alternate_urls"] == ["https://other.example.ch/1"]
+
+
+def test_listing_new_in_a_batch_is_stored_with_later_merges_from_the_same_batch():
+    store = ListingStore()
+    duplicate = dict(listing(1, "CHF 900,000"), listing_url="https://other.example.ch/1")
+    canonical = store.add("Zurich", ingest_properties([dict(listing(1, "CHF 900,000"), size=None),
+                                                       dict(duplicate, size="100 m²")]))
+
+    table = store.table("Zurich")
+    assert len(canonical) == 1 and table.records[0] is canonical[0]
+    assert table.size[0] == 100.0 and canonical[0]["alternate_urls"] == ["https://other.example.ch/1"]
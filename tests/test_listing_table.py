@@ -0,0 +1,77 @@
+import math
+
+import numpy as np
+
+from src.listing_table import ListingTable, numeric_fields, parse_number, parse_price
+
+
+def listing(price, canton="ZH", size=None, rooms=None) -> dict:
+    return {"price": price, "size": size, "rooms": rooms, "canton": canton}
+
+
+def test_parse_number_handles_swiss_formats():
+    assert parse_number("CHF 1'250'000.-") == 1_250_000
+    assert parse_number("1,250,000") == 1_250_000
+    assert parse_number("1 250 000") == 1_250_000
+    assert parse_number("120 m²") == 120
+    assert parse_number("3,5 Zimmer") == 3.5
+    assert parse_number(4) == 4.0
+    assert math.isnan(parse_number(None)) and math.isnan(parse_number("n/a"))
+
+
+def test_unparseable_price_sorts_last():
+    assert parse_price("Price on request") == float("inf")
+    assert numeric_fields(listing("CHF 900'000", size="80 m²", rooms="3.5")) == (900_000, 80, 3.5)
+
+
+def test_filter_applies_every_bound_in_ingest_order():
+    table = ListingTable([
+        listing("CHF 900'000", "ZH", "80 m²", "3"),
+        listing("CHF 1'500'000", "ZH", "140 m²", "5"),
+        listing("CHF 700'000", "be", "60 m²", "2"),
+        listing("Price on request", "ZH"),
+    ])
+
+    assert [r["price"] for r in table.filter(min_price=800_000)] == ["CHF 900'000", "CHF 1'500'000", "Price on request"]
+    assert [r["price"] for r in table.filter(max_price=1_000_000, canton_code="zh")] == ["CHF 900'000"]
+    assert [r["price"] for r in table.filter(canton_code="BE", min_rooms=2, max_size=60)] == ["CHF 700'000"]
+    assert table.filter(canton_code="GE") == []
+    assert len(table.filter(limit=2)) == 2
+
+
+def test_sort_is_stable_and_puts_unknown_values_last():
+    table = ListingTable([
+        listing("CHF 900'000", size="100 m²"),
+        listing("Price on request", size="50 m²"),
+        listing("CHF 600'000", size="100 m²"),
+        listing("CHF 900'000", size=None),
+    ])
+
+    assert [table.records.index(r) for r in table.sort()] == [2, 0, 3, 1]
+    assert [table.records.index(r) for r in table.sort(descending=True, limit=2)] == [1, 0]
+    assert [table.records.index(r) for r in table.sort(by="price_per_sqm")] == [2, 0, 1, 3]
+    assert [table.records.index(r) for r in table.sort(max_price=800_000)] == [2]
+
+
+def test_canton_summary_matches_numpy_medians():
+    prices = [800_000, 1_000_000, 1_300_000]
+    table = ListingTable([listing(p, "ZH", 100) for p in prices] + [listing(500_000, "BE", 50), listing(400_000, None, 40)])
+
+    summary = table.canton_summary()
+
+    assert set(summary) == {"ZH", "BE"}
+    assert summary["ZH"] == {"count": 3, "median_price": float(np.median(prices)), "median_price_per_sqm": 10_000.0}
+    assert summary["BE"]["count"] == 1 and summary["BE"]["median_price_per_sqm"] == 10_000.0
+
+
+def test_copy_and_replace_leave_the_original_table_alone():
+    table = ListingTable([listing("CHF 900'000"), listing("CHF 700'000")])
+    snapshot = table.copy()
+
+    table.replace(0, listing("CHF 850'000", "GE", "90 m²"))
+    table.extend([listing("CHF 1'000'000")])
+
+    assert len(snapshot) == 2 and snapshot.price.tolist() == [900_000, 700_000]
+    assert snapshot.filter(canton_code="GE") == []
+    assert table.price.tolist() == [850_000, 700_000, 1_000_000]
+    assert table.size[0] == 90 and [r["price"] for r in table.filter(canton_code="GE")] == ["CHF 850'000"]
@@ -0,0 +1,58 @@
+import time
+
+import numpy as np
+
+from src.listing_db import ListingDatabase
+from src.market_stats import PERCENTILES, UNKNOWN, MarketStatistics, grouped_median, grouped_percentiles
+
+DAY = 24 * 60 * 60
+
+
+def listing(number, price=1_000_000, size=100, canton="ZH"):
+    return {"building_name": f"Listing {number}", "property_type": "Apartment", "location_address": f"Street {number}, 8000 Zürich",
+            "canton": canton, "price": f"CHF {price}", "size": f"{size} m²", "rooms": "3.5", "description": "",
+            "listing_url": f"https://example.ch/{number}"}
+
+
+def test_grouped_percentiles_match_numpy_per_group():
+    rng = np.random.default_rng(7)
+    codes = rng.integers(-1, 4, 500)
+    values = rng.normal(10_000, 2_000, 500)
+    values[::17] = np.nan
+
+    groups, counts, percentiles = grouped_percentiles(codes, values)
+
+    assert list(groups) == [0, 1, 2, 3]
+    for group, count, row in zip(groups, counts, percentiles):
+        expected = values[(codes == group) & np.isfinite(values)]
+        assert count == len(expected)
+        np.testing.assert_allclose(row, np.percentile(expected, PERCENTILES))
+    assert grouped_median(np.array([0, 0, 1, UNKNOWN]), np.array([1.0, 3.0, 5.0, 9.0])) == {0: (2.0, 2), 1: (5.0, 1)}
+
+
+def test_city_figures_need_enough_listings():
+    stats = MarketStatistics()
+    stats.observe("Zürich", [listing(i, price=1_000_000 + i * 100_000) for i in range(4)])
+    assert stats.city("Zurich") is None
+
+    stats.observe("Zürich", [listing(4, price=1_400_000)])
+    figures = stats.city("Zurich")
+    assert figures["active_listings"] == 5 and figures["median_price"] == 1_200_000
+    assert figures["price_per_sqm"]["p50"] == 12_000 and figures["property_types"] == {"apartment": 5}
+    assert stats.canton("zh")["active_listings"] == 5
+
+
+def test_live_search_keeps_the_crawlers_first_seen_date(tmp_path):
+    database = ListingDatabase(str(tmp_path / "listings.sqlite3"))
+    database.sync_page("Zürich", "homegate", "https://example.ch/page", [listing(i) for i in range(5)])
+    long_ago = time.time() - 90 * DAY
+    with database._conn:
+        database._conn.execute("UPDATE listings SET first_seen = ?", (long_ago,))
+    stats = MarketStatistics(database)
+
+    # A live search before the statistics loaded the database sees the same five listings and one new one
+    stats.observe("Zürich", [listing(i) for i in range(6)])
+
+    first_seen = sorted(stats._columns["first_seen"])
+    assert first_seen[:5] == [long_ago] * 5 and first_seen[5] > long_ago
+    assert stats.city("Zurich")["new_listings"] == 1
@@ -0,0 +1,153 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from src.fake_backends import FakeExtractor, FakeLLM, injected_failure
+from src.resilience import CircuitBreaker, CircuitOpenError, Upstream, get_upstream, is_retryable, status_code_of
+from src.swiss_real_estate_agent import SwissPropertyAgent
+
+PORTAL_URLS = ["https://www.comparis.ch/immobilien/marktplatz/zurich/kaufen"]
+PARAMS = {"prompt": "listings", "schema": {"properties": {"properties": {}}}}
+
+
+def sdk_error(error: BaseException) -> ValueError:
+    # firecrawl-py 1.13 re-raises every error from extract() this way
+    return ValueError(str(error), 500)
+
+
+def http_error(message: str) -> requests.HTTPError:
+    return requests.HTTPError(message)
+
+
+@pytest.mark.parametrize("error, status, retryable", [
+    (sdk_error(http_error("Unexpected error during extract: Status code 503. Service Unavailable - ")), 503, True),
+    (sdk_error(http_error("Internal Server Error: Failed to extract. boom - ")), 500, True),
+    (sdk_error(http_error("Request Timeout: Failed to extract as the request timed out. - ")), 408, True),
+    (sdk_error(http_error("Unexpected error during extract: Status code 429. Rate limit exceeded - ")), 429, True),
+    (sdk_error(http_error("Unexpected error during extract: Status code 401. Unauthorized - ")), 401, False),
+    (sdk_error(http_error("Payment Required: Failed to extract. Insufficient credits - ")), 402, False),
+    (sdk_error(requests.ReadTimeout("HTTPSConnectionPool(host='api.firecrawl.dev', port=443): Read timed out.")), None, True),
+    (sdk_error(requests.ConnectionError("HTTPSConnectionPool(host='api.firecrawl.dev', port=443): Max retries exceeded "
+                                        "with url: /v1/extract (Caused by NewConnectionError('Failed to establish a "
+                                        "new connection'))")), None, True),
+    (sdk_error(Exception("Extract job failed. Error: scrape failed")), 500, True),
+    (requests.ReadTimeout("Read timed out."), None, True),
+    (ValueError("Either prompt or schema is required"), None, False),
+])
+def test_firecrawl_sdk_errors_are_classified_by_their_message(error, status, retryable):
+    assert status_code_of(error) == status
+    assert is_retryable(error) is retryable
+
+
+@pytest.mark.parametrize("mode", ["status", "timeout"])
+def test_failing_portal_trips_its_breaker(mode):
+    extractor = FakeExtractor(fail_sources=["comparis"], failure_mode=mode)
+    upstream = Upstream("test", rate=1000.0, burst=1000, max_attempts=1, failure_threshold=3, recovery_timeout=60.0)
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            upstream.call(lambda: extractor.extract(PORTAL_URLS, PARAMS), keys=("www.comparis.ch",))
+    assert upstream.breaker("www.comparis.ch").state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        upstream.call(lambda: extractor.extract(PORTAL_URLS, PARAMS), keys=("www.comparis.ch",))
+    assert len(extractor.calls) == 3
+
+
+def test_fake_failures_have_the_sdk_shape():
+    error = injected_failure(["comparis"])
+    assert isinstance(error, ValueError) and error.args[1] == 500
+    assert status_code_of(error) == 503
+
+
+def test_client_error_does_not_reset_the_breaker():
+    upstream = Upstream("test", rate=1000.0, burst=1000, max_attempts=1, failure_threshold=3, recovery_timeout=60.0)
+    outage, unauthorized = injected_failure(["comparis"]), sdk_error(http_error("Status code 401. Unauthorized"))
+
+    def fail(error):
+        raise error
+
+    for error in (outage, outage, unauthorized, outage):
+        with pytest.raises(ValueError):
+            upstream.call(lambda: fail(error), keys=("www.comparis.ch",))
+    assert upstream.breaker("www.comparis.ch").state == CircuitBreaker.OPEN
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_retries_of_one_call_count_as_one_failure():
+    upstream = Upstream("test", rate=1000.0, burst=1000, max_attempts=3, base_delay=0.0, failure_threshold=5)
+    extractor = FakeExtractor(fail_sources=["comparis"])
+    for calls in (1, 2):
+        with pytest.raises(ValueError):
+            upstream.call(lambda: extractor.extract(PORTAL_URLS, PARAMS), keys=("www.comparis.ch",))
+        assert upstream.breaker("www.comparis.ch").failures == calls
+    assert len(extractor.calls) == 6
+    assert upstream.breaker("www.comparis.ch").state == CircuitBreaker.CLOSED
+
+
+def test_late_success_after_the_deadline_counts_as_a_failure():
+    upstream = Upstream("test", rate=1000.0, burst=1000, max_attempts=3, failure_threshold=5)
+    breaker = upstream.breaker("www.comparis.ch")
+    breaker.record_failure()
+
+    assert upstream.call(lambda: time.sleep(0.05) or "late", keys=("www.comparis.ch",), deadline=time.monotonic() + 0.01) == "late"
+    assert breaker.failures == 2
+
+
+def test_portal_abandoned_at_its_timeout_counts_as_a_failure():
+    agent = SwissPropertyAgent(extractor=FakeExtractor(source_latency={"comparis": 5.0}), llm=FakeLLM(),
+                               use_cache=False, use_listing_db=False)
+    breaker = get_upstream("firecrawl").breaker("www.comparis.ch")
+    breaker.record_success()
+
+    started = time.monotonic()
+    results = {result["source"]: result for result in agent.iter_portal_results("Zurich", 500000, 2000000, portal_timeout=0.2)}
+    assert results["comparis"]["error"] == "timeout"
+    assert time.monotonic() - started < 1.0
+    # The extraction stops at the portal's deadline instead of running on in the pool, and counts once
+    assert wait_until(lambda: not any(thread.name.startswith("portal-extract") for thread in threading.enumerate()))
+    assert breaker.failures == 1
+
+
+class PendingJobSession:
+    """Firecrawl API stand-in whose extract job never finishes."""
+
+    class Response:
+        def __init__(self, payload):
+            self.status_code, self.payload = 200, payload
+
+        def json(self):
+            return self.payload
+
+    def __init__(self):
+        self.polls = 0
+
+    def post(self, url, headers=None, json=None, timeout=None):
+        return self.Response({"success": True, "id": "job-1"})
+
+    def get(self, url, headers=None, timeout=None):
+        self.polls += 1
+        assert timeout <= 1.0
+        return self.Response({"success": True, "status": "processing"})
+
+
+def test_firecrawl_extract_stops_polling_at_the_deadline(monkeypatch):
+    pytest.importorskip("firecrawl")
+    from src import backends
+
+    session = PendingJobSession()
+    monkeypatch.setattr(backends, "create_http_session", lambda: session)
+    monkeypatch.setattr(backends, "EXTRACT_POLL_INTERVAL", 0.05)
+    app = backends._create_pooled_firecrawl("fc-test")
+
+    started = time.monotonic()
+    with pytest.raises(ValueError) as error:
+        app.extract(PORTAL_URLS, PARAMS, deadline=started + 0.3)
+    assert 0.3 <= time.monotonic() - started < 1.0 and session.polls > 1
+    assert status_code_of(error.value) == 408 and is_retryable(error.value)
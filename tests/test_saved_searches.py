@@ -0,0 +1,25 @@
+import time
+
+from src.extraction_cache import ExtractionCache
+from src.fake_backends import FakeExtractor, FakeLLM
+from src.saved_searches import SavedSearchScheduler, SavedSearchStore
+from src.swiss_real_estate_agent import SwissPropertyAgent
+
+
+def test_second_run_picks_up_a_new_listing(tmp_path):
+    extractor = FakeExtractor(listings_per_portal=2)
+    # A warm extraction cache and listing store would answer a normal search with the first run's listings
+    agent = SwissPropertyAgent(extractor=extractor, llm=FakeLLM(), cache=ExtractionCache(path=str(tmp_path / "cache.sqlite3")),
+                               use_listing_db=False)
+    store = SavedSearchStore(str(tmp_path / "saved_searches.sqlite3"))
+    store.add("Zurich", 0, 10_000_000)
+    scheduler = SavedSearchScheduler(agent, store, interval=60)
+
+    assert scheduler.run_once()["queued"] == 0
+    # One more listing per portal is published before the next run
+    extractor.listings_per_portal = 3
+    totals = scheduler.run_once(now=time.time() + 61)
+
+    assert len(extractor.calls) == 2
+    assert totals["queued"] > 0
+    assert store.pending_count() == totals["queued"]
@@ -0,0 +1,73 @@
+import threading
+import time
+
+import pytest
+
+from src.single_flight import SingleFlight
+
+FOLLOWERS = 4
+
+
+def run_coalesced(flight, func, on_result=lambda result: None):
+    """Run one leader and FOLLOWERS followers for the same key; the leader blocks until all followers wait."""
+    started, release, outcomes = threading.Event(), threading.Event(), []
+
+    def leader_func():
+        started.set()
+        release.wait(5)
+        return func()
+
+    def call(func):
+        try:
+            result, coalesced = flight.do("key", func)
+            on_result(result)
+            outcomes.append((result, coalesced))
+        except Exception as e:
+            outcomes.append((e, None))
+
+    threads = [threading.Thread(target=call, args=(leader_func,))]
+    threads[0].start()
+    started.wait(5)
+    threads += [threading.Thread(target=call, args=(pytest.fail,)) for _ in range(FOLLOWERS)]
+    for thread in threads[1:]:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while flight._calls["key"].followers < FOLLOWERS and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return outcomes
+
+
+def test_concurrent_calls_run_once_and_each_caller_gets_its_own_result():
+    flight, calls = SingleFlight(), []
+
+    def fetch():
+        calls.append(1)
+        return {"properties": [{"price": "CHF 1'000'000"}]}
+
+    def change(result):
+        # Callers change what they get, as ingest and ListingStore.add do
+        result["properties"][0]["price"] = "changed"
+        result["properties"].append({"price": "added"})
+
+    outcomes = run_coalesced(flight, fetch, change)
+
+    assert len(calls) == 1 and flight.in_flight() == 0
+    assert sorted(coalesced for _, coalesced in outcomes) == [False] + [True] * FOLLOWERS
+    results = [result for result, _ in outcomes]
+    assert len({id(result) for result in results}) == len(results)
+    assert all(result == {"properties": [{"price": "changed"}, {"price": "added"}]} for result in results)
+
+
+def test_followers_receive_the_leaders_exception():
+    flight = SingleFlight()
+
+    def fail():
+        raise ConnectionError("portal down")
+
+    outcomes = run_coalesced(flight, fail)
+    assert len(outcomes) == FOLLOWERS + 1
+    assert all(isinstance(error, ConnectionError) for error, _ in outcomes)
+    assert flight.in_flight() == 0
@@ -0,0 +1,45 @@
+import math
+import random
+
+from src.spatial import KDTree, haversine_km, project_km, unproject_km
+
+
+def random_points(count: int, dimensions: int = 2, seed: int = 7):
+    rng = random.Random(seed)
+    return [tuple(rng.uniform(0, 100) for _ in range(dimensions)) for _ in range(count)]
+
+
+def test_query_radius_matches_brute_force():
+    points = random_points(500)
+    tree = KDTree(points, leaf_size=4)
+    for center in random_points(20, seed=11):
+        expected = {i for i, point in enumerate(points) if math.dist(point, center) <= 12.5}
+        assert set(tree.query_radius(center, 12.5)) == expected
+
+
+def test_knn_matches_brute_force_in_three_dimensions():
+    points = random_points(300, dimensions=3)
+    tree = KDTree(points, leaf_size=8)
+    for center in random_points(10, dimensions=3, seed=3):
+        expected = sorted((math.dist(point, center), i) for i, point in enumerate(points))[:5]
+        assert [i for _, i in tree.query(center, k=5)] == [i for _, i in expected]
+        assert all(math.isclose(a, b) for (a, _), (b, _) in zip(tree.query(center, k=5), expected))
+
+
+def test_query_can_exclude_the_point_itself():
+    points = random_points(50)
+    tree = KDTree(points)
+    assert tree.query(points[3], k=1)[0] == (0.0, 3)
+    assert tree.query(points[3], k=1, exclude=3)[0][1] != 3
+
+
+def test_empty_tree():
+    tree = KDTree([])
+    assert len(tree) == 0 and tree.query_radius((0, 0), 10) == [] and tree.query((0, 0), k=3) == []
+
+
+def test_projection_round_trips_and_approximates_great_circle_distance():
+    zurich, bern = (47.3769, 8.5417), (46.9480, 7.4474)
+    assert all(math.isclose(a, b) for a, b in zip(unproject_km(*project_km(*zurich)), zurich))
+    assert math.isclose(math.dist(project_km(*zurich), project_km(*bern)), haversine_km(*zurich, *bern), rel_tol=0.02)
+    assert 94 < haversine_km(*zurich, *bern) < 96
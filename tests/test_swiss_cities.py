@@ -0,0 +1,55 @@
+import logging
+
+import pytest
+
+from src.spatial import haversine_km
+from src.swiss_cities_database import SwissCitiesDatabase
+
+
+def test_unknown_municipality_is_reported_once(caplog):
+    cities = SwissCitiesDatabase()
+    with caplog.at_level(logging.WARNING):
+        assert cities.find("Hinterkappelen") is None
+        assert cities.find("hinterkappelen") is None
+        assert cities.find("Zurich").name == "Zürich"
+    messages = [record.getMessage() for record in caplog.records]
+    assert len(messages) == 1 and "Hinterkappelen" in messages[0]
+
+
+def test_in_canton_rejects_unknown_cantons():
+    with pytest.raises(ValueError, match="Unknown canton"):
+        SwissCitiesDatabase().in_canton("XX")
+
+
+def test_within_radius_matches_brute_force():
+    cities = SwissCitiesDatabase()
+    origin = cities.find("Zürich")
+    records = [record for record in cities._records if record.latitude is not None]
+    expected = sorted(record.name for record in records
+                      if haversine_km(origin.latitude, origin.longitude, record.latitude, record.longitude) <= 30)
+
+    nearby = cities.within_radius(origin.latitude, origin.longitude, 30)
+
+    assert sorted(record.name for record, _ in nearby) == expected and nearby[0][0] is origin
+    assert [distance for _, distance in nearby] == sorted(distance for _, distance in nearby)
+    assert origin not in [record for record, _ in cities.cities_near("Zurich", 30)]
+
+
+def test_autocomplete_is_accent_insensitive_and_ranked_by_population():
+    cities = SwissCitiesDatabase()
+    assert cities.autocomplete("zu")[0] == "Zürich"
+    assert cities.autocomplete("gen")[0] == "Genève"
+    assert cities.autocomplete("") == [] and cities.autocomplete("qqq") == []
+    assert len(cities.autocomplete("b", limit=2)) == 2
+
+
+def test_register_path_is_taken_from_the_environment(tmp_path, monkeypatch):
+    register = tmp_path / "municipalities.csv"
+    register.write_text("name,canton,population,latitude,longitude,region,languages,features,aliases\n"
+                        "Hinterkappelen,BE,2500,46.9667,7.3833,Mittelland,German,,Kappelen\n", encoding="utf-8")
+    monkeypatch.setenv("SWISS_MUNICIPALITIES_PATH", str(register))
+
+    cities = SwissCitiesDatabase()
+
+    assert cities.find("kappelen").name == "Hinterkappelen" and cities.find("Zürich") is None
+    assert not cities.complete